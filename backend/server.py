@@ -1,21 +1,57 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Request, Query
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.responses import StreamingResponse, Response, JSONResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, WaitQueueTimeoutError, BulkWriteError, ExecutionTimeout
+from pymongo import monitoring, ReturnDocument, UpdateOne
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, validator, ValidationError
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple, Literal
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, date, timezone
 import hashlib
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.encoders import jsonable_encoder
 import asyncio
 from functools import wraps
+from abc import ABC, abstractmethod
 import traceback
 import re
-from collections import Counter
+import json
+import math
+import time
+import threading
+import gzip
+import csv
+import codecs
+import sys
+import io
+import cProfile
+import pstats
+import marshal
+from collections import Counter, defaultdict, OrderedDict, deque
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import bisect
+import heapq
+import itertools
+from operator import itemgetter
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is only needed for CACHE_BACKEND=redis
+    aioredis = None
 
 # Professional logging setup
 logging.basicConfig(
@@ -31,11 +67,379 @@ logger = logging.getLogger(__name__)
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Runtime metrics
+class Metrics:
+    """Process-local counters exposed through the admin metrics endpoint"""
+    
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+    
+    def increment(self, name: str, value: int = 1):
+        self._counters[name] += value
+    
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+metrics = Metrics()
+
+# Fire-and-forget tasks; the event loop only keeps weak references to tasks
+_background_tasks: set = set()
+
+def spawn(coro: Awaitable[Any], name: str) -> asyncio.Task:
+    """Run `coro` in the background, holding a reference until it finishes
+    and logging the exception it fails with, if any
+    """
+    task = asyncio.create_task(without_query_budget(coro), name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+def _background_task_done(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        metrics.increment("background_task_failures")
+        logger.error(f"Background task '{task.get_name()}' failed: {task.exception()}")
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Track connection pool usage, including callers waiting for a connection.
+    
+    Motor runs pymongo on executor threads, so the counters are guarded by a
+    lock; a drifting `waiting` count would otherwise shed load forever.
+    """
+    
+    def __init__(self):
+        self.waiting = 0
+        self.checked_out = 0
+        self._lock = threading.Lock()
+    
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+
+pool_monitor = PoolMonitor()
+
+class PeriodicTask:
+    """Run a coroutine function every `interval` seconds in the background"""
+    
+    def __init__(self, name: str, interval: float, func: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Periodic task '{self.name}' started (every {self.interval}s)")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.func()
+            except Exception as e:
+                logger.error(f"Periodic task '{self.name}' failed: {e}")
+
+class LoopLagMonitor:
+    """How late the event loop runs a timer that is due every INTERVAL seconds.
+    
+    Lag is time the loop spent on other work, such as CPU-bound code or a
+    blocking call, while it should have been serving; every request on the
+    worker is delayed by it. The last WINDOW samples are kept.
+    """
+    
+    INTERVAL = float(os.environ.get('LOOP_LAG_INTERVAL', 0.5))
+    WINDOW = 240
+    STALL_SECONDS = 0.1
+    
+    def __init__(self):
+        self._samples: deque = deque(maxlen=self.WINDOW)
+        self._last: Optional[float] = None
+    
+    async def sample(self):
+        now = time.monotonic()
+        if self._last is not None:
+            lag = max(0.0, now - self._last - self.INTERVAL)
+            self._samples.append(lag)
+            if lag >= self.STALL_SECONDS:
+                metrics.increment("event_loop_stalls")
+        self._last = now
+    
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {"samples": 0}
+        return {
+            "samples": len(ordered),
+            "last_ms": round(self._samples[-1] * 1000, 1),
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+            "max_ms": round(ordered[-1] * 1000, 1)
+        }
+
+loop_lag_monitor = LoopLagMonitor()
+loop_lag = PeriodicTask("loop-lag", LoopLagMonitor.INTERVAL, loop_lag_monitor.sample)
+
+# On-demand profiling
+class StackSampler(threading.Thread):
+    """Sample one thread's Python stack at a fixed interval into collapsed-stack counts"""
+    
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stopped = threading.Event()
+    
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+    
+    def stop(self):
+        self._stopped.set()
+        self.join()
+    
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, readable by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+class ProfileSession:
+    def __init__(self, max_requests: Optional[int]):
+        self.max_requests = max_requests
+        self.requests = 0
+        self.done = asyncio.Event()
+    
+    def request_done(self):
+        self.requests += 1
+        if self.max_requests is not None and self.requests >= self.max_requests:
+            self.done.set()
+
+class Profiler:
+    """Profile this worker's event loop thread on demand.
+    
+    "sample" mode runs a stack-sampling thread and returns collapsed
+    stacks; "cprofile" mode enables cProfile on the loop thread and returns
+    pstats text or a marshalled pstats dump. A session ends after a number
+    of seconds or of completed requests, whichever comes first. Nothing is
+    installed while no session runs; request completion is only counted
+    when `session` is set.
+    """
+    
+    def __init__(self):
+        self.session: Optional[ProfileSession] = None
+    
+    def request_done(self):
+        if self.session is not None:
+            self.session.request_done()
+    
+    async def _wait(self, session: ProfileSession, seconds: float):
+        try:
+            await asyncio.wait_for(session.done.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def sample(self, seconds: float, max_requests: Optional[int], interval: float) -> Tuple[str, int]:
+        session = self.session = ProfileSession(max_requests)
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+        try:
+            await self._wait(session, seconds)
+        finally:
+            sampler.stop()
+            self.session = None
+        return sampler.collapsed(), session.requests
+    
+    async def cprofile(self, seconds: float, max_requests: Optional[int], raw: bool) -> Tuple[bytes, int]:
+        session = self.session = ProfileSession(max_requests)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await self._wait(session, seconds)
+        finally:
+            profile.disable()
+            self.session = None
+        
+        if raw:
+            profile.create_stats()
+            return marshal.dumps(profile.stats), session.requests
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(200)
+        return output.getvalue().encode(), session.requests
+
+profiler = Profiler()
+
+# Sample data
+def build_sample_data() -> Tuple[List[dict], List[dict]]:
+    """Sample users and challenges with Brazilian names and realistic expectations"""
+    sample_users = [
+        # ADMIN USER
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Administrador do Sistema",
+            "email": "admin@pucrs.br",
+            "password_hash": hashlib.sha256("ADMIN".encode()).hexdigest(),
+            "type": "admin",
+            "points": 1000,
+            "expectations": None,
+            "created_at": datetime.utcnow()
+        },
+        # Regular users
+        {
+            "id": str(uuid.uuid4()),
+            "name": "João Silva",
+            "email": "joao.silva@pucrs.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "professor",
+            "points": 50,
+            "expectations": "Busco alunos com pensamento crítico, adaptabilidade, competências digitais e habilidades de comunicação eficaz. Valorizo muito a criatividade e capacidade de trabalho em equipe.",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Maria Oliveira",
+            "email": "maria.oliveira@pucrs.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "aluno",
+            "points": 85,
+            "expectations": "Procuro uma empresa com ambiente inclusivo, oportunidades de crescimento profissional, tecnologia moderna, horário flexível e que valorize propósito e responsabilidade social.",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Pedro Santos",
+            "email": "pedro.santos@techcorp.com.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "empresa",
+            "points": 30,
+            "expectations": "Nossa empresa busca recém-formados com competências digitais, inteligência emocional, capacidade de inovação e forte ética profissional. Valorizamos diversidade e aprendizado contínuo.",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Ana Costa",
+            "email": "ana.costa@pucrs.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "aluno",
+            "points": 120,
+            "expectations": "Busco empresas que ofereçam planos de saúde, cultura colaborativa, feedback regular, possibilidade de trabalho remoto e oportunidades de desenvolvimento pessoal e profissional.",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Carlos Fernandes",
+            "email": "carlos.fernandes@pucrs.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "professor",
+            "points": 75,
+            "expectations": "Procuro estudantes com pensamento crítico, habilidades de resolução de problemas, consciência cultural, capacidade de comunicação e comprometimento com ética e responsabilidade.",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "name": "Augusto Ribeiro",
+            "email": "augusto.ribeiro@inovacorp.com.br",
+            "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
+            "type": "empresa",
+            "points": 95,
+            "expectations": "Buscamos talentos com adaptabilidade, trabalho em equipe, criatividade, competências tecnológicas e forte capacidade de comunicação. Valorizamos diversidade e inovação.",
+            "created_at": datetime.utcnow()
+        }
+    ]
+    
+    # Sample challenges
+    sample_challenges = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": "Sistema de Gestão Sustentável",
+            "description": "Desenvolver uma plataforma para otimizar o consumo de energia em edifícios corporativos, utilizando sensores IoT e algoritmos de machine learning para reduzir custos e impacto ambiental. A solução deve incluir dashboard em tempo real, alertas automáticos e relatórios de economia gerada.",
+            "summary": "Plataforma IoT + ML para otimização de energia em edifícios corporativos com dashboard em tempo real.",
+            "creator_id": sample_users[1]["id"],
+            "creator_name": sample_users[1]["name"],
+            "deadline": DeadlineService.today() + timedelta(days=30),
+            "reward": "R$ 10.000 + Estágio na empresa",
+            "active": True,
+            "status": "open",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "title": "App de Mobilidade Urbana Inteligente",
+            "description": "Criar um aplicativo que integre dados de transporte público, trânsito e rotas de bicicleta para otimizar deslocamentos urbanos, incluindo funcionalidades de gamificação para incentivar mobilidade sustentável. O app deve ter GPS, integração com APIs de transporte e sistema de pontuação para usuários ecológicos.",
+            "summary": "App integrado de transporte público, trânsito e rotas sustentáveis com gamificação.",
+            "creator_id": sample_users[6]["id"],
+            "creator_name": sample_users[6]["name"],
+            "deadline": DeadlineService.today() + timedelta(days=60),
+            "reward": "R$ 15.000 + Mentoria técnica",
+            "active": True,
+            "status": "open",
+            "created_at": datetime.utcnow()
+        },
+        {
+            "id": str(uuid.uuid4()),
+            "title": "Plataforma de Educação Adaptativa com IA",
+            "description": "Desenvolver uma solução educacional que utiliza inteligência artificial para personalizar o aprendizado de estudantes, adaptando conteúdo e metodologia conforme o perfil e progresso individual. A plataforma deve incluir análise de comportamento, recomendações automáticas e relatórios para professores.",
+            "summary": "Plataforma educacional com IA para personalizar aprendizado e adaptar conteúdo automaticamente.",
+            "creator_id": sample_users[5]["id"],
+            "creator_name": sample_users[5]["name"],
+            "deadline": DeadlineService.today() + timedelta(days=90),
+            "reward": "R$ 8.000 + Publicação em revista científica",
+            "active": True,
+            "status": "open",
+            "created_at": datetime.utcnow()
+        }
+    ]
+    
+    return sample_users, sample_challenges
+
+class DatabaseUnavailableError(RuntimeError):
+    """MongoDB is not connected, e.g. when running on the memory storage backend"""
+
 # Database configuration with connection pooling
 class DatabaseManager:
     _instance = None
     _client = None
     _database = None
+    supports_transactions = False
+    
+    MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 10))
     
     def __new__(cls):
         if cls._instance is None:
@@ -54,13 +458,14 @@ class DatabaseManager:
             # Connection with advanced options
             self._client = AsyncIOMotorClient(
                 mongo_url,
-                maxPoolSize=50,
-                minPoolSize=10,
+                maxPoolSize=self.MAX_POOL_SIZE,
+                minPoolSize=self.MIN_POOL_SIZE,
                 maxIdleTimeMS=30000,
                 waitQueueTimeoutMS=5000,
                 connectTimeoutMS=20000,
                 socketTimeoutMS=20000,
-                serverSelectionTimeoutMS=5000
+                serverSelectionTimeoutMS=5000,
+                event_listeners=[pool_monitor]
             )
             
             self._database = self._client[db_name]
@@ -69,6 +474,12 @@ class DatabaseManager:
             await self._client.admin.command('ping')
             logger.info(f"Successfully connected to MongoDB: {db_name}")
             
+            # Multi-document transactions need a replica set or a sharded cluster
+            hello = await self._client.admin.command('hello')
+            self.supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+            
+            await self._ensure_indexes()
+            
             # Initialize sample data if empty
             await self._initialize_sample_data()
             
@@ -79,14 +490,63 @@ class DatabaseManager:
     @property
     def db(self):
         if self._database is None:
-            raise RuntimeError("Database not initialized. Call initialize() first.")
+            raise DatabaseUnavailableError("Database not initialized. Call initialize() first.")
         return self._database
     
+    @property
+    def connected(self) -> bool:
+        return self._database is not None
+    
+    async def start_session(self):
+        return await self._client.start_session()
+    
     async def close(self):
         if self._client:
             self._client.close()
             logger.info("Database connection closed")
     
+    async def warm_pool(self):
+        """Open minPoolSize connections now instead of on the first requests.
+        
+        The driver fills the pool in the background; concurrent pings each
+        check out their own connection, so the handshakes happen here.
+        """
+        await asyncio.gather(*(self._client.admin.command('ping') for _ in range(self.MIN_POOL_SIZE)))
+    
+    # (collection, keys, options); each index is created independently so one
+    # failure (e.g. existing duplicates under a unique index) does not block the rest
+    INDEXES = [
+        ("outbox", [("status", 1), ("next_attempt_at", 1)], {}),
+        ("outbox", "claim_id", {}),
+        ("outbox", "id", {"unique": True}),
+        ("users", "email", {"unique": True}),
+        ("solutions", [("challenge_id", 1), ("votes", -1)], {}),
+        ("solutions", [("challenge_id", 1), ("author_id", 1)], {"unique": True}),
+        ("votes", [("solution_id", 1), ("user_id", 1)], {}),
+        ("votes", [("user_id", 1), ("solution_id", 1)], {"unique": True}),
+        ("votes", "id", {"unique": True, "sparse": True}),
+        ("votes", "created_at", {}),
+        ("applied_events", [("target", 1), ("event_id", 1)], {"unique": True}),
+        ("applied_events", "applied_at", {"expireAfterSeconds": 7 * 24 * 3600}),
+        ("points_ledger", [("user_id", 1), ("recorded_at", 1)], {}),
+        ("points_ledger", [("solution_id", 1), ("recorded_at", 1)], {}),
+        ("points_ledger", "recorded_at", {}),
+        ("challenges", [("active", 1), ("deadline", 1)], {}),
+        ("challenges", [("status", 1), ("deactivated_at", 1)], {}),
+        ("challenges_archive", [("created_at", -1)], {}),
+        ("solutions_archive", "challenge_id", {}),
+        ("solutions_archive", [("votes", -1)], {}),
+        ("votes_archive", "solution_id", {})
+    ]
+    
+    async def _ensure_indexes(self):
+        """Create the indexes the endpoints and background workers rely on"""
+        for collection, keys, options in self.INDEXES:
+            try:
+                await self._database[collection].create_index(keys, **options)
+            except Exception as e:
+                logger.error(f"Failed to create index {keys} on {collection}: {e}")
+    
     async def _initialize_sample_data(self):
         """Initialize sample data with Brazilian names and realistic expectations"""
         try:
@@ -94,124 +554,11 @@ class DatabaseManager:
             user_count = await self._database.users.count_documents({})
             
             if user_count == 0:
-                sample_users = [
-                    # ADMIN USER
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Administrador do Sistema",
-                        "email": "admin@pucrs.br",
-                        "password_hash": hashlib.sha256("ADMIN".encode()).hexdigest(),
-                        "type": "admin",
-                        "points": 1000,
-                        "expectations": None,
-                        "created_at": datetime.utcnow()
-                    },
-                    # Regular users
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "João Silva",
-                        "email": "joao.silva@pucrs.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "professor",
-                        "points": 50,
-                        "expectations": "Busco alunos com pensamento crítico, adaptabilidade, competências digitais e habilidades de comunicação eficaz. Valorizo muito a criatividade e capacidade de trabalho em equipe.",
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Maria Oliveira",
-                        "email": "maria.oliveira@pucrs.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "aluno",
-                        "points": 85,
-                        "expectations": "Procuro uma empresa com ambiente inclusivo, oportunidades de crescimento profissional, tecnologia moderna, horário flexível e que valorize propósito e responsabilidade social.",
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Pedro Santos",
-                        "email": "pedro.santos@techcorp.com.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "empresa",
-                        "points": 30,
-                        "expectations": "Nossa empresa busca recém-formados com competências digitais, inteligência emocional, capacidade de inovação e forte ética profissional. Valorizamos diversidade e aprendizado contínuo.",
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Ana Costa",
-                        "email": "ana.costa@pucrs.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "aluno",
-                        "points": 120,
-                        "expectations": "Busco empresas que ofereçam planos de saúde, cultura colaborativa, feedback regular, possibilidade de trabalho remoto e oportunidades de desenvolvimento pessoal e profissional.",
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Carlos Fernandes",
-                        "email": "carlos.fernandes@pucrs.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "professor",
-                        "points": 75,
-                        "expectations": "Procuro estudantes com pensamento crítico, habilidades de resolução de problemas, consciência cultural, capacidade de comunicação e comprometimento com ética e responsabilidade.",
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "name": "Augusto Ribeiro",
-                        "email": "augusto.ribeiro@inovacorp.com.br",
-                        "password_hash": hashlib.sha256("123456".encode()).hexdigest(),
-                        "type": "empresa",
-                        "points": 95,
-                        "expectations": "Buscamos talentos com adaptabilidade, trabalho em equipe, criatividade, competências tecnológicas e forte capacidade de comunicação. Valorizamos diversidade e inovação.",
-                        "created_at": datetime.utcnow()
-                    }
-                ]
+                sample_users, sample_challenges = build_sample_data()
                 
                 await self._database.users.insert_many(sample_users)
                 logger.info(f"Inserted {len(sample_users)} sample users including ADMIN")
                 
-                # Sample challenges
-                sample_challenges = [
-                    {
-                        "id": str(uuid.uuid4()),
-                        "title": "Sistema de Gestão Sustentável",
-                        "description": "Desenvolver uma plataforma para otimizar o consumo de energia em edifícios corporativos, utilizando sensores IoT e algoritmos de machine learning para reduzir custos e impacto ambiental. A solução deve incluir dashboard em tempo real, alertas automáticos e relatórios de economia gerada.",
-                        "summary": "Plataforma IoT + ML para otimização de energia em edifícios corporativos com dashboard em tempo real.",
-                        "creator_id": sample_users[1]["id"],
-                        "creator_name": sample_users[1]["name"],
-                        "deadline": "2025-06-15",
-                        "reward": "R$ 10.000 + Estágio na empresa",
-                        "active": True,
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "title": "App de Mobilidade Urbana Inteligente",
-                        "description": "Criar um aplicativo que integre dados de transporte público, trânsito e rotas de bicicleta para otimizar deslocamentos urbanos, incluindo funcionalidades de gamificação para incentivar mobilidade sustentável. O app deve ter GPS, integração com APIs de transporte e sistema de pontuação para usuários ecológicos.",
-                        "summary": "App integrado de transporte público, trânsito e rotas sustentáveis com gamificação.",
-                        "creator_id": sample_users[6]["id"],
-                        "creator_name": sample_users[6]["name"],
-                        "deadline": "2025-07-20",
-                        "reward": "R$ 15.000 + Mentoria técnica",
-                        "active": True,
-                        "created_at": datetime.utcnow()
-                    },
-                    {
-                        "id": str(uuid.uuid4()),
-                        "title": "Plataforma de Educação Adaptativa com IA",
-                        "description": "Desenvolver uma solução educacional que utiliza inteligência artificial para personalizar o aprendizado de estudantes, adaptando conteúdo e metodologia conforme o perfil e progresso individual. A plataforma deve incluir análise de comportamento, recomendações automáticas e relatórios para professores.",
-                        "summary": "Plataforma educacional com IA para personalizar aprendizado e adaptar conteúdo automaticamente.",
-                        "creator_id": sample_users[5]["id"],
-                        "creator_name": sample_users[5]["name"],
-                        "deadline": "2025-08-10",
-                        "reward": "R$ 8.000 + Publicação em revista científica",
-                        "active": True,
-                        "created_at": datetime.utcnow()
-                    }
-                ]
-                
                 await self._database.challenges.insert_many(sample_challenges)
                 logger.info(f"Inserted {len(sample_challenges)} sample challenges with summaries")
                 
@@ -222,6 +569,499 @@ class DatabaseManager:
 # Initialize database manager
 db_manager = DatabaseManager()
 
+# Query time budgets
+# Milliseconds of database time one request may use, by path prefix; None
+# leaves the route unbounded. Other routes get QUERY_BUDGET_MS
+QUERY_BUDGETS_MS: Dict[str, Optional[int]] = {
+    "/api/matching-analysis": 5000,
+    "/api/recommendations": 5000,
+    "/api/admin/dashboard": 10000,
+    "/api/admin/detailed-stats": 10000,
+    "/api/admin/import": None,
+    "/api/admin/profile": None,
+    "/api/stream": None
+}
+
+DEFAULT_QUERY_BUDGET_MS = int(os.environ.get('QUERY_BUDGET_MS', 2000))
+
+_query_deadline: ContextVar[Optional[float]] = ContextVar("query_deadline", default=None)
+
+def query_budget_ms(path: str) -> Optional[int]:
+    for prefix, budget in QUERY_BUDGETS_MS.items():
+        if path.startswith(prefix):
+            return budget
+    return DEFAULT_QUERY_BUDGET_MS
+
+def max_time_ms() -> Optional[int]:
+    """What is left of the current request's budget, for find's max_time_ms.
+    
+    None outside a budgeted request. Raises ExecutionTimeout once the budget
+    is spent, since maxTimeMS=0 would mean no limit at all.
+    """
+    deadline = _query_deadline.get()
+    if deadline is None:
+        return None
+    remaining = int((deadline - time.monotonic()) * 1000)
+    if remaining <= 0:
+        raise ExecutionTimeout("Query time budget exhausted")
+    return remaining
+
+def time_limit() -> Dict[str, int]:
+    """maxTimeMS option for aggregate and count_documents"""
+    remaining = max_time_ms()
+    return {} if remaining is None else {"maxTimeMS": remaining}
+
+async def without_query_budget(coro: Awaitable[Any]) -> Any:
+    """Await `coro` outside the current request's budget.
+    
+    Tasks copy the context of the request that creates them; wrap the
+    coroutine of a task that outlives or is shared beyond that request, so
+    its queries are not cut short by the creator's deadline.
+    """
+    _query_deadline.set(None)
+    return await coro
+
+# Storage backends
+async def insert_unordered(collection, documents: List[dict]) -> Dict[int, str]:
+    """insert_many(ordered=False); returns the error message of each rejected position"""
+    if not documents:
+        return {}
+    try:
+        await collection.insert_many(documents, ordered=False)
+        return {}
+    except BulkWriteError as e:
+        return {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+
+class MongoUserRepository:
+    """Users stored in MongoDB. Every repository returns plain documents"""
+    
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await db_manager.db.users.find_one({"id": user_id}, max_time_ms=max_time_ms())
+    
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        return await db_manager.db.users.find_one({"email": email}, max_time_ms=max_time_ms())
+    
+    async def insert(self, user: dict):
+        await db_manager.db.users.insert_one(user)
+    
+    async def insert_many(self, users: List[dict]) -> Dict[int, str]:
+        return await insert_unordered(db_manager.db.users, users)
+    
+    async def existing_emails(self, emails: List[str]) -> set:
+        cursor = db_manager.db.users.find({"email": {"$in": emails}}, {"_id": 0, "email": 1}, max_time_ms=max_time_ms())
+        return {user["email"] async for user in cursor}
+    
+    async def add_points(self, user_id: str, points: int) -> Optional[dict]:
+        return await db_manager.db.users.find_one_and_update(
+            {"id": user_id}, {"$inc": {"points": points}}, return_document=ReturnDocument.AFTER
+        )
+    
+    async def top_by_points(self, limit: int) -> List[dict]:
+        return await db_manager.db.users.find(max_time_ms=max_time_ms()).sort("points", -1).limit(limit).to_list(limit)
+    
+    async def recent(self, limit: int) -> List[dict]:
+        return await db_manager.db.users.find(max_time_ms=max_time_ms()).sort("created_at", -1).limit(limit).to_list(limit)
+    
+    async def with_expectations(self, limit: int) -> List[dict]:
+        cursor = db_manager.db.users.find({"expectations": {"$exists": True, "$ne": None}}, max_time_ms=max_time_ms())
+        return await cursor.to_list(length=limit)
+    
+    async def count(self) -> int:
+        return await db_manager.db.users.count_documents({}, **time_limit())
+
+class MongoChallengeRepository:
+    async def get(self, challenge_id: str) -> Optional[dict]:
+        return await db_manager.db.challenges.find_one({"id": challenge_id}, max_time_ms=max_time_ms())
+    
+    async def insert(self, challenge: dict):
+        await db_manager.db.challenges.insert_one(challenge)
+    
+    async def insert_many(self, challenges: List[dict]) -> Dict[int, str]:
+        return await insert_unordered(db_manager.db.challenges, challenges)
+    
+    async def list_active(
+        self,
+        limit: int,
+        deadline_after: Optional[datetime] = None,
+        deadline_before: Optional[datetime] = None
+    ) -> List[dict]:
+        """Active challenges, newest first, optionally within a deadline range"""
+        query: Dict[str, Any] = {"active": True}
+        if deadline_after or deadline_before:
+            query["deadline"] = {}
+            if deadline_after:
+                query["deadline"]["$gte"] = deadline_after
+            if deadline_before:
+                query["deadline"]["$lte"] = deadline_before
+        return await db_manager.db.challenges.find(query, max_time_ms=max_time_ms()).sort("created_at", -1).limit(limit).to_list(limit)
+    
+    async def get_with_solutions(self, challenge_id: str, limit: int) -> Optional[dict]:
+        """A challenge with its top `limit` solutions by votes under "solutions",
+        each carrying its author's current points as "author_points"
+        """
+        solutions_pipeline = [
+            {"$match": {"$expr": {"$eq": ["$challenge_id", "$$challenge_id"]}}},
+            {"$sort": {"votes": -1}},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": "users",
+                "let": {"author_id": "$author_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$id", "$$author_id"]}}},
+                    {"$project": {"_id": 0, "points": 1}}
+                ],
+                "as": "author"
+            }},
+            {"$addFields": {"author_points": {"$ifNull": [{"$arrayElemAt": ["$author.points", 0]}, 0]}}},
+            {"$project": {"author": 0}}
+        ]
+        
+        results = await db_manager.db.challenges.aggregate([
+            {"$match": {"id": challenge_id}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "solutions",
+                "let": {"challenge_id": "$id"},
+                "pipeline": solutions_pipeline,
+                "as": "solutions"
+            }}
+        ], **time_limit()).to_list(1)
+        return results[0] if results else None
+    
+    async def expire(self, before: datetime, now: datetime) -> int:
+        """Close every active challenge whose deadline is before `before`"""
+        result = await db_manager.db.challenges.update_many(
+            {"active": True, "deadline": {"$lt": before}},
+            {"$set": {"active": False, "status": "expired", "deactivated_at": now}}
+        )
+        return result.modified_count
+    
+    async def count_active(self) -> int:
+        return await db_manager.db.challenges.count_documents({"active": True}, **time_limit())
+
+class MongoSolutionRepository:
+    async def get(self, solution_id: str) -> Optional[dict]:
+        return await db_manager.db.solutions.find_one({"id": solution_id}, max_time_ms=max_time_ms())
+    
+    async def insert(self, solution: dict):
+        await db_manager.db.solutions.insert_one(solution)
+    
+    async def add_votes(self, solution_id: str, votes: int) -> Optional[dict]:
+        return await db_manager.db.solutions.find_one_and_update(
+            {"id": solution_id}, {"$inc": {"votes": votes}}, return_document=ReturnDocument.AFTER
+        )
+    
+    async def top_by_votes(self, limit: int, challenge_id: Optional[str] = None) -> List[dict]:
+        query = {"challenge_id": challenge_id} if challenge_id else {}
+        return await db_manager.db.solutions.find(query, max_time_ms=max_time_ms()).sort("votes", -1).limit(limit).to_list(limit)
+    
+    async def count(self) -> int:
+        return await db_manager.db.solutions.count_documents({}, **time_limit())
+
+class MongoVoteRepository:
+    async def insert(self, vote: dict):
+        """Insert a vote unless a vote with its id exists; raises
+        DuplicateKeyError if the user already voted with another vote
+        """
+        await db_manager.db.votes.update_one({"id": vote["id"]}, {"$setOnInsert": vote}, upsert=True)
+    
+    async def solution_ids_for_user(self, user_id: str) -> set:
+        cursor = db_manager.db.votes.find({"user_id": user_id}, {"_id": 0, "solution_id": 1}, max_time_ms=max_time_ms())
+        return {vote["solution_id"] async for vote in cursor}
+    
+    async def for_solution(self, solution_id: str, skip: int, limit: int) -> List[dict]:
+        """One page of a solution's votes, oldest first"""
+        cursor = db_manager.db.votes.find({"solution_id": solution_id}, {"_id": 0}, max_time_ms=max_time_ms())
+        return await cursor.sort("created_at", 1).skip(skip).limit(limit).to_list(limit)
+    
+    async def count(self) -> int:
+        return await db_manager.db.votes.count_documents({}, **time_limit())
+
+class SortedIndex:
+    """Keys kept in ascending order with bisect; O(log n) search, O(n) insert"""
+    
+    def __init__(self):
+        self._keys: List[tuple] = []
+    
+    def add(self, key: tuple):
+        bisect.insort(self._keys, key)
+    
+    def remove(self, key: tuple):
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+    
+    def between(self, low: Any = None, high: Any = None) -> List[tuple]:
+        """Keys whose first element lies in [low, high]; None leaves a side open"""
+        start = 0 if low is None else bisect.bisect_left(self._keys, low, key=itemgetter(0))
+        end = len(self._keys) if high is None else bisect.bisect_right(self._keys, high, key=itemgetter(0))
+        return self._keys[start:end]
+    
+    def __iter__(self):
+        return iter(self._keys)
+    
+    def __reversed__(self):
+        return reversed(self._keys)
+    
+    def __len__(self):
+        return len(self._keys)
+
+async def insert_each(insert: Callable[[dict], Awaitable[None]], documents: List[dict]) -> Dict[int, str]:
+    """Memory backend counterpart of insert_unordered"""
+    errors = {}
+    for index, document in enumerate(documents):
+        try:
+            await insert(document)
+        except DuplicateKeyError as e:
+            errors[index] = str(e)
+    return errors
+
+class MemoryUserRepository:
+    """Users held in process memory, indexed by id, email, points and creation time"""
+    
+    def __init__(self):
+        self._users: Dict[str, dict] = {}
+        self._by_email: Dict[str, str] = {}
+        self._by_points = SortedIndex()
+        self._by_created = SortedIndex()
+    
+    async def get(self, user_id: str) -> Optional[dict]:
+        user = self._users.get(user_id)
+        return dict(user) if user else None
+    
+    async def find_by_email(self, email: str) -> Optional[dict]:
+        user_id = self._by_email.get(email)
+        return await self.get(user_id) if user_id else None
+    
+    async def insert(self, user: dict):
+        if user["id"] in self._users:
+            raise DuplicateKeyError(f"Duplicate user id {user['id']}")
+        if user["email"] in self._by_email:
+            raise DuplicateKeyError(f"Duplicate user email {user['email']}")
+        user = dict(user)
+        self._users[user["id"]] = user
+        self._by_email[user["email"]] = user["id"]
+        self._by_points.add((-user.get("points", 0), user["id"]))
+        self._by_created.add((user["created_at"], user["id"]))
+    
+    async def insert_many(self, users: List[dict]) -> Dict[int, str]:
+        return await insert_each(self.insert, users)
+    
+    async def existing_emails(self, emails: List[str]) -> set:
+        return {email for email in emails if email in self._by_email}
+    
+    async def add_points(self, user_id: str, points: int) -> Optional[dict]:
+        user = self._users.get(user_id)
+        if user is None:
+            return None
+        self._by_points.remove((-user.get("points", 0), user_id))
+        user["points"] = user.get("points", 0) + points
+        self._by_points.add((-user["points"], user_id))
+        return dict(user)
+    
+    async def top_by_points(self, limit: int) -> List[dict]:
+        return [dict(self._users[user_id]) for _, user_id in itertools.islice(self._by_points, limit)]
+    
+    async def recent(self, limit: int) -> List[dict]:
+        return [dict(self._users[user_id]) for _, user_id in itertools.islice(reversed(self._by_created), limit)]
+    
+    async def with_expectations(self, limit: int) -> List[dict]:
+        users = (user for user in self._users.values() if user.get("expectations"))
+        return [dict(user) for user in itertools.islice(users, limit)]
+    
+    async def count(self) -> int:
+        return len(self._users)
+
+class MemoryChallengeRepository:
+    """Challenges held in process memory, indexed by creation time and active deadline"""
+    
+    def __init__(self, storage: "Storage"):
+        self._storage = storage
+        self._challenges: Dict[str, dict] = {}
+        self._by_created = SortedIndex()
+        self._by_deadline = SortedIndex()
+    
+    async def get(self, challenge_id: str) -> Optional[dict]:
+        challenge = self._challenges.get(challenge_id)
+        return dict(challenge) if challenge else None
+    
+    async def insert(self, challenge: dict):
+        if challenge["id"] in self._challenges:
+            raise DuplicateKeyError(f"Duplicate challenge id {challenge['id']}")
+        challenge = dict(challenge)
+        self._challenges[challenge["id"]] = challenge
+        self._by_created.add((challenge["created_at"], challenge["id"]))
+        if challenge.get("active", True) and challenge.get("deadline") is not None:
+            self._by_deadline.add((challenge["deadline"], challenge["id"]))
+    
+    async def insert_many(self, challenges: List[dict]) -> Dict[int, str]:
+        return await insert_each(self.insert, challenges)
+    
+    async def list_active(
+        self,
+        limit: int,
+        deadline_after: Optional[datetime] = None,
+        deadline_before: Optional[datetime] = None
+    ) -> List[dict]:
+        """Active challenges, newest first, optionally within a deadline range"""
+        if deadline_after or deadline_before:
+            keys = self._by_deadline.between(deadline_after, deadline_before)
+            candidates = sorted(
+                (self._challenges[challenge_id] for _, challenge_id in keys),
+                key=lambda challenge: challenge["created_at"],
+                reverse=True
+            )
+        else:
+            candidates = (self._challenges[challenge_id] for _, challenge_id in reversed(self._by_created))
+        active = (challenge for challenge in candidates if challenge.get("active", True))
+        return [dict(challenge) for challenge in itertools.islice(active, limit)]
+    
+    async def expire(self, before: datetime, now: datetime) -> int:
+        # The deadline index only holds active challenges, so expired ones leave it
+        due = [key for key in self._by_deadline.between(None, before) if key[0] < before]
+        for key in due:
+            self._by_deadline.remove(key)
+            self._challenges[key[1]].update({"active": False, "status": "expired", "deactivated_at": now})
+        return len(due)
+    
+    async def get_with_solutions(self, challenge_id: str, limit: int) -> Optional[dict]:
+        challenge = await self.get(challenge_id)
+        if challenge is None:
+            return None
+        solutions = await self._storage.solutions.top_by_votes(limit, challenge_id)
+        for solution in solutions:
+            author = await self._storage.users.get(solution["author_id"])
+            solution["author_points"] = author.get("points", 0) if author else 0
+        challenge["solutions"] = solutions
+        return challenge
+    
+    async def count_active(self) -> int:
+        return sum(1 for challenge in self._challenges.values() if challenge.get("active", True))
+
+class MemorySolutionRepository:
+    """Solutions held in process memory, indexed by votes globally and per challenge"""
+    
+    def __init__(self):
+        self._solutions: Dict[str, dict] = {}
+        self._by_author: Dict[Tuple[str, str], str] = {}
+        self._by_votes = SortedIndex()
+        self._by_challenge_votes: Dict[str, SortedIndex] = defaultdict(SortedIndex)
+    
+    async def get(self, solution_id: str) -> Optional[dict]:
+        solution = self._solutions.get(solution_id)
+        return dict(solution) if solution else None
+    
+    async def insert(self, solution: dict):
+        if solution["id"] in self._solutions:
+            raise DuplicateKeyError(f"Duplicate solution id {solution['id']}")
+        if (solution["challenge_id"], solution["author_id"]) in self._by_author:
+            raise DuplicateKeyError(f"Duplicate solution by {solution['author_id']} for {solution['challenge_id']}")
+        solution = dict(solution)
+        self._solutions[solution["id"]] = solution
+        self._by_author[(solution["challenge_id"], solution["author_id"])] = solution["id"]
+        self._index(solution)
+    
+    async def add_votes(self, solution_id: str, votes: int) -> Optional[dict]:
+        solution = self._solutions.get(solution_id)
+        if solution is None:
+            return None
+        self._unindex(solution)
+        solution["votes"] = solution.get("votes", 0) + votes
+        self._index(solution)
+        return dict(solution)
+    
+    async def top_by_votes(self, limit: int, challenge_id: Optional[str] = None) -> List[dict]:
+        index = self._by_challenge_votes.get(challenge_id, ()) if challenge_id else self._by_votes
+        return [dict(self._solutions[solution_id]) for _, solution_id in itertools.islice(index, limit)]
+    
+    async def count(self) -> int:
+        return len(self._solutions)
+    
+    def _index(self, solution: dict):
+        key = (-solution.get("votes", 0), solution["id"])
+        self._by_votes.add(key)
+        self._by_challenge_votes[solution["challenge_id"]].add(key)
+    
+    def _unindex(self, solution: dict):
+        key = (-solution.get("votes", 0), solution["id"])
+        self._by_votes.remove(key)
+        self._by_challenge_votes[solution["challenge_id"]].remove(key)
+
+class MemoryVoteRepository:
+    """Votes held in process memory, by user and by solution in insertion order"""
+    
+    def __init__(self):
+        self._by_user: Dict[str, set] = defaultdict(set)
+        self._by_solution: Dict[str, List[dict]] = defaultdict(list)
+        self._count = 0
+    
+    async def insert(self, vote: dict):
+        voted = self._by_user[vote["user_id"]]
+        if vote["solution_id"] in voted:
+            raise DuplicateKeyError(f"User {vote['user_id']} already voted on {vote['solution_id']}")
+        voted.add(vote["solution_id"])
+        self._by_solution[vote["solution_id"]].append(dict(vote))
+        self._count += 1
+    
+    async def solution_ids_for_user(self, user_id: str) -> set:
+        return set(self._by_user.get(user_id, ()))
+    
+    async def for_solution(self, solution_id: str, skip: int, limit: int) -> List[dict]:
+        return [dict(vote) for vote in self._by_solution.get(solution_id, [])[skip:skip + limit]]
+    
+    async def count(self) -> int:
+        return self._count
+
+class Storage:
+    """Repositories for users, challenges, solutions and votes.
+    
+    STORAGE_BACKEND selects the implementation: "mongo" (default) keeps
+    everything in MongoDB; "memory" keeps the four core collections in
+    process-local dicts with sorted indexes, so the API runs without a
+    database server. Features built on other collections or on aggregation
+    (outbox, ledger, rollups, archive, admin analytics) need MongoDB and
+    answer 501 under the memory backend.
+    """
+    
+    BACKENDS = ("mongo", "memory")
+    
+    def __init__(self, backend: str):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; expected one of {', '.join(self.BACKENDS)}")
+        self.backend = backend
+        if backend == "mongo":
+            self.users = MongoUserRepository()
+            self.challenges = MongoChallengeRepository()
+            self.solutions = MongoSolutionRepository()
+            self.votes = MongoVoteRepository()
+        else:
+            self.users = MemoryUserRepository()
+            self.challenges = MemoryChallengeRepository(self)
+            self.solutions = MemorySolutionRepository()
+            self.votes = MemoryVoteRepository()
+    
+    async def initialize(self):
+        if self.backend == "mongo":
+            await db_manager.initialize()
+            return
+        
+        sample_users, sample_challenges = build_sample_data()
+        for user in sample_users:
+            await self.users.insert(user)
+        for challenge in sample_challenges:
+            await self.challenges.insert(challenge)
+        logger.info(f"Using in-memory storage with {len(sample_users)} sample users and {len(sample_challenges)} challenges")
+    
+    async def close(self):
+        if self.backend == "mongo":
+            await db_manager.close()
+    
+    async def ping(self):
+        if self.backend == "mongo":
+            await db_manager.db.command('ping')
+
+storage = Storage(os.environ.get('STORAGE_BACKEND', 'mongo'))
+
 # FastAPI app configuration
 app = FastAPI(
     title="PUC-RS Innovation Platform",
@@ -240,6 +1080,28 @@ api_router = APIRouter(
 # Security configuration
 security = HTTPBearer(auto_error=False)
 
+def naive_utc(value: datetime) -> datetime:
+    """`value` as a naive UTC datetime, the form stored and compared throughout"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def parse_deadline(value: Any) -> Optional[datetime]:
+    """Parse a deadline given as a date, datetime or YYYY-MM-DD / ISO string"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return naive_utc(value)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            return parse_deadline(datetime.fromisoformat(value.replace('Z', '+00:00')))
+        except ValueError:
+            raise ValueError('Deadline must be a date in YYYY-MM-DD format')
+    raise ValueError('Deadline must be a date in YYYY-MM-DD format')
+
 # Enhanced Pydantic models with validation
 class UserBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=100, description="User full name")
@@ -286,7 +1148,7 @@ class ChallengeBase(BaseModel):
     title: str = Field(..., min_length=5, max_length=200, description="Challenge title")
     description: str = Field(..., min_length=10, max_length=2000, description="Challenge description")
     summary: Optional[str] = Field(None, max_length=300, description="Challenge summary")
-    deadline: Optional[str] = Field(None, description="Challenge deadline (YYYY-MM-DD)")
+    deadline: Optional[datetime] = Field(None, description="Challenge deadline (YYYY-MM-DD)")
     reward: Optional[str] = Field(None, max_length=200, description="Challenge reward")
     
     @validator('title')
@@ -302,6 +1164,10 @@ class ChallengeBase(BaseModel):
         if v:
             return v.strip()
         return v
+    
+    @validator('deadline', pre=True)
+    def validate_deadline(cls, v):
+        return parse_deadline(v)
 
 class ChallengeCreate(ChallengeBase):
     pass
@@ -311,6 +1177,7 @@ class Challenge(ChallengeBase):
     creator_id: str
     creator_name: str
     active: bool = True
+    status: Literal["open", "expired", "archived"] = "open"
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Config:
@@ -341,7 +1208,45 @@ class Solution(SolutionBase):
             datetime: lambda v: v.isoformat()
         }
 
+class SolutionView(Solution):
+    author_points: int = 0
+    voted_by_me: bool = False
+
+class ChallengeDetail(BaseModel):
+    challenge: Challenge
+    solutions: List[SolutionView]
+
+class TaxonomyUpdate(BaseModel):
+    company: Dict[str, List[str]] = Field(..., description="Company expectation categories and their keywords")
+    student: Dict[str, List[str]] = Field(..., description="Student expectation categories and their keywords")
+    version: Optional[int] = Field(None, description="Version being replaced; rejected if no longer current")
+    
+    @validator('company', 'student')
+    def validate_categories(cls, v):
+        if not v or len(v) > 50:
+            raise ValueError('Between 1 and 50 categories are required')
+        categories = {}
+        for category, keywords in v.items():
+            if not re.match(r'^[a-z0-9_]{1,50}$', category):
+                raise ValueError(f'Invalid category name {category!r}; use lowercase letters, digits and _')
+            keywords = [keyword.strip().lower() for keyword in keywords if keyword.strip()]
+            if not keywords or len(keywords) > 100:
+                raise ValueError(f'Category {category!r} needs between 1 and 100 keywords')
+            categories[category] = keywords
+        return categories
+
+class ChallengeRecommendation(Challenge):
+    score: float = Field(..., description="Cosine similarity between the challenge and the user's expectations")
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    id: str
+    name: str
+    type: str
+    points: int
+
 class Vote(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     solution_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -351,7 +1256,29 @@ class Vote(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+# Points awarded to a solution's author for each vote it receives
+VOTE_POINTS = 10
+
 # Enhanced error handling decorator
+def unavailable_error(e: Exception, where: str) -> HTTPException:
+    """The 503 for a pool wait timeout or an exhausted query time budget"""
+    if isinstance(e, WaitQueueTimeoutError):
+        metrics.increment("db_wait_queue_timeouts")
+        logger.warning(f"Connection pool exhausted in {where}: {e}")
+        return HTTPException(
+            status_code=503,
+            detail="Service temporarily overloaded. Please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+    metrics.increment("query_timeouts")
+    metrics.increment(f"query_timeouts.{where}")
+    logger.warning(f"Query time budget exceeded in {where}: {e}")
+    return HTTPException(
+        status_code=503,
+        detail="The request took too long. Please retry shortly.",
+        headers={"Retry-After": "1"}
+    )
+
 def handle_exceptions(func):
     @wraps(func)
     async def wrapper(*args, **kwargs):
@@ -359,6 +1286,13 @@ def handle_exceptions(func):
             return await func(*args, **kwargs)
         except HTTPException:
             raise
+        except (WaitQueueTimeoutError, ExecutionTimeout) as e:
+            raise unavailable_error(e, func.__name__)
+        except DatabaseUnavailableError:
+            raise HTTPException(
+                status_code=501,
+                detail=f"Not available with the {storage.backend} storage backend"
+            )
         except Exception as e:
             logger.error(f"Unexpected error in {func.__name__}: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
@@ -368,6 +1302,172 @@ def handle_exceptions(func):
             )
     return wrapper
 
+# Request coalescing
+_in_flight: Dict[tuple, asyncio.Task] = {}
+
+def _forget_in_flight(key: tuple, task: asyncio.Task):
+    _in_flight.pop(key, None)
+    # Mark the exception as retrieved even if every caller went away
+    if not task.cancelled():
+        task.exception()
+
+def single_flight(func):
+    """Share one in-flight call among concurrent identical calls of `func`.
+    
+    Calls with equal arguments that arrive while one is running await that
+    call's result (or exception) instead of starting their own. The work
+    runs in its own task, so a caller that disconnects does not cancel it
+    for the others, and outside the budget of the request that started it;
+    each caller waits at most for what is left of its own budget. The
+    result object is shared and must not be mutated.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            task = _in_flight.get(key)
+        except TypeError:  # unhashable arguments cannot be coalesced
+            return await func(*args, **kwargs)
+        
+        remaining = max_time_ms()
+        if task is not None:
+            metrics.increment("coalesced_calls")
+            metrics.increment(f"coalesced_calls.{func.__name__}")
+        else:
+            task = asyncio.create_task(without_query_budget(func(*args, **kwargs)))
+            _in_flight[key] = task
+            task.add_done_callback(lambda done: _forget_in_flight(key, done))
+        if remaining is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=remaining / 1000)
+        except asyncio.TimeoutError:
+            raise ExecutionTimeout("Query time budget exhausted")
+    return wrapper
+
+# Server-side result cache
+
+class LocalCacheBackend:
+    """In-process result store bounded by the total size of the cached values.
+    
+    Used when no shared backend is configured, and as its stand-in in tests.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._size = 0
+    
+    async def get(self, key: str) -> Optional[Tuple[float, str]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    async def set(self, key: str, stored_at: float, value: str, ttl: float):
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous[1])
+        self._entries[key] = (stored_at, value)
+        self._size += len(value)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+class RedisCacheBackend:
+    """Result store shared by every worker through Redis; entries expire after `ttl`"""
+    
+    def __init__(self, url: str):
+        self._client = aioredis.from_url(url)
+    
+    async def get(self, key: str) -> Optional[Tuple[float, str]]:
+        raw = await self._client.get(f"result-cache:{key}")
+        if raw is None:
+            return None
+        stored_at, value = raw.decode().split("|", 1)
+        return float(stored_at), value
+    
+    async def set(self, key: str, stored_at: float, value: str, ttl: float):
+        await self._client.set(f"result-cache:{key}", f"{stored_at}|{value}", ex=math.ceil(ttl))
+
+class ResultCache:
+    """Stale-while-revalidate cache of read handler results.
+    
+    Entries are keyed by the handler, its arguments and the current
+    versions of the collections it is tagged with. Every write path bumps
+    the versions of the collections it touches, so a write invalidates all
+    entries tagged with them, on every worker once versions sync. Within
+    one set of versions an entry is fresh for `ttl` seconds, then served
+    stale for up to `stale` more seconds while one background refresh runs.
+    
+    CACHE_BACKEND selects where results are kept: "local" (default) or
+    "redis" (CACHE_REDIS_URL, needs the optional redis package) so workers
+    share computed results.
+    """
+    
+    def __init__(self, backend):
+        self.backend = backend
+        self._refreshing: set = set()
+    
+    def cached(self, tags: Tuple[str, ...], ttl: float, stale: float):
+        def decorator(func):
+            @wraps(func)
+            async def wrapper(**kwargs):
+                versions = "-".join(str(collection_versions.get(tag)) for tag in tags)
+                key = f"{func.__name__}:{json.dumps(kwargs, default=str, sort_keys=True)}:{versions}"
+                
+                try:
+                    entry = await self.backend.get(key)
+                except Exception as e:
+                    logger.warning(f"Result cache read failed for {key}: {e}")
+                    entry = None
+                
+                if entry is not None:
+                    stored_at, value = entry
+                    age = time.time() - stored_at
+                    if age < ttl:
+                        metrics.increment("result_cache_hits")
+                        return json.loads(value)
+                    if age < ttl + stale:
+                        metrics.increment("result_cache_stale_hits")
+                        if key not in self._refreshing:
+                            self._refreshing.add(key)
+                            spawn(self._refresh(key, func, kwargs, ttl + stale), f"refresh:{func.__name__}")
+                        return json.loads(value)
+                
+                metrics.increment("result_cache_misses")
+                return await self._compute(key, func, kwargs, ttl + stale)
+            return wrapper
+        return decorator
+    
+    async def _compute(self, key: str, func, kwargs: Dict[str, Any], ttl: float) -> Any:
+        result = jsonable_encoder(await func(**kwargs))
+        try:
+            await self.backend.set(key, time.time(), json.dumps(result), ttl)
+        except Exception as e:
+            logger.warning(f"Result cache write failed for {key}: {e}")
+        return result
+    
+    async def _refresh(self, key: str, func, kwargs: Dict[str, Any], ttl: float):
+        try:
+            await self._compute(key, func, kwargs, ttl)
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+def create_result_cache() -> ResultCache:
+    if os.environ.get('CACHE_BACKEND', 'local') == 'redis':
+        if aioredis is None:
+            logger.warning("CACHE_BACKEND=redis but the redis package is not installed; using the local cache")
+        else:
+            return ResultCache(RedisCacheBackend(os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')))
+    return ResultCache(LocalCacheBackend(int(os.environ.get('RESULT_CACHE_MAX_BYTES', 16 * 1024 * 1024))))
+
+result_cache = create_result_cache()
+
 # Enhanced utility functions
 class SecurityUtils:
     @staticmethod
@@ -380,24 +1480,55 @@ class SecurityUtils:
         """Verify password against hash"""
         return SecurityUtils.hash_password(password) == hashed
 
-class AuthService:
-    @staticmethod
-    async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
-        """Get current authenticated user"""
-        if not credentials:
-            raise HTTPException(status_code=401, detail="Authentication required")
-        
-        try:
-            user_id = credentials.credentials
-            user_doc = await db_manager.db.users.find_one({"id": user_id})
-            
-            if not user_doc:
-                raise HTTPException(status_code=401, detail="Invalid authentication token")
-            
-            return UserResponse(**user_doc)
+def build_user(user_data: UserCreate, password_hash: str) -> User:
+    """New user document from registration data and an already hashed password"""
+    user_dict = user_data.dict()
+    user_dict['password_hash'] = password_hash
+    del user_dict['password']
+    
+    # Handle expectations properly
+    share_expectations = user_dict.pop('shareExpectations', False)
+    if not share_expectations or not user_dict.get('expectations'):
+        user_dict['expectations'] = None
+    
+    return User(**user_dict)
+
+def build_challenge(challenge_data: ChallengeCreate, creator: UserResponse) -> Challenge:
+    """New challenge created by `creator`, with a summary generated when missing"""
+    challenge_dict = challenge_data.dict()
+    if not challenge_dict.get('summary'):
+        # Create a summary from first 150 characters of description
+        description = challenge_dict['description']
+        challenge_dict['summary'] = description[:150] + "..." if len(description) > 150 else description
+    
+    challenge_dict.update({
+        'creator_id': creator.id,
+        'creator_name': creator.name
+    })
+    
+    return Challenge(**challenge_dict)
+
+class AuthService:
+    @staticmethod
+    async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserResponse:
+        """Get current authenticated user"""
+        if not credentials:
+            raise HTTPException(status_code=401, detail="Authentication required")
+        
+        try:
+            user_id = credentials.credentials
+            user_doc = await storage.users.get(user_id)
+            
+            if not user_doc:
+                raise HTTPException(status_code=401, detail="Invalid authentication token")
+            
+            return UserResponse(**user_doc)
             
         except HTTPException:
             raise
+        except (WaitQueueTimeoutError, ExecutionTimeout) as e:
+            # The database is overloaded, not the token invalid
+            raise unavailable_error(e, "get_current_user")
         except Exception as e:
             logger.error(f"Authentication error: {e}")
             raise HTTPException(status_code=401, detail="Authentication failed")
@@ -409,7 +1540,9 @@ class AuthService:
             if not credentials:
                 return None
             return await AuthService.get_current_user(credentials)
-        except HTTPException:
+        except HTTPException as e:
+            if e.status_code == 503:
+                raise
             return None
 
 # Admin authorization
@@ -419,199 +1552,2991 @@ async def require_admin(current_user: UserResponse = Depends(AuthService.get_cur
         raise HTTPException(status_code=403, detail="Admin privileges required")
     return current_user
 
-# Matching Analysis Service
-class MatchingService:
+# Admission control and rate limiting
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+    
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+class RateLimiter:
+    """In-memory token buckets, one per client key.
+    
+    Buckets refill continuously at `rate` tokens per second up to `burst`.
+    Only the most recently used buckets are kept; an evicted bucket would
+    have been full anyway once it sat idle for burst / rate seconds.
+    """
+    
+    MAX_BUCKETS = 100_000
+    
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+    
+    def acquire(self, key: str) -> Optional[float]:
+        """Take one token for `key`, or return the seconds until one is available"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+            bucket.updated_at = now
+            self._buckets.move_to_end(key)
+        
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return None
+        return (1 - bucket.tokens) / self.rate
+
+def _parse_rate_limit(spec: str) -> Tuple[float, int]:
+    """Parse "<requests>/<seconds>" into (tokens per second, burst)"""
+    requests_count, seconds = spec.split('/')
+    return int(requests_count) / float(seconds), int(requests_count)
+
+# Per-route limits as "<requests>/<seconds>", overridable with RATE_LIMIT_<ROUTE>
+RATE_LIMITS = {
+    "login": "10/60",
+    "register": "5/60",
+    "vote": "30/60"
+}
+
+# Routes that require authentication are limited per user, the rest per client IP
+AUTHENTICATED_RATE_LIMITS = {"vote"}
+
+# Reverse proxies whose X-Forwarded-For header is trusted, as a comma separated list
+TRUSTED_PROXIES = frozenset(
+    address.strip() for address in os.environ.get('TRUSTED_PROXIES', '').split(',') if address.strip()
+)
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+
+def rate_limit(route: str):
+    """Dependency enforcing the token bucket configured for `route`"""
+    spec = os.environ.get(f"RATE_LIMIT_{route.upper()}", RATE_LIMITS[route])
+    rate, burst = _parse_rate_limit(spec)
+    limiter = _rate_limiters.setdefault(route, RateLimiter(route, rate, burst))
+    
+    def enforce(key: str):
+        retry_after = limiter.acquire(key)
+        if retry_after is not None:
+            metrics.increment(f"rate_limited.{route}")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please slow down.",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    
+    if route in AUTHENTICATED_RATE_LIMITS:
+        # Resolving the user validates the token; the endpoint reuses the cached result
+        async def per_user(current_user: UserResponse = Depends(AuthService.get_current_user)):
+            enforce(f"user:{current_user.id}")
+        return per_user
+    
+    async def per_client(request: Request):
+        enforce(f"ip:{client_ip(request)}")
+    return per_client
+
+def client_ip(request: Request) -> str:
+    """The client's address: the peer, or when the peer is a trusted proxy the
+    nearest X-Forwarded-For hop that is not itself a trusted proxy
+    """
+    peer = request.client.host if request.client else "unknown"
+    if peer not in TRUSTED_PROXIES:
+        return peer
+    hops = [hop.strip() for hop in request.headers.get('x-forwarded-for', '').split(',') if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in TRUSTED_PROXIES:
+            return hop
+    return hops[0] if hops else peer
+
+class AdmissionControlMiddleware:
+    """Shed load before it queues on the database connection pool.
+    
+    Requests are rejected with 503 and Retry-After while the number of
+    in-flight requests or callers waiting for a pooled connection is above
+    its threshold, so queued work cannot grow without bound.
+    """
+    
+    # Long-lived streams would otherwise hold an in-flight slot forever
+    EXEMPT_PATHS = {"/api/health", "/api/ready", "/api/stream"}
+    
+    def __init__(self, app, max_in_flight: int = 200, max_db_waiters: int = 100):
+        self.app = app
+        self.max_in_flight = int(os.environ.get('MAX_IN_FLIGHT_REQUESTS', max_in_flight))
+        self.max_db_waiters = int(os.environ.get('MAX_DB_WAIT_QUEUE', max_db_waiters))
+        self.in_flight = 0
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        if self.in_flight >= self.max_in_flight or pool_monitor.waiting >= self.max_db_waiters:
+            metrics.increment("requests_shed")
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", b"1")
+                ]
+            })
+            await send({
+                "type": "http.response.body",
+                "body": json.dumps({"detail": "Service temporarily overloaded. Please retry shortly."}).encode()
+            })
+            return
+        
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            profiler.request_done()
+
+class QueryBudgetMiddleware:
+    """Bound each request's database work and drop it when the client leaves.
+    
+    The handler runs in its own task with a deadline from QUERY_BUDGETS_MS,
+    which reads pass to Mongo as maxTimeMS so the server stops them too. If
+    the client disconnects before a GET or HEAD response is complete the
+    task is cancelled, releasing the in-flight slot and pool wait instead
+    of computing a response nobody will read. Other methods run to the end:
+    cancelling a write between its inserts, version bumps and outbox
+    append would leave it half applied.
+    """
+    
+    CANCELLABLE_METHODS = {"GET", "HEAD"}
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        budget = query_budget_ms(scope["path"]) if scope["type"] == "http" else None
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+        
+        messages: asyncio.Queue = asyncio.Queue()
+        response_complete = False
+        disconnected = False
+        
+        async def send_wrapper(message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+        
+        async def run():
+            _query_deadline.set(time.monotonic() + budget / 1000)
+            await self.app(scope, messages.get, send_wrapper)
+        
+        handler = asyncio.create_task(run())
+        cancellable = scope["method"] in self.CANCELLABLE_METHODS
+        
+        async def listen():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if cancellable and not response_complete:
+                        disconnected = True
+                        handler.cancel()
+                    return
+        
+        listener = asyncio.create_task(listen())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+            metrics.increment("requests_cancelled_on_disconnect")
+        finally:
+            listener.cancel()
+
+# Collection versions for conditional GETs
+class CollectionVersions:
+    """Generation counters bumped by every write path.
+    
+    Reads are served from memory so a conditional GET never touches Mongo.
+    Bumps are mirrored to the `collection_versions` collection in the
+    background and pulled back every SYNC_INTERVAL seconds, so workers see
+    each other's writes with bounded delay. CLOCK_VERSIONS are derived from
+    the current time instead, for responses that change when a calendar
+    period rolls over.
+    """
+    
+    SYNC_INTERVAL = 1.0
+    CLOCK_VERSIONS: Dict[str, Callable[[datetime], int]] = {
+        # Day 1 of the proleptic calendar is a Monday, like every ISO week
+        "week": lambda now: (now.toordinal() - 1) // 7,
+        "month": lambda now: now.year * 12 + now.month
+    }
+    
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._task: Optional[asyncio.Task] = None
+    
+    def get(self, name: str) -> int:
+        clock = self.CLOCK_VERSIONS.get(name)
+        if clock is not None:
+            return clock(datetime.utcnow())
+        return self._versions[name]
+    
+    def bump(self, *names: str):
+        """Record a write; call only after the write has been acknowledged"""
+        for name in names:
+            self._versions[name] += 1
+        if db_manager.connected:
+            spawn(self._publish(names), "publish-versions")
+    
+    async def _publish(self, names: Tuple[str, ...]):
+        try:
+            for name in names:
+                doc = await db_manager.db.collection_versions.find_one_and_update(
+                    {"_id": name},
+                    {"$inc": {"version": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                self._observe(name, doc["version"])
+        except Exception as e:
+            logger.warning(f"Failed to publish collection versions {names}: {e}")
+    
+    def _observe(self, name: str, version: int):
+        if version > self._versions[name]:
+            self._versions[name] = version
+    
+    async def sync(self):
+        async for doc in db_manager.db.collection_versions.find():
+            self._observe(doc["_id"], doc["version"])
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Failed to sync collection versions: {e}")
+            await asyncio.sleep(self.SYNC_INTERVAL)
+    
+    def etag(self, names: Tuple[str, ...]) -> str:
+        return 'W/"' + "-".join(f"{name[0]}{self.get(name)}" for name in names) + '"'
+
+collection_versions = CollectionVersions()
+
+# GET routes whose response is fully determined by the versions of the
+# collections listed, or of the calendar periods in CollectionVersions.
+# Per-client routes also depend on the bearer token and list "users" so
+# that any change to the caller's account invalidates them.
+VERSIONED_ROUTES = [
+    (re.compile(r"^/api/challenges$"), ("challenges",), False),
+    (re.compile(r"^/api/challenges/[^/]+$"), ("challenges",), False),
+    (re.compile(r"^/api/challenges/[^/]+/solutions$"), ("solutions",), False),
+    (re.compile(r"^/api/solutions$"), ("solutions",), False),
+    (re.compile(r"^/api/leaderboard$"), ("users",), False),
+    (re.compile(r"^/api/leaderboard/week$"), ("points_buckets", "week"), False),
+    (re.compile(r"^/api/leaderboard/month$"), ("points_buckets", "month"), False),
+    (re.compile(r"^/api/challenges/[^/]+/leaderboard$"), ("points_buckets", "week", "month"), False),
+    (re.compile(r"^/api/stats$"), ("challenges", "solutions", "users", "votes"), False),
+    (re.compile(r"^/api/matching-analysis$"), ("users", "taxonomy"), False),
+    (re.compile(r"^/api/challenges/[^/]+/full$"), ("challenges", "solutions", "users", "votes"), True),
+    (re.compile(r"^/api/recommendations/challenges$"), ("challenges", "users"), True),
+    (re.compile(r"^/api/admin/users$"), ("users",), True),
+    (re.compile(r"^/api/admin/challenges$"), ("challenges", "users"), True),
+    (re.compile(r"^/api/admin/solutions$"), ("solutions", "users"), True),
+    (re.compile(r"^/api/admin/dashboard$"), ("challenges", "solutions", "users", "votes"), True),
+    (re.compile(r"^/api/admin/detailed-stats$"), ("challenges", "solutions", "users", "votes"), True)
+]
+
+def versioned_route(path: str) -> Optional[Tuple[Tuple[str, ...], bool]]:
+    """Return (collections, per_client) for a versioned GET route"""
+    for pattern, collections, per_client in VERSIONED_ROUTES:
+        if pattern.match(path):
+            return collections, per_client
+    return None
+
+def header_value(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+class ConditionalGetMiddleware:
+    """Attach version-derived ETags and answer If-None-Match with 304.
+    
+    The ETag is computed from the in-memory collection versions before the
+    handler runs, so a matching request is answered without querying Mongo
+    or serializing anything. A write racing with the handler can only make
+    the ETag older than the body, which costs the client a refetch.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        
+        route = versioned_route(scope["path"])
+        # 304s skip the handler, so routes that authenticate the caller are excluded
+        if route is None or route[1]:
+            await self.app(scope, receive, send)
+            return
+        
+        etag = collection_versions.etag(route[0])
+        if_none_match = header_value(scope, b"if-none-match")
+        
+        if if_none_match and (if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]):
+            metrics.increment("conditional_get_not_modified")
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", b"no-cache")
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_etag)
+
+# Response compression with a cache of encoded bodies
+class ResponseCache:
+    """LRU of encoded response bodies bounded by total size in bytes"""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[tuple, Tuple[list, bytes]]" = OrderedDict()
+    
+    def get(self, key: tuple) -> Optional[Tuple[list, bytes]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: tuple, headers: list, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous[1])
+        self._entries[key] = (headers, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+class CompressionMiddleware:
+    """Negotiate brotli/gzip compression and cache encoded versioned responses.
+    
+    Bodies below `minimum_size` are sent as-is. For routes in
+    VERSIONED_ROUTES the final encoded bytes are cached under the current
+    collection versions, so a repeated request skips the handler,
+    serialization and compression altogether. Streaming responses
+    (Server-Sent Events) are passed through untouched.
+    """
+    
+    def __init__(self, app, minimum_size: int = 1024, cache_max_bytes: int = 32 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = int(os.environ.get('COMPRESSION_MIN_SIZE', minimum_size))
+        self.cache = ResponseCache(int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', cache_max_bytes)))
+    
+    @staticmethod
+    def quality_values(accept_encoding: str) -> Dict[str, float]:
+        """Coding -> q-value; entries with a malformed q-value are ignored"""
+        qualities = {}
+        for part in accept_encoding.split(','):
+            coding, *params = [piece.strip() for piece in part.split(';')]
+            if not coding:
+                continue
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = None
+            if quality is not None and 0.0 <= quality <= 1.0:
+                qualities[coding.lower()] = quality
+        return qualities
+    
+    @classmethod
+    def negotiate(cls, accept_encoding: Optional[str]) -> str:
+        if not accept_encoding:
+            return "identity"
+        qualities = cls.quality_values(accept_encoding)
+        wildcard = qualities.get("*", 0.0)
+        candidates = [coding for coding in ("br", "gzip") if coding != "br" or brotli is not None]
+        # Highest q-value wins; on a tie the server's order (brotli first) decides
+        best = max(candidates, key=lambda coding: qualities.get(coding, wildcard))
+        if qualities.get(best, wildcard) > 0:
+            return best
+        return "identity"
+    
+    @staticmethod
+    def encode(body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=5)
+        return gzip.compress(body, compresslevel=6)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = self.negotiate(header_value(scope, b"accept-encoding"))
+        cache_key = None
+        
+        route = versioned_route(scope["path"]) if scope["method"] == "GET" else None
+        if route is not None:
+            collections, per_client = route
+            cache_key = (
+                scope["path"],
+                scope.get("query_string", b""),
+                tuple(collection_versions.get(name) for name in collections),
+                encoding,
+                header_value(scope, b"authorization") if per_client else None
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                metrics.increment("response_cache_hits")
+                headers, body = cached
+                await send({"type": "http.response.start", "status": 200, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+            metrics.increment("response_cache_misses")
+        
+        start_message = None
+        passthrough = False
+        chunks: List[bytes] = []
+        
+        async def buffered_send(message):
+            nonlocal start_message, passthrough
+            
+            if message["type"] == "http.response.start":
+                content_type = MutableHeaders(raw=message["headers"]).get("content-type", "")
+                already_encoded = "content-encoding" in MutableHeaders(raw=message["headers"])
+                if content_type.startswith("text/event-stream") or already_encoded:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=list(start_message["headers"]))
+            if encoding != "identity" and len(body) >= self.minimum_size:
+                body = self.encode(body, encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+            headers.append("vary", "Accept-Encoding")
+            
+            if cache_key is not None and start_message["status"] == 200:
+                self.cache.put(cache_key, headers.raw, body)
+            
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+        
+        await self.app(scope, receive, buffered_send)
+
+# Real-time push over Server-Sent Events
+class Subscriber:
+    """One stream connection; pending updates are coalesced by (event, key)"""
+    
+    __slots__ = ("topics", "pending", "ready")
+    
+    def __init__(self, topics: Tuple[str, ...]):
+        self.topics = topics
+        self.pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+
+class EventBroker:
+    """In-process pub/sub feeding the /api/stream endpoint.
+    
+    Publishing only touches subscribers of the topic and never blocks:
+    updates are merged into each subscriber's pending map, replacing the
+    previous value for the same key or summing counter deltas, and the
+    subscriber's stream flushes them at most once per FLUSH_INTERVAL.
+    An idle subscriber costs one parked coroutine and an empty dict.
+    """
+    
+    FLUSH_INTERVAL = float(os.environ.get('STREAM_FLUSH_INTERVAL', 0.5))
+    HEARTBEAT_INTERVAL = 15.0
+    MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 10000))
+    
+    def __init__(self):
+        self._topics: Dict[str, set] = defaultdict(set)
+        self.subscriber_count = 0
+        # Disabled when a change stream relays writes from every worker instead
+        self.local_publish = True
+    
+    def subscribe(self, topics: Tuple[str, ...]) -> Subscriber:
+        subscriber = Subscriber(topics)
+        for topic in topics:
+            self._topics[topic].add(subscriber)
+        self.subscriber_count += 1
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        for topic in subscriber.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._topics[topic]
+        self.subscriber_count -= 1
+    
+    def publish(self, topic: str, event: str, key: str, data: Dict[str, Any], sum_fields: bool = False):
+        """Queue an update for every subscriber of `topic`"""
+        for subscriber in self._topics.get(topic, ()):
+            slot = (event, key)
+            previous = subscriber.pending.get(slot)
+            if sum_fields and previous is not None:
+                merged = dict(previous)
+                for field, amount in data.items():
+                    merged[field] = merged.get(field, 0) + amount
+                subscriber.pending[slot] = merged
+            else:
+                subscriber.pending[slot] = data
+            subscriber.ready.set()
+    
+    async def stream(self, subscriber: Subscriber):
+        """Yield SSE frames for a subscriber until the client disconnects"""
+        try:
+            yield "retry: 5000\nevent: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=self.HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                
+                subscriber.ready.clear()
+                pending, subscriber.pending = subscriber.pending, {}
+                yield "".join(
+                    f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                    for (event, _), data in pending.items()
+                )
+                # Bound the per-subscriber update rate; later updates coalesce meanwhile
+                await asyncio.sleep(self.FLUSH_INTERVAL)
+        finally:
+            self.unsubscribe(subscriber)
+
+event_broker = EventBroker()
+
+class PushNotifier:
+    """Translate writes into broker updates for the stream topics"""
+    
+    @staticmethod
+    def solution_votes(solution: dict):
+        event_broker.publish(
+            f"solutions:{solution['challenge_id']}", "solution_votes", solution['id'],
+            {"solution_id": solution['id'], "votes": solution.get('votes', 0)}
+        )
+    
+    @staticmethod
+    def solution_created(solution: dict):
+        event_broker.publish(
+            f"solutions:{solution['challenge_id']}", "solution_created", solution['id'],
+            {"solution_id": solution['id'], "author_name": solution['author_name']}
+        )
+    
+    @staticmethod
+    def user_points(user: dict):
+        event_broker.publish(
+            "leaderboard", "user_points", user['id'],
+            {"id": user['id'], "name": user['name'], "type": user['type'], "points": user.get('points', 0)}
+        )
+    
+    @staticmethod
+    def stats_delta(**deltas: int):
+        event_broker.publish("stats", "stats_delta", "stats", deltas, sum_fields=True)
+
+class ChangeStreamRelay:
+    """Feed the broker from a MongoDB change stream when the server supports it.
+    
+    Change streams need a replica set; on a standalone server the relay
+    stays off and write paths publish to the in-process broker directly.
+    """
+    
+    COLLECTIONS = ["users", "challenges", "solutions", "votes"]
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        if os.environ.get('PUSH_SOURCE', 'auto') == 'local':
+            return
+        try:
+            stream = db_manager.db.watch(
+                [{"$match": {"ns.coll": {"$in": self.COLLECTIONS}}}],
+                full_document='updateLookup'
+            )
+            # Opening the cursor fails fast on servers without change stream support;
+            # a change it already returned is relayed before the rest
+            first = await stream.try_next()
+        except Exception as e:
+            logger.info(f"Change streams unavailable, using in-process push: {e}")
+            return
+        
+        event_broker.local_publish = False
+        self._task = asyncio.create_task(self._run(stream, first))
+        logger.info("Push updates relayed from MongoDB change stream")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self, stream, first: Optional[dict] = None):
+        try:
+            async with stream:
+                if first is not None:
+                    self.relay(first)
+                async for change in stream:
+                    self.relay(change)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Change stream relay stopped, falling back to in-process push: {e}")
+            event_broker.local_publish = True
+    
+    @staticmethod
+    def relay(change: dict):
+        collection = change["ns"]["coll"]
+        operation = change["operationType"]
+        document = change.get("fullDocument")
+        
+        if operation == "insert":
+            # total_challenges counts active challenges only, like /api/stats
+            if collection != "challenges" or (document or {}).get("active", True):
+                PushNotifier.stats_delta(**{f"total_{collection}": 1})
+            if collection == "solutions":
+                PushNotifier.solution_created(document)
+        elif operation == "update" and document:
+            changed = change.get("updateDescription", {}).get("updatedFields", {})
+            if collection == "solutions" and "votes" in changed:
+                PushNotifier.solution_votes(document)
+            elif collection == "users" and "points" in changed:
+                PushNotifier.user_points(document)
+            elif collection == "challenges" and "active" in changed:
+                PushNotifier.stats_delta(total_challenges=1 if changed["active"] else -1)
+
+change_stream_relay = ChangeStreamRelay()
+
+# Matching Analysis Service
+class MatchingService:
+    
+    # Default taxonomy, stored as version 1 of the `taxonomy` collection on first start
+    COMPANY_KEYWORDS = {
+        'adaptabilidade': ['adaptabilidade', 'adaptação', 'flexibilidade', 'mudança'],
+        'pensamento_critico': ['pensamento crítico', 'crítico', 'análise', 'analítico'],
+        'competencias_digitais': ['digital', 'tecnologia', 'programação', 'tech', 'dados'],
+        'trabalho_equipe': ['equipe', 'colaboração', 'time', 'colaborativo'],
+        'comunicacao': ['comunicação', 'comunicar', 'apresentação'],
+        'criatividade': ['criatividade', 'criativo', 'inovação', 'inovador'],
+        'inteligencia_emocional': ['emocional', 'relacionamento', 'interpessoal'],
+        'diversidade': ['diversidade', 'inclusão', 'cultural'],
+        'aprendizado': ['aprendizado', 'desenvolvimento', 'crescimento'],
+        'etica': ['ética', 'responsabilidade', 'valores']
+    }
+    
+    STUDENT_KEYWORDS = {
+        'beneficios': ['benefícios', 'saúde', 'plano', 'vale'],
+        'flexibilidade': ['flexível', 'remoto', 'horário', 'home office'],
+        'crescimento': ['crescimento', 'desenvolvimento', 'carreira'],
+        'ambiente_inclusivo': ['inclusivo', 'diverso', 'acolhedor'],
+        'tecnologia': ['tecnologia', 'inovação', 'moderno'],
+        'proposito': ['propósito', 'social', 'sustentabilidade'],
+        'feedback': ['feedback', 'reconhecimento', 'valorização'],
+        'cultura': ['cultura', 'ambiente', 'clima'],
+        'colaboracao': ['colaborativo', 'equipe', 'participativo'],
+        'estabilidade': ['estabilidade', 'segurança', 'permanência']
+    }
+    
+    # Taxonomy audience whose keywords analyze each user type's expectations
+    AUDIENCES = {'empresa': 'company', 'aluno': 'student'}
+    
+    @staticmethod
+    def stored_analysis(user: dict, version: int) -> Optional[dict]:
+        """The stored analysis if it was computed with taxonomy `version`, else None"""
+        stored = user.get('expectation_analysis')
+        # Analyses stored before the taxonomy was versioned used the defaults (version 1)
+        if stored is not None and user.get('analysis_version', 1) == version:
+            return stored
+        return None
+    
+    @staticmethod
+    @single_flight
+    async def generate_matching_analysis() -> dict:
+        """Generate comprehensive matching analysis.
+        
+        Failures propagate, so an empty analysis is never cached in place
+        of a real one.
+        """
+        # Get all users with expectations
+        users = await storage.users.with_expectations(limit=1000)
+        matcher = taxonomy_service.matcher
+        entries = [
+            (user['type'], user['expectations'], MatchingService.stored_analysis(user, matcher.version))
+            for user in users
+            if user.get('expectations') and user['type'] in MatchingService.AUDIENCES
+        ]
+        companies = sum(1 for user_type, _, _ in entries if user_type == 'empresa')
+        
+        # Analyze in the worker pool, then merge the per-chunk score sums
+        company_analysis: Dict[str, List[float]] = defaultdict(lambda: [0, 0])
+        student_analysis: Dict[str, List[float]] = defaultdict(lambda: [0, 0])
+        merged = {'empresa': company_analysis, 'aluno': student_analysis}
+        for partial in await analytics_pool.map_chunks(
+            summarize_expectations, entries, matcher.version, matcher.taxonomy
+        ):
+            for user_type, sums in partial.items():
+                for category, (total, count) in sums.items():
+                    merged[user_type][category][0] += total
+                    merged[user_type][category][1] += count
+        
+        # Calculate averages and format results
+        company_results = []
+        for category, (total, count) in company_analysis.items():
+            avg_score = total / count if count else 0
+            formatted_category = category.replace('_', ' ').title()
+            company_results.append({
+                'expectation': formatted_category,
+                'percentage': round(avg_score, 1)
+            })
+        
+        student_results = []
+        for category, (total, count) in student_analysis.items():
+            avg_score = total / count if count else 0
+            formatted_category = category.replace('_', ' ').title()
+            student_results.append({
+                'expectation': formatted_category,
+                'percentage': round(avg_score, 1)
+            })
+        
+        # Sort by percentage
+        company_results.sort(key=lambda x: x['percentage'], reverse=True)
+        student_results.sort(key=lambda x: x['percentage'], reverse=True)
+        
+        # Calculate overall compatibility
+        total_compatibility = 0
+        matches_count = 0
+        
+        if company_results and student_results:
+            total_compatibility = (sum(r['percentage'] for r in company_results[:5]) + 
+                                sum(r['percentage'] for r in student_results[:5])) / 10
+            matches_count = min(len(company_results), len(student_results))
+        
+        # Generate top matches
+        top_matches = []
+        if matches_count > 0:
+            for i in range(min(3, matches_count)):
+                match_score = (company_results[i]['percentage'] + 
+                             (student_results[i]['percentage'] if i < len(student_results) else 0)) / 2
+                
+                top_matches.append({
+                    'score': round(match_score, 1),
+                    'commonExpectations': f"{company_results[i]['expectation']} & Ambiente Profissional"
+                })
+        
+        return {
+            'totalMatches': round(total_compatibility, 1),
+            'companies': companies,
+            'students': len(entries) - companies,
+            'companyExpectations': company_results[:8],
+            'studentExpectations': student_results[:8],
+            'topMatches': top_matches
+        }
+
+# Keyword taxonomy
+class KeywordMatcher:
+    """One taxonomy version compiled for matching.
+    
+    Keywords are lowercased and deduplicated per audience and mapped to the
+    categories that list them, so a text is scanned once per distinct
+    keyword. Instances are never mutated and are shared between requests.
+    """
+    
+    def __init__(self, version: int, taxonomy: Dict[str, Dict[str, List[str]]]):
+        self.version = version
+        self.taxonomy = taxonomy
+        self._keywords: Dict[str, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {}
+        for audience, categories in taxonomy.items():
+            index: Dict[str, List[str]] = defaultdict(list)
+            for category, keywords in categories.items():
+                for keyword in dict.fromkeys(keyword.lower() for keyword in keywords):
+                    index[keyword].append(category)
+            self._keywords[audience] = tuple((keyword, tuple(cats)) for keyword, cats in index.items())
+    
+    def analyze(self, text: Optional[str], user_type: str) -> dict:
+        """Score each category by its keywords found in `text`, 20% per keyword capped at 100%"""
+        audience = MatchingService.AUDIENCES.get(user_type)
+        if not text or audience not in self._keywords:
+            return {}
+        
+        text_lower = text.lower()
+        matches: Counter = Counter()
+        for keyword, categories in self._keywords[audience]:
+            if keyword in text_lower:
+                matches.update(categories)
+        return {category: min(count * 20, 100) for category, count in matches.items()}
+
+class TaxonomyService:
+    """Keyword taxonomy stored as one versioned document in the `taxonomy` collection.
+    
+    Each version is compiled once into a KeywordMatcher, kept in a small
+    cache keyed by version. Readers just take `self.matcher`; a new version
+    is installed by replacing that reference, so no lock is needed. Every
+    worker polls for newer versions and re-scores stored expectation
+    analyses computed with an older one in batches.
+    """
+    
+    CACHE_SIZE = 8
+    RESCORE_BATCH = 500
+    
+    def __init__(self):
+        self._compiled: "OrderedDict[int, KeywordMatcher]" = OrderedDict()
+        self._rescored_version = 0
+        self.matcher = self._compile(1, TaxonomyService.defaults())
+    
+    @staticmethod
+    def defaults() -> Dict[str, Dict[str, List[str]]]:
+        return {"company": MatchingService.COMPANY_KEYWORDS, "student": MatchingService.STUDENT_KEYWORDS}
+    
+    def _compile(self, version: int, taxonomy: Dict[str, Dict[str, List[str]]]) -> KeywordMatcher:
+        matcher = self._compiled.get(version)
+        if matcher is not None:
+            self._compiled.move_to_end(version)
+            return matcher
+        
+        matcher = KeywordMatcher(version, taxonomy)
+        self._compiled[version] = matcher
+        if len(self._compiled) > self.CACHE_SIZE:
+            self._compiled.popitem(last=False)
+        return matcher
+    
+    def _install(self, doc: dict):
+        if doc["version"] > self.matcher.version:
+            self.matcher = self._compile(doc["version"], {"company": doc["company"], "student": doc["student"]})
+            logger.info(f"Keyword taxonomy version {doc['version']} installed")
+    
+    async def load(self):
+        """Store the default taxonomy on first start, then install the stored one"""
+        await db_manager.db.taxonomy.update_one(
+            {"_id": "current"},
+            {"$setOnInsert": {**TaxonomyService.defaults(), "version": 1, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        await self.refresh()
+    
+    async def refresh(self):
+        doc = await db_manager.db.taxonomy.find_one({"_id": "current", "version": {"$gt": self.matcher.version}})
+        if doc:
+            self._install(doc)
+    
+    async def update(
+        self,
+        taxonomy: Dict[str, Dict[str, List[str]]],
+        expected_version: Optional[int],
+        updated_by: str
+    ) -> Optional[dict]:
+        """Store a new taxonomy version; None if `expected_version` is no longer current"""
+        query: Dict[str, Any] = {"_id": "current"}
+        if expected_version is not None:
+            query["version"] = expected_version
+        
+        doc = await db_manager.db.taxonomy.find_one_and_update(
+            query,
+            {"$set": {**taxonomy, "updated_at": datetime.utcnow(), "updated_by": updated_by}, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return None
+        
+        self._install(doc)
+        collection_versions.bump("taxonomy")
+        spawn(self.sync(), "taxonomy-sync")
+        return doc
+    
+    async def rescore(self) -> int:
+        """Re-analyze stored expectations not yet scored with the current version"""
+        matcher = self.matcher
+        rescored = 0
+        while self.matcher is matcher:
+            users = await db_manager.db.users.find(
+                {
+                    "type": {"$in": list(MatchingService.AUDIENCES)},
+                    "expectations": {"$ne": None},
+                    "analysis_version": {"$ne": matcher.version}
+                },
+                {"_id": 0, "id": 1, "type": 1, "expectations": 1}
+            ).limit(self.RESCORE_BATCH).to_list(self.RESCORE_BATCH)
+            if not users:
+                self._rescored_version = matcher.version
+                break
+            
+            analyses = itertools.chain.from_iterable(await analytics_pool.map_chunks(
+                analyze_expectations,
+                [(user["expectations"], user["type"]) for user in users],
+                matcher.version,
+                matcher.taxonomy
+            ))
+            
+            # Matching on expectations skips users who edited them since the read
+            await db_manager.db.users.bulk_write([
+                UpdateOne(
+                    {"id": user["id"], "expectations": user["expectations"]},
+                    {"$set": {
+                        "expectation_analysis": analysis,
+                        "analysis_version": matcher.version
+                    }}
+                )
+                for user, analysis in zip(users, analyses)
+            ], ordered=False)
+            rescored += len(users)
+        
+        if rescored:
+            collection_versions.bump("users")
+            logger.info(f"Re-scored {rescored} expectation analyses with taxonomy version {matcher.version}")
+        return rescored
+    
+    async def sync(self):
+        await self.refresh()
+        if self._rescored_version != self.matcher.version:
+            await self.rescore()
+
+taxonomy_service = TaxonomyService()
+
+taxonomy_sync = PeriodicTask(
+    "taxonomy-sync",
+    float(os.environ.get('TAXONOMY_SYNC_INTERVAL', 5)),
+    taxonomy_service.sync
+)
+
+# Analytics worker pool
+# Functions below run in worker processes; each keeps the matchers it has
+# compiled so a taxonomy version is compiled once per process
+_worker_matchers: "OrderedDict[int, KeywordMatcher]" = OrderedDict()
+
+def _worker_matcher(version: int, taxonomy: Dict[str, Dict[str, List[str]]]) -> KeywordMatcher:
+    matcher = _worker_matchers.get(version)
+    if matcher is None:
+        matcher = _worker_matchers[version] = KeywordMatcher(version, taxonomy)
+        if len(_worker_matchers) > TaxonomyService.CACHE_SIZE:
+            _worker_matchers.popitem(last=False)
+    return matcher
+
+def analyze_expectations(
+    version: int,
+    taxonomy: Dict[str, Dict[str, List[str]]],
+    items: List[Tuple[str, str]]
+) -> List[dict]:
+    """Analyze (expectations, user_type) pairs with one taxonomy version"""
+    matcher = _worker_matcher(version, taxonomy)
+    return [matcher.analyze(text, user_type) for text, user_type in items]
+
+def summarize_expectations(
+    version: int,
+    taxonomy: Dict[str, Dict[str, List[str]]],
+    entries: List[Tuple[str, str, Optional[dict]]]
+) -> Dict[str, Dict[str, List[float]]]:
+    """Per user type, the [score sum, user count] of each category over
+    (user_type, expectations, stored analysis or None) entries
+    """
+    matcher = _worker_matcher(version, taxonomy)
+    sums: Dict[str, Dict[str, List[float]]] = {}
+    for user_type, text, stored in entries:
+        analysis = stored if stored is not None else matcher.analyze(text, user_type)
+        by_category = sums.setdefault(user_type, {})
+        for category, score in analysis.items():
+            total = by_category.setdefault(category, [0, 0])
+            total[0] += score
+            total[1] += 1
+    return sums
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a chunk of passwords, e.g. for a bulk import"""
+    return [SecurityUtils.hash_password(password) for password in passwords]
+
+class AnalyticsPool:
+    """CPU-bound analytics run in worker processes so the event loop keeps serving.
+    
+    Work is split into chunks of CHUNK_SIZE items and the per-chunk results
+    are returned in order for the caller to merge. At most MAX_PENDING
+    chunks are queued on the pool across all callers; further chunks wait
+    for a slot. Workers are spawned rather than forked since the server
+    process runs driver and profiler threads. With ANALYTICS_WORKERS=0, or
+    after the pool breaks, chunks run inline.
+    """
+    
+    WORKERS = int(os.environ.get('ANALYTICS_WORKERS', min(4, os.cpu_count() or 1)))
+    CHUNK_SIZE = int(os.environ.get('ANALYTICS_CHUNK_SIZE', 250))
+    MAX_PENDING = int(os.environ.get('ANALYTICS_MAX_PENDING', 2 * WORKERS))
+    
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    def start(self):
+        if self.WORKERS > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._slots = asyncio.Semaphore(max(1, self.MAX_PENDING))
+            logger.info(f"Analytics pool started with {self.WORKERS} worker processes")
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    async def warm(self):
+        """Spawn the worker processes ahead of the first analysis"""
+        if self._executor is not None:
+            await asyncio.gather(*(self._run(os.getpid) for _ in range(self.WORKERS)))
+    
+    async def _run(self, func, *args):
+        executor = self._executor
+        if executor is None:
+            return func(*args)
+        async with self._slots:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+            except BrokenProcessPool as e:
+                metrics.increment("analytics_pool_failures")
+                logger.error(f"Analytics pool broke, running analytics inline from now on: {e}")
+                if self._executor is executor:
+                    self.close()
+                return func(*args)
+    
+    async def map_chunks(self, func, items: list, *args) -> list:
+        """`func(*args, chunk)` for each chunk of `items`, in chunk order"""
+        chunks = [items[start:start + self.CHUNK_SIZE] for start in range(0, len(items), self.CHUNK_SIZE)]
+        metrics.increment("analytics_chunks", len(chunks))
+        return await asyncio.gather(*(self._run(func, *args, chunk) for chunk in chunks))
+
+analytics_pool = AnalyticsPool()
+
+# Challenge recommendations
+class RecommendationService:
+    """TF-IDF index over active challenge text for expectation-based recommendations.
+    
+    Challenges are kept as sparse term-frequency vectors in an inverted
+    index (term -> {challenge_id: tf}). Weights are (1 + log tf) * idf and
+    scores are cosine similarities computed only over the postings of the
+    query's terms, followed by a top-k selection. create_challenge adds to
+    the index in place; any other change to the challenges collection
+    (expiry, archive, imports, other workers) moves its version past the
+    indexed one and the index is rebuilt on the next query. Results are
+    cached per user until the index or the user's expectations change.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[^\W\d_]{3,}")
+    STOPWORDS = frozenset("""
+        para com uma que dos das por como mais não nao seu sua seus suas são sao nos nas pelo pela
+        pelos pelas deve devem ser ter entre sobre também tambem muito onde quando qual quais este
+        esta estes estas esse essa isso aos até ate sem sob the and for with busco buscamos procuro
+        procuramos valorizo valorizamos nossa nosso empresa
+    """.split())
+    MAX_CHALLENGES = int(os.environ.get('RECOMMENDATION_MAX_CHALLENGES', 5000))
+    CACHE_MAX_USERS = int(os.environ.get('RECOMMENDATION_CACHE_MAX_USERS', 10000))
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._challenges: Dict[str, dict] = {}
+        self._terms: Dict[str, Counter] = {}
+        self._norms: Dict[str, float] = {}
+        self._indexed_version: Optional[int] = None
+        self._generation = 0
+        self._rebuild_lock = asyncio.Lock()
+        # user_id -> (generation, expectations, ranked limit, ranking)
+        self._cache: "OrderedDict[str, Tuple[int, Optional[str], int, List[Tuple[str, float]]]]" = OrderedDict()
+    
+    @staticmethod
+    def tokenize(text: Optional[str]) -> Counter:
+        if not text:
+            return Counter()
+        return Counter(
+            token for token in RecommendationService.TOKEN_PATTERN.findall(text.lower())
+            if token not in RecommendationService.STOPWORDS
+        )
+    
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._challenges)) / (1 + len(self._postings.get(term, ())))) + 1
+    
+    def _add(self, challenge: dict):
+        challenge_id = challenge["id"]
+        if challenge_id in self._challenges:
+            return
+        terms = self.tokenize(" ".join(filter(None, (
+            challenge.get("title"), challenge.get("summary"), challenge.get("description")
+        ))))
+        self._challenges[challenge_id] = challenge
+        self._terms[challenge_id] = terms
+        for term, count in terms.items():
+            self._postings[term][challenge_id] = count
+        # Document frequencies changed, so every norm has to be recomputed
+        self._norms = {}
+        self._generation += 1
+    
+    def add(self, challenge: dict):
+        """Index a challenge created by this worker; call after bumping the challenges version"""
+        if not challenge.get("active", True):
+            return
+        self._add(challenge)
+        # Only stay current if no other write happened since the last (re)build
+        if self._indexed_version == collection_versions.get("challenges") - 1:
+            self._indexed_version += 1
+    
+    async def warm(self):
+        """Build the index ahead of the first recommendation request"""
+        await self._ensure_current()
+    
+    async def _ensure_current(self):
+        if self._indexed_version == collection_versions.get("challenges"):
+            return
+        async with self._rebuild_lock:
+            version = collection_versions.get("challenges")
+            if self._indexed_version == version:
+                return
+            challenges = await storage.challenges.list_active(self.MAX_CHALLENGES)
+            self._postings = defaultdict(dict)
+            self._challenges = {}
+            self._terms = {}
+            for challenge in challenges:
+                self._add(challenge)
+            self._indexed_version = version
+            metrics.increment("recommendation_index_rebuilds")
+    
+    def _norm(self, challenge_id: str) -> float:
+        norm = self._norms.get(challenge_id)
+        if norm is None:
+            norm = math.sqrt(sum(
+                ((1 + math.log(count)) * self._idf(term)) ** 2 for term, count in self._terms[challenge_id].items()
+            )) or 1.0
+            self._norms[challenge_id] = norm
+        return norm
+    
+    def _rank(self, text: Optional[str], limit: int) -> List[Tuple[str, float]]:
+        query = self.tokenize(text)
+        scores: Dict[str, float] = defaultdict(float)
+        query_norm = 0.0
+        for term, count in query.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            weight = (1 + math.log(count)) * idf
+            query_norm += weight ** 2
+            for challenge_id, tf in postings.items():
+                scores[challenge_id] += weight * (1 + math.log(tf)) * idf
+        
+        if not scores:
+            return []
+        query_norm = math.sqrt(query_norm)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1] / self._norm(item[0]))
+        return [(challenge_id, round(score / (self._norm(challenge_id) * query_norm), 4)) for challenge_id, score in top]
+    
+    async def recommend(self, user: dict, limit: int) -> List[Tuple[dict, float]]:
+        """Top `limit` active challenges for the user's expectations, best first"""
+        await self._ensure_current()
+        expectations = user.get("expectations")
+        cached = self._cache.get(user["id"])
+        if cached is not None and cached[:2] == (self._generation, expectations) and cached[2] >= limit:
+            self._cache.move_to_end(user["id"])
+            ranked = cached[3]
+        else:
+            ranked_limit = max(limit, 20)
+            ranked = self._rank(expectations, ranked_limit)
+            self._cache[user["id"]] = (self._generation, expectations, ranked_limit, ranked)
+            if len(self._cache) > self.CACHE_MAX_USERS:
+                self._cache.popitem(last=False)
+        return [(self._challenges[challenge_id], score) for challenge_id, score in ranked[:limit]]
+
+recommendation_service = RecommendationService()
+
+# Transactional outbox for deferred side effects
+class OutboxService:
+    """Append events for side effects that do not need to block the request.
+
+    Events are drained by the OutboxWorker with at-least-once delivery, so
+    every handler must be idempotent. Counter updates go through
+    apply_increments, which records each (target, event id) pair in the
+    `applied_events` collection under a unique index and refuses to apply
+    the same event to a target twice.
+    """
+    
+    # Documents that carried the applied event ids before they moved to `applied_events`
+    LEGACY_APPLIED_EVENTS = ("users", "solutions", "activity_rollups", "points_buckets", "ledger_snapshots")
+    
+    @staticmethod
+    async def append(event_type: str, payload: Dict[str, Any]) -> Optional[str]:
+        """Append a single event to the outbox and wake the worker.
+        
+        Returns None when MongoDB is not connected (memory storage backend):
+        there is no outbox, and callers apply any side effect they cannot
+        do without themselves.
+        """
+        if not db_manager.connected:
+            return None
+        
+        event = OutboxService._new_event(event_type, payload, datetime.utcnow())
+        await db_manager.db.outbox.insert_one(event)
+        outbox_worker.notify()
+        return event["id"]
+    
+    @staticmethod
+    async def append_many(event_type: str, payloads: List[Dict[str, Any]]) -> Optional[int]:
+        """Append one event per payload in a single insert; None without a database"""
+        if not db_manager.connected:
+            return None
+        if not payloads:
+            return 0
+        
+        now = datetime.utcnow()
+        await db_manager.db.outbox.insert_many([
+            OutboxService._new_event(event_type, payload, now) for payload in payloads
+        ])
+        outbox_worker.notify()
+        return len(payloads)
+    
+    @staticmethod
+    async def discard(event_id: str):
+        """Drop an event the request gave up on, unless a worker already claimed it"""
+        await db_manager.db.outbox.delete_one({"id": event_id, "status": "pending"})
+    
+    @staticmethod
+    async def migrate():
+        """Remove the applied event ids older versions kept on target documents"""
+        for collection in OutboxService.LEGACY_APPLIED_EVENTS:
+            result = await db_manager.db[collection].update_many(
+                {"applied_events": {"$exists": True}}, {"$unset": {"applied_events": ""}}
+            )
+            if result.modified_count:
+                logger.info(f"Removed applied event ids from {result.modified_count} {collection} documents")
+    
+    @staticmethod
+    def _new_event(event_type: str, payload: Dict[str, Any], now: datetime) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "type": event_type,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now
+        }
+    
+    @staticmethod
+    async def apply_increments(
+        collection,
+        match: Dict[str, Any],
+        increments: List[Tuple[str, Dict[str, int]]],
+        upsert: bool = False,
+        set_on_insert: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Apply (event_id, $inc) pairs to one document at most once per event.
+        
+        Events already recorded for the target are skipped and the rest are
+        applied as a single update. With `upsert`, the document is created
+        from `match` and `set_on_insert` when missing. On deployments with
+        transactions the records and the update commit together; otherwise
+        the unique index decides which delivery applies an event, and a
+        crash between the two writes loses that increment rather than
+        doubling it (the ledger repairs votes and points).
+        """
+        if not increments:
+            return
+        
+        target = f"{collection.name}:{json.dumps(match, sort_keys=True, default=str)}"
+        if not db_manager.supports_transactions:
+            await OutboxService._apply_once(collection, match, target, increments, upsert, set_on_insert)
+            return
+        
+        async with await db_manager.start_session() as session:
+            async def apply(session):
+                await OutboxService._apply_once(
+                    collection, match, target, increments, upsert, set_on_insert, session
+                )
+            await session.with_transaction(apply)
+    
+    @staticmethod
+    async def _apply_once(collection, match, target, increments, upsert, set_on_insert, session=None):
+        applied_events = db_manager.db.applied_events
+        seen = {
+            record["event_id"] async for record in applied_events.find(
+                {"target": target, "event_id": {"$in": [event_id for event_id, _ in increments]}},
+                {"_id": 0, "event_id": 1},
+                session=session
+            )
+        }
+        fresh = [(event_id, inc) for event_id, inc in increments if event_id not in seen]
+        if not fresh:
+            return
+        
+        now = datetime.utcnow()
+        records = [{"target": target, "event_id": event_id, "applied_at": now} for event_id, _ in fresh]
+        if session is not None:
+            await applied_events.insert_many(records, session=session)
+        else:
+            # A concurrent delivery of the same event loses the race on the unique index
+            rejected = await insert_unordered(applied_events, records)
+            fresh = [pair for index, pair in enumerate(fresh) if index not in rejected]
+            if not fresh:
+                return
+        
+        total: Dict[str, int] = defaultdict(int)
+        for _, inc in fresh:
+            for field, amount in inc.items():
+                total[field] += amount
+        update: Dict[str, Any] = {"$inc": dict(total)}
+        if set_on_insert:
+            update["$setOnInsert"] = set_on_insert
+        await collection.update_one(match, update, upsert=upsert, session=session)
+
+class OutboxWorker:
+    """Background drainer for the outbox collection.
+    
+    Claims pending events in batches under a lease, groups them by type and
+    hands each group to its registered handler with bounded concurrency.
+    Failed batches are retried with exponential backoff; events whose lease
+    expires (crashed worker) are claimed again. The events of a failed
+    batch are marked `isolate` and retried one at a time, so attempts are
+    counted per event and only an event that fails on its own is given up
+    on after MAX_ATTEMPTS.
+    
+    An event type may also have one preparer, which runs before any of its
+    handlers and returns the events they should see; events it drops are
+    completed without being handled.
+    """
+    
+    BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 200))
+    MAX_CONCURRENCY = int(os.environ.get('OUTBOX_MAX_CONCURRENCY', 4))
+    MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+    LEASE_SECONDS = 60
+    POLL_INTERVAL = 1.0
+    
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[List[dict]], Awaitable[None]]]] = defaultdict(list)
+        self._preparers: Dict[str, Callable[[List[dict]], Awaitable[List[dict]]]] = {}
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def handler(self, event_type: str):
+        """Register a batch handler for an event type.
+        
+        Several handlers may be registered for the same type; if any of them
+        fails the whole batch is redelivered to all of them.
+        """
+        def decorator(func):
+            self._handlers[event_type].append(func)
+            return func
+        return decorator
+    
+    def preparer(self, event_type: str):
+        """Register the step that runs before the handlers of an event type"""
+        def decorator(func):
+            if event_type in self._preparers:
+                raise ValueError(f"Outbox preparer for '{event_type}' already registered")
+            self._preparers[event_type] = func
+            return func
+        return decorator
+    
+    def notify(self):
+        self._wakeup.set()
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Outbox worker started")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox worker stopped")
+    
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Outbox drain failed: {e}")
+                processed = 0
+            
+            # A full batch means there is probably more work waiting
+            if processed >= self.BATCH_SIZE:
+                continue
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+    
+    async def drain_once(self) -> int:
+        """Claim and process one batch, returning the number of events handled"""
+        events = await self._claim()
+        if not events:
+            return 0
+        
+        by_type: Dict[str, List[dict]] = defaultdict(list)
+        for event in events:
+            by_type[event["type"]].append(event)
+        
+        await asyncio.gather(*(self._dispatch(event_type, batch) for event_type, batch in by_type.items()))
+        return len(events)
+    
+    async def _claim(self) -> List[dict]:
+        now = datetime.utcnow()
+        claimable = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "lease_until": {"$lt": now}}
+        ]}
+        
+        candidates = await db_manager.db.outbox.find(claimable, {"id": 1}) \
+            .sort("created_at", 1).limit(self.BATCH_SIZE).to_list(self.BATCH_SIZE)
+        if not candidates:
+            return []
+        
+        claim_id = str(uuid.uuid4())
+        await db_manager.db.outbox.update_many(
+            {"id": {"$in": [c["id"] for c in candidates]}, **claimable},
+            {"$set": {
+                "status": "processing",
+                "claim_id": claim_id,
+                "lease_until": now + timedelta(seconds=self.LEASE_SECONDS)
+            }}
+        )
+        return await db_manager.db.outbox.find({"claim_id": claim_id}).to_list(self.BATCH_SIZE)
+    
+    async def _dispatch(self, event_type: str, events: List[dict]):
+        batches = [[event] for event in events if event.get("isolate")]
+        shared = [event for event in events if not event.get("isolate")]
+        if shared:
+            batches.insert(0, shared)
+        for batch in batches:
+            await self._handle(event_type, batch)
+    
+    async def _handle(self, event_type: str, events: List[dict]):
+        event_ids = [event["id"] for event in events]
+        handlers = self._handlers.get(event_type)
+        prepare = self._preparers.get(event_type)
+        
+        async with self._semaphore:
+            try:
+                if not handlers:
+                    raise RuntimeError(f"No outbox handler registered for '{event_type}'")
+                accepted = await prepare(events) if prepare is not None else events
+                for handler in handlers if accepted else ():
+                    await handler(accepted)
+            except Exception as e:
+                logger.error(f"Outbox handler for '{event_type}' failed on {len(events)} events: {e}")
+                await self._schedule_retry(events, str(e))
+                return
+        
+        await db_manager.db.outbox.delete_many({"id": {"$in": event_ids}})
+    
+    async def _schedule_retry(self, events: List[dict], error: str):
+        # A batch failure may be caused by any one of its events: retry each
+        # alone and only give up on an event that fails by itself
+        alone = len(events) == 1
+        by_attempts: Dict[int, List[str]] = defaultdict(list)
+        for event in events:
+            by_attempts[event.get("attempts", 0) + 1].append(event["id"])
+        
+        for attempts, event_ids in by_attempts.items():
+            if alone and attempts >= self.MAX_ATTEMPTS:
+                await db_manager.db.outbox.update_many(
+                    {"id": {"$in": event_ids}},
+                    {"$set": {"status": "failed", "last_error": error}, "$inc": {"attempts": 1}}
+                )
+                logger.error(f"Outbox events gave up after {attempts} attempts: {event_ids}")
+                continue
+            
+            backoff = min(2 ** attempts, 300)
+            await db_manager.db.outbox.update_many(
+                {"id": {"$in": event_ids}},
+                {
+                    "$set": {
+                        "status": "pending",
+                        "isolate": True,
+                        "last_error": error,
+                        "next_attempt_at": datetime.utcnow() + timedelta(seconds=backoff)
+                    },
+                    "$inc": {"attempts": 1}
+                }
+            )
+
+outbox_worker = OutboxWorker()
+
+@outbox_worker.preparer("vote_cast")
+async def materialize_votes(events: List[dict]) -> List[dict]:
+    """Insert the votes carried by vote_cast events before any handler runs.
+    
+    The event is the write that commits its vote, so the vote is inserted
+    here too (idempotently by id) in case the request stopped before
+    inserting it. Events whose vote conflicts with another vote by the same
+    user are dropped, so no vote_cast handler counts them.
+    """
+    carrying = [event for event in events if "vote" in event["payload"]]
+    if not carrying:
+        return events
+    try:
+        result = await db_manager.db.votes.bulk_write([
+            UpdateOne({"id": event["payload"]["vote"]["id"]}, {"$setOnInsert": event["payload"]["vote"]}, upsert=True)
+            for event in carrying
+        ], ordered=False)
+        inserted = result.upserted_count
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error["code"] != 11000 for error in errors):
+            raise
+        inserted = e.details.get("nUpserted", 0)
+        conflicting = {carrying[error["index"]]["id"] for error in errors}
+        events = [event for event in events if event["id"] not in conflicting]
+    if inserted:
+        for event in events:
+            if "vote" in event["payload"]:
+                voted_index.record(event["payload"]["voter_id"], event["payload"]["solution_id"])
+        collection_versions.bump("votes")
+    return events
+
+@outbox_worker.handler("vote_cast")
+async def apply_vote_side_effects(events: List[dict]):
+    """Increment solution vote counts and award points, batched per target"""
+    by_solution: Dict[str, List[Tuple[str, Dict[str, int]]]] = defaultdict(list)
+    by_author: Dict[str, List[Tuple[str, Dict[str, int]]]] = defaultdict(list)
+    
+    for event in events:
+        payload = event["payload"]
+        by_solution[payload["solution_id"]].append((event["id"], {"votes": 1}))
+        by_author[payload["author_id"]].append((event["id"], {"points": payload["points"]}))
+    
+    # Record the events before applying them so the ledger never lags the counters
+    await PointsLedger.append(events)
+    
+    await asyncio.gather(
+        *(OutboxService.apply_increments(db_manager.db.solutions, {"id": solution_id}, increments)
+          for solution_id, increments in by_solution.items()),
+        *(OutboxService.apply_increments(db_manager.db.users, {"id": author_id}, increments)
+          for author_id, increments in by_author.items())
+    )
+    collection_versions.bump("solutions", "users")
+    
+    if event_broker.local_publish:
+        solutions, authors = await asyncio.gather(
+            db_manager.db.solutions.find({"id": {"$in": list(by_solution)}}).to_list(None),
+            db_manager.db.users.find({"id": {"$in": list(by_author)}}).to_list(None)
+        )
+        for solution in solutions:
+            PushNotifier.solution_votes(solution)
+        for author in authors:
+            PushNotifier.user_points(author)
+
+@outbox_worker.handler("user_registered")
+async def analyze_registered_expectations(events: List[dict]):
+    """Pre-compute the keyword analysis of newly shared expectations"""
+    analyzed = 0
+    matcher = taxonomy_service.matcher
+    for event in events:
+        payload = event["payload"]
+        if not payload.get("has_expectations") or payload["user_type"] not in MatchingService.AUDIENCES:
+            continue
+        
+        user_doc = await db_manager.db.users.find_one({"id": payload["user_id"]})
+        if not user_doc or not user_doc.get('expectations'):
+            continue
+        
+        await db_manager.db.users.update_one(
+            {"id": user_doc['id']},
+            {"$set": {
+                "expectation_analysis": matcher.analyze(user_doc['expectations'], user_doc['type']),
+                "analysis_version": matcher.version
+            }}
+        )
+        analyzed += 1
+    
+    if analyzed:
+        collection_versions.bump("users")
+
+# Daily activity rollups
+class RollupService:
+    """Per-day activity counters in the `activity_rollups` collection.
+    
+    One document per (type, day) holds the day's total and a breakdown by
+    a type-specific dimension. Documents are keyed "<type>:<YYYY-MM-DD>" so
+    a date range is a single _id range scan. Live counts are applied from
+    outbox events; `backfill` rebuilds them from the source collections.
+    
+    The two never write the same document concurrently: a backfill first
+    records the current day in the BACKFILL_ID document as its watermark,
+    waits SETTLE_SECONDS for batches that read the old watermark, and then
+    rewrites only the days before it. Live handlers skip events from those
+    days, which the backfill counted from their source documents. The
+    watermark day itself is left to the live counters.
+    """
+    
+    BACKFILL_ID = "backfill"
+    SETTLE_SECONDS = float(os.environ.get('ROLLUP_BACKFILL_SETTLE_SECONDS', OutboxWorker.LEASE_SECONDS))
+    
+    # type -> (source collection, timestamp field, breakdown field)
+    SOURCES = {
+        "registrations": ("users", "created_at", "type"),
+        "challenges": ("challenges", "created_at", None),
+        "solutions": ("solutions", "submission_date", "challenge_id"),
+        "votes": ("votes", "created_at", "challenge_id")
+    }
+    
+    @staticmethod
+    def day(when: datetime) -> str:
+        return when.strftime("%Y-%m-%d")
+    
+    @staticmethod
+    def doc_id(rollup_type: str, day: str) -> str:
+        return f"{rollup_type}:{day}"
+    
+    @staticmethod
+    async def apply(rollup_type: str, events: List[dict], breakdown_key: Optional[str] = None):
+        """Count outbox events into the rollup of the day each was created"""
+        backfilled_before = await RollupService.watermark()
+        by_day: Dict[str, List[Tuple[str, Dict[str, int]]]] = defaultdict(list)
+        for event in events:
+            if backfilled_before and RollupService.day(event["created_at"]) < backfilled_before:
+                continue
+            inc = {"count": 1}
+            if breakdown_key and event["payload"].get(breakdown_key):
+                inc[f"breakdown.{event['payload'][breakdown_key]}"] = 1
+            by_day[RollupService.day(event["created_at"])].append((event["id"], inc))
+        
+        await asyncio.gather(*(
+            OutboxService.apply_increments(
+                db_manager.db.activity_rollups,
+                {"_id": RollupService.doc_id(rollup_type, day)},
+                increments,
+                upsert=True,
+                set_on_insert={"type": rollup_type, "day": day}
+            )
+            for day, increments in by_day.items()
+        ))
+    
+    @staticmethod
+    async def watermark() -> Optional[str]:
+        """The day before which rollups were last rebuilt by a backfill"""
+        doc = await db_manager.db.activity_rollups.find_one({"_id": RollupService.BACKFILL_ID})
+        return doc["before"] if doc else None
+    
+    @staticmethod
+    async def backfill() -> int:
+        """Recompute the rollup documents before today from the source collections"""
+        before = RollupService.day(datetime.utcnow())
+        await db_manager.db.activity_rollups.update_one(
+            {"_id": RollupService.BACKFILL_ID},
+            {"$set": {"before": before, "completed": False}},
+            upsert=True
+        )
+        await asyncio.sleep(RollupService.SETTLE_SECONDS)
+        cutoff = datetime.strptime(before, "%Y-%m-%d")
+        
+        written = 0
+        for rollup_type, (collection, time_field, breakdown) in RollupService.SOURCES.items():
+            pipeline: List[dict] = [{"$match": {time_field: {"$lt": cutoff}}}]
+            if rollup_type == "votes":
+                # Votes only store the solution; resolve the challenge through it
+                pipeline += [
+                    {"$lookup": {
+                        "from": "solutions",
+                        "localField": "solution_id",
+                        "foreignField": "id",
+                        "as": "solution"
+                    }},
+                    {"$set": {"challenge_id": {"$first": "$solution.challenge_id"}}}
+                ]
+            pipeline.append({"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${time_field}"}},
+                    "breakdown": f"${breakdown}" if breakdown else None
+                },
+                "n": {"$sum": 1}
+            }})
+            
+            days: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"count": 0, "breakdown": {}})
+            async for row in db_manager.db[collection].aggregate(pipeline, allowDiskUse=True):
+                rollup = days[row["_id"]["day"]]
+                rollup["count"] += row["n"]
+                if row["_id"].get("breakdown"):
+                    rollup["breakdown"][row["_id"]["breakdown"]] = row["n"]
+            
+            operations = [
+                UpdateOne(
+                    {"_id": RollupService.doc_id(rollup_type, day)},
+                    {"$set": {"type": rollup_type, "day": day, **rollup}},
+                    upsert=True
+                )
+                for day, rollup in days.items()
+            ]
+            for start in range(0, len(operations), 1000):
+                await db_manager.db.activity_rollups.bulk_write(operations[start:start + 1000], ordered=False)
+            written += len(operations)
+        
+        await db_manager.db.activity_rollups.update_one(
+            {"_id": RollupService.BACKFILL_ID}, {"$set": {"completed": True}}
+        )
+        logger.info(f"Activity rollups backfilled before {before}: {written} documents")
+        return written
+    
+    @staticmethod
+    async def backfill_if_empty():
+        """Backfill on first start, or resume a backfill that was interrupted"""
+        try:
+            marker = await db_manager.db.activity_rollups.find_one({"_id": RollupService.BACKFILL_ID})
+            if marker is None or not marker.get("completed", True):
+                await RollupService.backfill()
+        except Exception as e:
+            logger.error(f"Activity rollup backfill failed: {e}")
+    
+    @staticmethod
+    def period(day: str, interval: str) -> str:
+        if interval == "day":
+            return day
+        if interval == "month":
+            return day[:7]
+        year, week, _ = datetime.strptime(day, "%Y-%m-%d").isocalendar()
+        return f"{year}-W{week:02d}"
+    
+    @staticmethod
+    async def series(rollup_type: str, start: datetime, end: datetime, interval: str, breakdown: Optional[str]) -> List[Dict[str, Any]]:
+        """Counts per period between start and end (inclusive), zero-filled"""
+        docs = await db_manager.db.activity_rollups.find({"_id": {
+            "$gte": RollupService.doc_id(rollup_type, RollupService.day(start)),
+            "$lte": RollupService.doc_id(rollup_type, RollupService.day(end))
+        }}, {"_id": 0, "day": 1, "count": 1, "breakdown": 1}).to_list(None)
+        by_day = {doc["day"]: doc for doc in docs}
+        
+        totals: "OrderedDict[str, int]" = OrderedDict()
+        current = start
+        while current <= end:
+            day = RollupService.day(current)
+            doc = by_day.get(day, {})
+            count = doc.get("breakdown", {}).get(breakdown, 0) if breakdown else doc.get("count", 0)
+            period = RollupService.period(day, interval)
+            totals[period] = totals.get(period, 0) + count
+            current += timedelta(days=1)
+        
+        return [{"period": period, "count": count} for period, count in totals.items()]
+
+@outbox_worker.handler("user_registered")
+async def rollup_registrations(events: List[dict]):
+    await RollupService.apply("registrations", events, breakdown_key="user_type")
+
+@outbox_worker.handler("challenge_created")
+async def rollup_challenges(events: List[dict]):
+    await RollupService.apply("challenges", events)
+
+@outbox_worker.handler("solution_submitted")
+async def rollup_solutions(events: List[dict]):
+    await RollupService.apply("solutions", events, breakdown_key="challenge_id")
+
+@outbox_worker.handler("vote_cast")
+async def rollup_votes(events: List[dict]):
+    await RollupService.apply("votes", events, breakdown_key="challenge_id")
+
+# Time-bucketed point counters
+class PointsBuckets:
+    """Points awarded per calendar period, for windowed leaderboards.
+    
+    Each vote adds the author's points to the current ISO week and month
+    buckets, globally and for the solution's challenge, plus an all-time
+    bucket per challenge. A bucket document maps user ids to points, so a
+    window of N periods is answered by merging N documents.
+    """
+    
+    GRANULARITIES = ("week", "month")
+    
+    @staticmethod
+    def period(when: datetime, granularity: str) -> str:
+        if granularity == "month":
+            return when.strftime("%Y-%m")
+        if granularity == "week":
+            year, week, _ = when.isocalendar()
+            return f"{year}-W{week:02d}"
+        return "all"
+    
+    @staticmethod
+    def recent_periods(granularity: str, count: int, now: Optional[datetime] = None) -> List[str]:
+        """The current period and the `count - 1` before it"""
+        now = now or datetime.utcnow()
+        if granularity == "all":
+            return ["all"]
+        
+        periods = []
+        if granularity == "week":
+            for offset in range(count):
+                periods.append(PointsBuckets.period(now - timedelta(weeks=offset), "week"))
+        else:
+            year, month = now.year, now.month
+            for _ in range(count):
+                periods.append(f"{year:04d}-{month:02d}")
+                year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return periods
+    
+    @staticmethod
+    def doc_id(scope: str, granularity: str, period: str) -> str:
+        return f"{scope}:{granularity}:{period}"
+    
+    @staticmethod
+    async def record(events: List[dict]):
+        """Add the points of vote events to every bucket they belong to"""
+        by_bucket: Dict[Tuple[str, str, str], List[Tuple[str, Dict[str, int]]]] = defaultdict(list)
+        
+        for event in events:
+            payload = event["payload"]
+            inc = {f"points.{payload['author_id']}": payload["points"]}
+            scopes = ["global", f"challenge:{payload['challenge_id']}"]
+            for scope in scopes:
+                for granularity in PointsBuckets.GRANULARITIES:
+                    key = (scope, granularity, PointsBuckets.period(event["created_at"], granularity))
+                    by_bucket[key].append((event["id"], inc))
+            by_bucket[(scopes[1], "all", "all")].append((event["id"], inc))
+        
+        await asyncio.gather(*(
+            OutboxService.apply_increments(
+                db_manager.db.points_buckets,
+                {"_id": PointsBuckets.doc_id(scope, granularity, period)},
+                increments,
+                upsert=True,
+                set_on_insert={"scope": scope, "granularity": granularity, "period": period}
+            )
+            for (scope, granularity, period), increments in by_bucket.items()
+        ))
+    
+    @staticmethod
+    @single_flight
+    async def leaderboard(scope: str, granularity: str, periods: int, limit: int) -> List[LeaderboardEntry]:
+        """Rank users by points merged across the most recent buckets"""
+        bucket_ids = [
+            PointsBuckets.doc_id(scope, granularity, period)
+            for period in PointsBuckets.recent_periods(granularity, periods)
+        ]
+        buckets = await db_manager.db.points_buckets.find(
+            {"_id": {"$in": bucket_ids}}, {"_id": 0, "points": 1}, max_time_ms=max_time_ms()
+        ).to_list(len(bucket_ids))
+        
+        totals: Counter = Counter()
+        for bucket in buckets:
+            totals.update(bucket.get("points", {}))
+        top = totals.most_common(limit)
+        if not top:
+            return []
+        
+        users = await db_manager.db.users.find(
+            {"id": {"$in": [user_id for user_id, _ in top]}},
+            {"_id": 0, "id": 1, "name": 1, "type": 1},
+            max_time_ms=max_time_ms()
+        ).to_list(len(top))
+        users_by_id = {user["id"]: user for user in users}
+        
+        return [
+            LeaderboardEntry(rank=rank, points=points, **users_by_id[user_id])
+            for rank, (user_id, points) in enumerate(
+                ((user_id, points) for user_id, points in top if user_id in users_by_id), start=1
+            )
+        ]
+
+@outbox_worker.handler("vote_cast")
+async def bucket_vote_points(events: List[dict]):
+    await PointsBuckets.record(events)
+    if events:
+        collection_versions.bump("points_buckets")
+
+# Points ledger, snapshots and reconciliation
+class PointsLedger:
+    """Append-only record of every change to users.points and solutions.votes.
+    
+    Each vote produces a "points" entry for the author and a "vote" entry
+    for the solution, written in one unordered batch per outbox batch with
+    ids derived from the event id, so redelivery cannot duplicate them.
+    Counters that predate the ledger are recorded once as opening balances.
+    
+    Compaction folds settled entries into per-user and per-solution
+    snapshots, then repairs any counter that differs from snapshot plus
+    tail. Entries younger than SETTLE_SECONDS, and targets with outbox
+    events still in flight, are skipped so live increments are never
+    overwritten; repairs are compare-and-set on the value that was read.
+    """
+    
+    SETTLE_SECONDS = int(os.environ.get('LEDGER_SETTLE_SECONDS', 300))
+    BATCH_SIZE = 500
+    
+    @staticmethod
+    async def append(events: List[dict]):
+        now = datetime.utcnow()
+        entries = []
+        for event in events:
+            payload = event["payload"]
+            common = {
+                "event_id": event["id"],
+                "solution_id": payload["solution_id"],
+                "challenge_id": payload.get("challenge_id"),
+                "voter_id": payload["voter_id"],
+                "occurred_at": event["created_at"],
+                "recorded_at": now
+            }
+            entries.append({
+                "_id": f"{event['id']}:points", "kind": "points",
+                "user_id": payload["author_id"], "amount": payload["points"], **common
+            })
+            entries.append({"_id": f"{event['id']}:vote", "kind": "vote", "amount": 1, **common})
+        await PointsLedger._insert_ignoring_duplicates(entries)
+    
+    @staticmethod
+    async def _insert_ignoring_duplicates(entries: List[dict]):
+        if not entries:
+            return
+        try:
+            await db_manager.db.points_ledger.insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+    
+    @staticmethod
+    async def open_balances():
+        """Record current counters as opening balances the first time the ledger runs.
+        
+        Must run before the outbox worker starts so no event is both part
+        of an opening balance and recorded as an entry.
+        """
+        meta = await db_manager.db.ledger_meta.find_one({"_id": "opening"})
+        if meta:
+            return
+        
+        now = datetime.utcnow()
+        entries = []
+        async for user in db_manager.db.users.find({"points": {"$ne": 0}}, {"_id": 0, "id": 1, "points": 1}):
+            entries.append({
+                "_id": f"opening:points:{user['id']}", "kind": "points", "reason": "opening_balance",
+                "user_id": user["id"], "amount": user["points"], "recorded_at": now
+            })
+        async for solution in db_manager.db.solutions.find({"votes": {"$ne": 0}}, {"_id": 0, "id": 1, "votes": 1}):
+            entries.append({
+                "_id": f"opening:votes:{solution['id']}", "kind": "vote", "reason": "opening_balance",
+                "solution_id": solution["id"], "amount": solution["votes"], "recorded_at": now
+            })
+        
+        for start in range(0, len(entries), PointsLedger.BATCH_SIZE):
+            await PointsLedger._insert_ignoring_duplicates(entries[start:start + PointsLedger.BATCH_SIZE])
+        await db_manager.db.ledger_meta.update_one(
+            {"_id": "opening"}, {"$setOnInsert": {"opened_at": now}}, upsert=True
+        )
+        logger.info(f"Points ledger opened with {len(entries)} opening balances")
+    
+    @staticmethod
+    async def compact() -> Dict[str, Any]:
+        """Fold settled ledger entries into snapshots, then repair drifted counters.
+        
+        The window being folded is stored before it is applied, and snapshot
+        increments are guarded by the window id, so a compaction interrupted
+        half-way resumes without double counting.
+        """
+        meta = await db_manager.db.ledger_meta.find_one({"_id": "compaction"}) or {}
+        cutoff = meta.get("cutoff", datetime.min)
+        window_end = meta.get("pending_cutoff")
+        if window_end is None:
+            window_end = datetime.utcnow() - timedelta(seconds=PointsLedger.SETTLE_SECONDS)
+            await db_manager.db.ledger_meta.update_one(
+                {"_id": "compaction"}, {"$set": {"pending_cutoff": window_end}}, upsert=True
+            )
+        window_id = f"compaction:{window_end.isoformat()}"
+        
+        folded = 0
+        if window_end > cutoff:
+            totals = await db_manager.db.points_ledger.aggregate([
+                {"$match": {"recorded_at": {"$gt": cutoff, "$lte": window_end}}},
+                {"$group": {
+                    "_id": {
+                        "$cond": [
+                            {"$eq": ["$kind", "points"]},
+                            {"$concat": ["user:", "$user_id"]},
+                            {"$concat": ["solution:", "$solution_id"]}
+                        ]
+                    },
+                    "amount": {"$sum": "$amount"}
+                }}
+            ], allowDiskUse=True).to_list(None)
+            
+            semaphore = asyncio.Semaphore(8)
+            
+            async def fold(row):
+                async with semaphore:
+                    await OutboxService.apply_increments(
+                        db_manager.db.ledger_snapshots, {"_id": row["_id"]},
+                        [(window_id, {"total": row["amount"]})], upsert=True
+                    )
+            
+            await asyncio.gather(*(fold(row) for row in totals))
+            folded = len(totals)
+        
+        await db_manager.db.ledger_meta.update_one(
+            {"_id": "compaction"},
+            {"$set": {"cutoff": max(cutoff, window_end)}, "$unset": {"pending_cutoff": ""}}
+        )
+        
+        repaired_users = await PointsLedger.repair("users", "points", "user", "author_id")
+        repaired_solutions = await PointsLedger.repair("solutions", "votes", "solution", "solution_id")
+        
+        report = {
+            "cutoff": max(cutoff, window_end).isoformat(),
+            "snapshots_updated": folded,
+            "users_repaired": repaired_users,
+            "solutions_repaired": repaired_solutions
+        }
+        logger.info(f"Ledger compaction finished: {report}")
+        return report
+    
+    @staticmethod
+    async def repair(collection: str, field: str, kind: str, payload_key: str) -> int:
+        """Set `field` to snapshot + ledger tail wherever the counter has drifted"""
+        meta = await db_manager.db.ledger_meta.find_one({"_id": "compaction"}) or {}
+        cutoff = meta.get("cutoff", datetime.min)
+        ledger_field = "user_id" if kind == "user" else "solution_id"
+        ledger_kind = "points" if kind == "user" else "vote"
+        settle_after = datetime.utcnow() - timedelta(seconds=PointsLedger.SETTLE_SECONDS)
+        repaired = 0
+        
+        cursor = db_manager.db[collection].find({}, {"_id": 0, "id": 1, field: 1})
+        while True:
+            docs = await cursor.to_list(PointsLedger.BATCH_SIZE)
+            if not docs:
+                break
+            ids = [doc["id"] for doc in docs]
+            
+            snapshots, tails, in_flight = await asyncio.gather(
+                db_manager.db.ledger_snapshots.find(
+                    {"_id": {"$in": [f"{kind}:{doc_id}" for doc_id in ids]}}, {"total": 1}
+                ).to_list(None),
+                db_manager.db.points_ledger.aggregate([
+                    {"$match": {ledger_field: {"$in": ids}, "kind": ledger_kind, "recorded_at": {"$gt": cutoff}}},
+                    {"$group": {"_id": f"${ledger_field}", "amount": {"$sum": "$amount"}, "last": {"$max": "$recorded_at"}}}
+                ]).to_list(None),
+                db_manager.db.outbox.distinct(
+                    f"payload.{payload_key}",
+                    {"type": "vote_cast", "status": {"$in": ["pending", "processing"]}, f"payload.{payload_key}": {"$in": ids}}
+                )
+            )
+            snapshot_totals = {row["_id"].split(":", 1)[1]: row["total"] for row in snapshots}
+            tail_totals = {row["_id"]: row for row in tails}
+            busy = set(in_flight)
+            
+            operations = []
+            for doc in docs:
+                tail = tail_totals.get(doc["id"])
+                if doc["id"] in busy or (tail and tail["last"] > settle_after):
+                    continue
+                expected = snapshot_totals.get(doc["id"], 0) + (tail["amount"] if tail else 0)
+                actual = doc.get(field, 0)
+                if expected != actual:
+                    operations.append(UpdateOne({"id": doc["id"], field: actual}, {"$set": {field: expected}}))
+            
+            if operations:
+                result = await db_manager.db[collection].bulk_write(operations, ordered=False)
+                repaired += result.modified_count
+        
+        if repaired:
+            metrics.increment(f"ledger_repaired.{collection}", repaired)
+            collection_versions.bump(collection)
+        return repaired
+
+class VoteReconciler:
+    """Find votes whose side effects were never recorded and replay them.
+    
+    Each run covers the votes cast between the previous run's watermark and
+    SETTLE_SECONDS ago. It works one challenge at a time with bounded
+    concurrency, paging through the challenge's votes BATCH_SIZE at a time
+    in (created_at, _id) order and comparing each page with the ledger's
+    vote entries for the same voters and solutions. A vote with no entry
+    whose vote_cast event is no longer in the outbox (the event was lost)
+    is re-enqueued under a deterministic event id, so overlapping runs
+    cannot enqueue it twice; a vote whose event is still pending, backing
+    off or failed is left to that event. The watermark advances once every
+    challenge has been checked. Votes cast before the ledger opened are
+    covered by opening balances.
+    """
+    
+    MAX_CONCURRENCY = int(os.environ.get('RECONCILE_MAX_CONCURRENCY', 4))
+    BATCH_SIZE = 500
+    
+    @staticmethod
+    async def run() -> Dict[str, int]:
+        opening = await db_manager.db.ledger_meta.find_one({"_id": "opening"})
+        if not opening:
+            return {"challenges": 0, "checked": 0, "replayed": 0}
+        
+        meta = await db_manager.db.ledger_meta.find_one({"_id": "reconciliation"}) or {}
+        since = meta.get("through", opening["opened_at"])
+        until = datetime.utcnow() - timedelta(seconds=PointsLedger.SETTLE_SECONDS)
+        if until <= since:
+            return {"challenges": 0, "checked": 0, "replayed": 0}
+        
+        challenge_ids = await db_manager.db.solutions.distinct("challenge_id")
+        semaphore = asyncio.Semaphore(VoteReconciler.MAX_CONCURRENCY)
+        
+        async def reconcile(challenge_id):
+            async with semaphore:
+                return await VoteReconciler.reconcile_challenge(challenge_id, since, until)
+        
+        results = await asyncio.gather(*(reconcile(challenge_id) for challenge_id in challenge_ids))
+        await db_manager.db.ledger_meta.update_one(
+            {"_id": "reconciliation"}, {"$set": {"through": until}}, upsert=True
+        )
+        
+        report = {
+            "challenges": len(challenge_ids),
+            "checked": sum(checked for checked, _ in results),
+            "replayed": sum(replayed for _, replayed in results)
+        }
+        if report["replayed"]:
+            metrics.increment("votes_replayed", report["replayed"])
+            outbox_worker.notify()
+        logger.info(f"Vote reconciliation finished: {report}")
+        return report
+    
+    @staticmethod
+    async def reconcile_challenge(challenge_id: str, since: datetime, until: datetime) -> Tuple[int, int]:
+        """Check the challenge's votes cast in [since, until), returning (checked, replayed)"""
+        solutions = await db_manager.db.solutions.find(
+            {"challenge_id": challenge_id}, {"_id": 0, "id": 1, "author_id": 1}
+        ).to_list(None)
+        authors = {solution["id"]: solution["author_id"] for solution in solutions}
+        
+        checked = replayed = 0
+        after: Optional[Tuple[datetime, Any]] = None
+        while True:
+            window: Dict[str, Any] = {"solution_id": {"$in": list(authors)}, "created_at": {"$gte": since, "$lt": until}}
+            if after is not None:
+                window = {"$and": [window, {"$or": [
+                    {"created_at": {"$gt": after[0]}},
+                    {"created_at": after[0], "_id": {"$gt": after[1]}}
+                ]}]}
+            votes = await db_manager.db.votes.find(
+                window, {"user_id": 1, "solution_id": 1, "created_at": 1}
+            ).sort([("created_at", 1), ("_id", 1)]).limit(VoteReconciler.BATCH_SIZE).to_list(VoteReconciler.BATCH_SIZE)
+            if not votes:
+                return checked, replayed
+            
+            replayed += await VoteReconciler.reconcile_batch(challenge_id, authors, votes)
+            checked += len(votes)
+            after = (votes[-1]["created_at"], votes[-1]["_id"])
+    
+    @staticmethod
+    async def reconcile_batch(challenge_id: str, authors: Dict[str, str], votes: List[dict]) -> int:
+        solution_ids = list({vote["solution_id"] for vote in votes})
+        voter_ids = list({vote["user_id"] for vote in votes})
+        recorded, in_flight = await asyncio.gather(
+            db_manager.db.points_ledger.find(
+                {"solution_id": {"$in": solution_ids}, "voter_id": {"$in": voter_ids}, "kind": "vote"},
+                {"_id": 0, "voter_id": 1, "solution_id": 1}
+            ).to_list(None),
+            db_manager.db.outbox.find(
+                {"type": "vote_cast", "payload.solution_id": {"$in": solution_ids}, "payload.voter_id": {"$in": voter_ids}},
+                {"_id": 0, "payload.voter_id": 1, "payload.solution_id": 1}
+            ).to_list(None)
+        )
+        known_pairs = {(entry["voter_id"], entry["solution_id"]) for entry in recorded}
+        known_pairs.update((event["payload"]["voter_id"], event["payload"]["solution_id"]) for event in in_flight)
+        
+        replayed = 0
+        for vote in votes:
+            if (vote["user_id"], vote["solution_id"]) in known_pairs:
+                continue
+            try:
+                await db_manager.db.outbox.insert_one({
+                    "id": f"replay:{vote['user_id']}:{vote['solution_id']}",
+                    "type": "vote_cast",
+                    "payload": {
+                        "solution_id": vote["solution_id"],
+                        "challenge_id": challenge_id,
+                        "author_id": authors[vote["solution_id"]],
+                        "voter_id": vote["user_id"],
+                        "points": VOTE_POINTS
+                    },
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": datetime.utcnow(),
+                    "created_at": vote["created_at"]
+                })
+                replayed += 1
+            except DuplicateKeyError:
+                pass
+        return replayed
+
+async def maintain_ledger():
+    await VoteReconciler.run()
+    await PointsLedger.compact()
+
+ledger_maintenance = PeriodicTask(
+    "ledger-maintenance",
+    float(os.environ.get('LEDGER_COMPACTION_INTERVAL', 900)),
+    maintain_ledger
+)
+
+# Hot/cold tiering
+class ArchiveService:
+    """Move finished challenges and their solutions and votes to cold collections.
+    
+    A challenge is archived once it has been expired for more than
+    EXPIRED_AFTER_DAYS, or once its deadline is that far in the past;
+    expired challenges stay readable in the hot tier until then, and
+    archived ones carry status "archived". Documents are copied to the
+    `*_archive` collections (keeping their _id, so a re-run after a crash
+    skips what was already copied) before being deleted from the hot tier,
+    votes first and the challenge last. Only the _ids that were copied are
+    deleted, and the challenge's solutions and votes are swept again until
+    a pass finds none, so a vote or solution written mid-archival is moved
+    rather than lost. Hot indexes and scans then only cover live challenges.
+    """
+    
+    TIERS = {
+        "challenges": "challenges_archive",
+        "solutions": "solutions_archive",
+        "votes": "votes_archive"
+    }
+    EXPIRED_AFTER_DAYS = int(os.environ.get('ARCHIVE_EXPIRED_AFTER_DAYS', 90))
+    CHALLENGES_PER_RUN = 100
+    BATCH_SIZE = 1000
+    
+    @staticmethod
+    def eligible_filter(now: Optional[datetime] = None) -> Dict[str, Any]:
+        expired_before = (now or datetime.utcnow()) - timedelta(days=ArchiveService.EXPIRED_AFTER_DAYS)
+        return {"$or": [
+            {"status": "expired", "deactivated_at": {"$lt": expired_before}},
+            {"deadline": {"$lt": expired_before}}
+        ]}
+    
+    @staticmethod
+    async def _copy(source: str, docs: List[dict]):
+        """Insert `docs` into the archive of `source`, ignoring already-archived ones"""
+        archive = db_manager.db[ArchiveService.TIERS[source]]
+        for start in range(0, len(docs), ArchiveService.BATCH_SIZE):
+            try:
+                await archive.insert_many(docs[start:start + ArchiveService.BATCH_SIZE], ordered=False)
+            except BulkWriteError as e:
+                if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+    
+    @staticmethod
+    async def _move(source: str, query: Dict[str, Any]) -> List[dict]:
+        """Copy the documents matching `query` to the archive, then delete exactly those"""
+        moved = []
+        while True:
+            docs = await db_manager.db[source].find(query).limit(ArchiveService.BATCH_SIZE).to_list(None)
+            if not docs:
+                return moved
+            await ArchiveService._copy(source, docs)
+            await db_manager.db[source].delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+            moved += docs
+    
+    @staticmethod
+    async def archive_challenge(challenge: dict) -> Dict[str, int]:
+        solution_ids = {
+            solution["id"] for solution in
+            await db_manager.db.solutions.find({"challenge_id": challenge["id"]}, {"id": 1}).to_list(None)
+        }
+        solutions_archived = votes_archived = 0
+        while True:
+            votes = await ArchiveService._move("votes", {"solution_id": {"$in": list(solution_ids)}})
+            solutions = await ArchiveService._move("solutions", {"challenge_id": challenge["id"]})
+            solution_ids.update(solution["id"] for solution in solutions)
+            votes_archived += len(votes)
+            solutions_archived += len(solutions)
+            if not votes and not solutions:
+                break
+        
+        await ArchiveService._copy("challenges", [{**challenge, "active": False, "status": "archived", "archived_at": datetime.utcnow()}])
+        await db_manager.db.challenges.delete_one({"_id": challenge["_id"]})
+        # A vote on a solution read before it was moved can still land
+        votes_archived += len(await ArchiveService._move("votes", {"solution_id": {"$in": list(solution_ids)}}))
+        
+        return {"solutions": solutions_archived, "votes": votes_archived}
+    
+    @staticmethod
+    async def run() -> Dict[str, int]:
+        """Archive up to CHALLENGES_PER_RUN eligible challenges, oldest first"""
+        challenges = await db_manager.db.challenges.find(ArchiveService.eligible_filter()) \
+            .sort("created_at", 1).limit(ArchiveService.CHALLENGES_PER_RUN).to_list(None)
+        
+        report = {"challenges": 0, "solutions": 0, "votes": 0}
+        for challenge in challenges:
+            moved = await ArchiveService.archive_challenge(challenge)
+            report["challenges"] += 1
+            report["solutions"] += moved["solutions"]
+            report["votes"] += moved["votes"]
+        
+        if report["challenges"]:
+            collection_versions.bump("challenges", "solutions", "votes")
+            metrics.increment("archived_challenges", report["challenges"])
+            logger.info(f"Archived to cold tier: {report}")
+        return report
+    
+    @staticmethod
+    async def archived_counts() -> Dict[str, int]:
+        if not db_manager.connected:
+            # The memory storage backend has no cold tier
+            return dict.fromkeys(ArchiveService.TIERS, 0)
+        counts = await asyncio.gather(*(
+            db_manager.db[archive].estimated_document_count() for archive in ArchiveService.TIERS.values()
+        ))
+        return dict(zip(ArchiveService.TIERS, counts))
+    
+    @staticmethod
+    async def find_across_tiers(
+        collection: str,
+        query: Dict[str, Any],
+        sort_field: str,
+        skip: int,
+        limit: int
+    ) -> List[dict]:
+        """Query the hot and cold tier of `collection` as one result set, sorted descending"""
+        hot, cold = await asyncio.gather(
+            db_manager.db[collection].find(query, max_time_ms=max_time_ms()).sort(sort_field, -1).limit(skip + limit).to_list(None),
+            db_manager.db[ArchiveService.TIERS[collection]].find(query, max_time_ms=max_time_ms()).sort(sort_field, -1).limit(skip + limit).to_list(None)
+        )
+        # A challenge caught mid-archival can briefly exist in both tiers
+        merged = {doc["id"]: doc for doc in cold}
+        merged.update({doc["id"]: doc for doc in hot})
+        ordered = sorted(merged.values(), key=lambda doc: doc.get(sort_field) or 0, reverse=True)
+        return ordered[skip:skip + limit]
+
+archive_scheduler = PeriodicTask(
+    "archive",
+    float(os.environ.get('ARCHIVE_INTERVAL', 3600)),
+    ArchiveService.run
+)
+
+# Deadlines
+class DeadlineService:
+    """Keep challenge deadlines typed and expire challenges past them.
+    
+    A deadline is a date: the challenge stays active through that whole
+    (UTC) day and is expired in bulk by a periodic task afterwards. An
+    expired challenge is inactive, so submit_solution and vote_on_solution
+    reject it with 400, but stays in the hot tier until ArchiveService
+    moves it.
+    """
+    
+    @staticmethod
+    def today() -> datetime:
+        now = datetime.utcnow()
+        return datetime(now.year, now.month, now.day)
+    
+    @staticmethod
+    async def migrate():
+        """Convert deadlines stored as strings into dates and give challenges a status"""
+        now = datetime.utcnow()
+        await db_manager.db.challenges.update_many(
+            {"active": False, "status": {"$exists": False}},
+            {"$set": {"status": "expired"}}
+        )
+        await db_manager.db.challenges.update_many(
+            {"status": "expired", "deactivated_at": {"$exists": False}},
+            {"$set": {"deactivated_at": now}}
+        )
+        await db_manager.db.challenges_archive.update_many(
+            {"status": {"$exists": False}}, {"$set": {"status": "archived"}}
+        )
+        
+        for collection in ("challenges", "challenges_archive"):
+            operations = []
+            async for doc in db_manager.db[collection].find({"deadline": {"$type": "string"}}, {"_id": 1, "deadline": 1}):
+                try:
+                    deadline = parse_deadline(doc["deadline"])
+                except ValueError:
+                    logger.warning(f"Dropping unparseable deadline {doc['deadline']!r} on {collection} {doc['_id']}")
+                    deadline = None
+                operations.append(UpdateOne({"_id": doc["_id"], "deadline": doc["deadline"]}, {"$set": {"deadline": deadline}}))
+            
+            for start in range(0, len(operations), 1000):
+                await db_manager.db[collection].bulk_write(operations[start:start + 1000], ordered=False)
+            if operations:
+                logger.info(f"Migrated {len(operations)} string deadlines in {collection}")
+    
+    @staticmethod
+    async def expire() -> int:
+        """Expire every active challenge whose deadline day has passed"""
+        expired = await storage.challenges.expire(DeadlineService.today(), datetime.utcnow())
+        if expired:
+            collection_versions.bump("challenges")
+            if event_broker.local_publish:
+                PushNotifier.stats_delta(total_challenges=-expired)
+            metrics.increment("challenges_expired", expired)
+            logger.info(f"Expired {expired} challenges")
+        return expired
+
+expiry_scheduler = PeriodicTask(
+    "challenge-expiry",
+    float(os.environ.get('EXPIRY_INTERVAL', 300)),
+    DeadlineService.expire
+)
+
+# Per-user voted-set index
+class VotedIndex:
+    """Which solutions each user has voted for, kept in memory.
+    
+    A user's set is loaded from the vote repository on first use and
+    updated by the vote write path, so duplicate-vote checks and "have I
+    voted" queries are answered without touching Mongo. Sets are evicted
+    least-recently-used first. Votes accepted by other workers are folded
+    in by `sync`, which runs every SYNC_INTERVAL seconds once the votes
+    collection version moves and reads the votes created since the last
+    sync (with SYNC_OVERLAP to absorb clock skew between workers). A vote
+    the outbox worker inserts late, after its request stopped, keeps its
+    original created_at and may be missed by other workers' syncs. In
+    either window the unique (user_id, solution_id) index on votes remains
+    the authority and rejects duplicates.
+    """
+    
+    MAX_USERS = int(os.environ.get('VOTED_INDEX_MAX_USERS', 50000))
+    SYNC_INTERVAL = 1.0
+    SYNC_OVERLAP = timedelta(seconds=10)
+    
+    def __init__(self):
+        self._sets: "OrderedDict[str, set]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._synced_version: Optional[int] = None
+        self._synced_at = datetime.utcnow()
+    
+    async def voted(self, user_id: str) -> set:
+        """Solution ids voted by `user_id`, loading them on first access"""
+        voted = self._sets.get(user_id)
+        if voted is not None:
+            self._sets.move_to_end(user_id)
+            return voted
+        
+        # Concurrent first accesses for the same user share one query
+        loading = self._loading.get(user_id)
+        if loading is not None:
+            return await asyncio.shield(loading)
+        
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = loading
+        try:
+            voted = await storage.votes.solution_ids_for_user(user_id)
+            self._store(user_id, voted)
+            loading.set_result(voted)
+            return voted
+        except Exception as e:
+            loading.set_exception(e)
+            raise
+        finally:
+            del self._loading[user_id]
+    
+    async def has_voted(self, user_id: str, solution_id: str) -> bool:
+        return solution_id in await self.voted(user_id)
+    
+    def record(self, user_id: str, solution_id: str):
+        """Add a vote accepted by the write path to a warm set"""
+        voted = self._sets.get(user_id)
+        if voted is not None:
+            voted.add(solution_id)
+    
+    def _store(self, user_id: str, voted: set):
+        self._sets[user_id] = voted
+        if len(self._sets) > self.MAX_USERS:
+            self._sets.popitem(last=False)
+    
+    async def sync(self):
+        """Fold votes cast through other workers into the warm sets"""
+        version = collection_versions.get("votes")
+        if version == self._synced_version:
+            return
+        started = datetime.utcnow()
+        if self._sets:
+            cursor = db_manager.db.votes.find(
+                {"created_at": {"$gte": self._synced_at - self.SYNC_OVERLAP}},
+                {"_id": 0, "user_id": 1, "solution_id": 1}
+            )
+            async for vote in cursor:
+                self.record(vote["user_id"], vote["solution_id"])
+        self._synced_version = version
+        self._synced_at = started
+
+voted_index = VotedIndex()
+
+voted_index_sync = PeriodicTask("voted-index-sync", VotedIndex.SYNC_INTERVAL, voted_index.sync)
+
+# Known-challenge cache
+class ChallengeDirectory:
+    """Title and open state of existing challenges, used to validate
+    solution submissions and votes.
+    
+    Entries are tied to the version of the challenges collection: expiry
+    and archiving, the only paths that close or remove challenges, bump
+    that version, so any change drops the whole directory and it refills
+    on demand. Misses
+    are not cached, so a challenge created on another worker is found on
+    its first submission.
+    """
+    
+    MAX_ENTRIES = int(os.environ.get('CHALLENGE_DIRECTORY_MAX_ENTRIES', 10000))
+    
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[str, bool]]" = OrderedDict()
+        self._version: Optional[int] = None
+    
+    def _current(self) -> int:
+        version = collection_versions.get("challenges")
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        return version
+    
+    async def lookup(self, challenge_id: str) -> Optional[Tuple[str, bool]]:
+        """(title, active) of the challenge, or None if it does not exist"""
+        version = self._current()
+        entry = self._entries.get(challenge_id)
+        if entry is not None:
+            self._entries.move_to_end(challenge_id)
+            return entry
+        
+        challenge = await storage.challenges.get(challenge_id)
+        if not challenge:
+            return None
+        entry = (challenge["title"], challenge.get("active", True))
+        if self._current() == version:
+            self._store(challenge_id, entry)
+        return entry
+    
+    def add(self, challenge: dict):
+        """Record a challenge created by this worker; call after the version bump"""
+        self._current()
+        self._store(challenge["id"], (challenge["title"], challenge.get("active", True)))
+    
+    def _store(self, challenge_id: str, entry: Tuple[str, bool]):
+        self._entries[challenge_id] = entry
+        if len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+challenge_directory = ChallengeDirectory()
+
+# Admin dashboard aggregation
+class AdminDashboardService:
+    """Build admin analytics with one $facet aggregation per collection.
+    
+    Each facet pipeline runs server-side over a single scan, and the four
+    collection aggregations are issued concurrently.
+    """
+    
+    TOP_N = 5
+    
+    @staticmethod
+    async def _first(cursor) -> dict:
+        results = await cursor.to_list(1)
+        return results[0] if results else {}
+    
+    @staticmethod
+    def count(facet: dict, name: str) -> int:
+        rows = facet.get(name) or []
+        return rows[0]["n"] if rows else 0
+    
+    @staticmethod
+    @single_flight
+    async def collect(page_size: int = 0) -> Dict[str, dict]:
+        """Run the facet aggregations, including first pages when page_size > 0"""
+        top_n = AdminDashboardService.TOP_N
+        
+        def page(sort_field: str) -> List[dict]:
+            return [
+                {"$sort": {sort_field: -1}},
+                {"$limit": page_size},
+                {"$project": {"_id": 0, "password_hash": 0}}
+            ]
+        
+        users_facet = {
+            "by_type": [{"$group": {"_id": "$type", "n": {"$sum": 1}}}],
+            "with_expectations": [
+                {"$match": {"expectations": {"$exists": True, "$ne": None}}},
+                {"$count": "n"}
+            ],
+            "recent": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": top_n},
+                {"$project": {"_id": 0, "name": 1, "type": 1}}
+            ],
+            "total": [{"$count": "n"}]
+        }
+        challenges_facet = {
+            "by_active": [{"$group": {"_id": "$active", "n": {"$sum": 1}}}],
+            "recent": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": top_n},
+                {"$project": {"_id": 0, "title": 1, "creator_name": 1}}
+            ],
+            "total": [{"$count": "n"}]
+        }
+        solutions_facet = {
+            "top": [
+                {"$sort": {"votes": -1}},
+                {"$limit": top_n},
+                {"$project": {"_id": 0, "author_name": 1, "votes": 1}}
+            ],
+            "total": [{"$count": "n"}]
+        }
+        if page_size > 0:
+            users_facet["page"] = page("created_at")
+            challenges_facet["page"] = page("created_at")
+            solutions_facet["page"] = page("votes")
+        
+        users, challenges, solutions, total_votes, archived = await asyncio.gather(
+            AdminDashboardService._first(db_manager.db.users.aggregate([{"$facet": users_facet}], **time_limit())),
+            AdminDashboardService._first(db_manager.db.challenges.aggregate([{"$facet": challenges_facet}], **time_limit())),
+            AdminDashboardService._first(db_manager.db.solutions.aggregate([{"$facet": solutions_facet}], **time_limit())),
+            db_manager.db.votes.estimated_document_count(),
+            ArchiveService.archived_counts()
+        )
+        return {
+            "users": users,
+            "challenges": challenges,
+            "solutions": solutions,
+            "total_votes": total_votes,
+            "archived": archived
+        }
+    
+    @staticmethod
+    def detailed_stats(facets: Dict[str, dict]) -> Dict[str, Any]:
+        """Shape facet results like the /admin/detailed-stats response"""
+        users, challenges, solutions = facets["users"], facets["challenges"], facets["solutions"]
+        by_type = {row["_id"]: row["n"] for row in users.get("by_type", [])}
+        by_active = {row["_id"]: row["n"] for row in challenges.get("by_active", [])}
+        
+        archived = facets["archived"]
+        
+        return {
+            "active_challenges": by_active.get(True, 0),
+            "inactive_challenges": by_active.get(False, 0) + archived["challenges"],
+            "archived_challenges": archived["challenges"],
+            "total_solutions": AdminDashboardService.count(solutions, "total") + archived["solutions"],
+            "students": by_type.get("aluno", 0),
+            "professors": by_type.get("professor", 0),
+            "companies": by_type.get("empresa", 0),
+            "admins": by_type.get("admin", 0),
+            "total_votes": facets["total_votes"] + archived["votes"],
+            "users_with_expectations": AdminDashboardService.count(users, "with_expectations"),
+            "top_solutions": [
+                {"title": f"Solution by {s['author_name']}", "votes": s["votes"]}
+                for s in solutions.get("top", [])
+            ],
+            "recent_users": users.get("recent", []),
+            "recent_challenges": [
+                {"title": c["title"], "creator": c["creator_name"]}
+                for c in challenges.get("recent", [])
+            ]
+        }
+
+# Bulk import
+class BulkImporter(ABC):
+    """Stream NDJSON or CSV records into a collection in validated chunks.
     
-    # Predefined keywords for analysis
-    COMPANY_KEYWORDS = {
-        'adaptabilidade': ['adaptabilidade', 'adaptação', 'flexibilidade', 'mudança'],
-        'pensamento_critico': ['pensamento crítico', 'crítico', 'análise', 'analítico'],
-        'competencias_digitais': ['digital', 'tecnologia', 'programação', 'tech', 'dados'],
-        'trabalho_equipe': ['equipe', 'colaboração', 'time', 'colaborativo'],
-        'comunicacao': ['comunicação', 'comunicar', 'apresentação'],
-        'criatividade': ['criatividade', 'criativo', 'inovação', 'inovador'],
-        'inteligencia_emocional': ['emocional', 'relacionamento', 'interpessoal'],
-        'diversidade': ['diversidade', 'inclusão', 'cultural'],
-        'aprendizado': ['aprendizado', 'desenvolvimento', 'crescimento'],
-        'etica': ['ética', 'responsabilidade', 'valores']
-    }
+    The request body is parsed as it arrives. Every CHUNK_SIZE records are
+    validated, prepared and written with one unordered insert_many, so a
+    bad row only costs its own entry in the error report. Subclasses set
+    `model` and implement `prepare`, `insert` and `finish`.
+    """
     
-    STUDENT_KEYWORDS = {
-        'beneficios': ['benefícios', 'saúde', 'plano', 'vale'],
-        'flexibilidade': ['flexível', 'remoto', 'horário', 'home office'],
-        'crescimento': ['crescimento', 'desenvolvimento', 'carreira'],
-        'ambiente_inclusivo': ['inclusivo', 'diverso', 'acolhedor'],
-        'tecnologia': ['tecnologia', 'inovação', 'moderno'],
-        'proposito': ['propósito', 'social', 'sustentabilidade'],
-        'feedback': ['feedback', 'reconhecimento', 'valorização'],
-        'cultura': ['cultura', 'ambiente', 'clima'],
-        'colaboracao': ['colaborativo', 'equipe', 'participativo'],
-        'estabilidade': ['estabilidade', 'segurança', 'permanência']
-    }
+    CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+    MAX_REPORTED_ERRORS = 1000
+    model: Any = None
     
-    @staticmethod
-    def analyze_text(text: str, keywords_dict: dict) -> dict:
-        """Analyze text and return keyword matches with percentages"""
-        if not text:
-            return {}
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+    
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < self.MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+    
+    async def run(self, request: Request) -> Dict[str, Any]:
+        chunk: List[Tuple[int, dict]] = []
+        async for row, record, error in self.records(request):
+            self.received += 1
+            if error:
+                self.fail(row, error)
+                continue
+            chunk.append((row, record))
+            if len(chunk) >= self.CHUNK_SIZE:
+                await self.flush(chunk)
+                chunk = []
+        await self.flush(chunk)
+        await self.finish()
         
-        text_lower = text.lower()
-        results = {}
-        total_matches = 0
-        
-        for category, keywords in keywords_dict.items():
-            matches = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    matches += 1
-            
-            if matches > 0:
-                results[category] = min(matches * 20, 100)  # Cap at 100%
-                total_matches += matches
+        return {
+            "received": self.received,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+    
+    async def flush(self, chunk: List[Tuple[int, dict]]):
+        valid = []
+        for row, record in chunk:
+            try:
+                valid.append((row, self.model(**record)))
+            except ValidationError as e:
+                self.fail(row, "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                ))
         
-        return results
+        prepared = await self.prepare(valid)
+        if not prepared:
+            return
+        
+        rejected = await self.insert([document for _, document in prepared])
+        for index, error in rejected.items():
+            self.fail(prepared[index][0], error)
+        self.imported += len(prepared) - len(rejected)
+        await self.inserted([document for index, (_, document) in enumerate(prepared) if index not in rejected])
+    
+    @abstractmethod
+    async def prepare(self, rows: List[Tuple[int, Any]]) -> List[Tuple[int, dict]]:
+        """Turn validated models into documents, reporting rows it rejects"""
+    
+    @abstractmethod
+    async def insert(self, documents: List[dict]) -> Dict[int, str]:
+        """Write the documents, returning the index and error of each one rejected"""
+    
+    async def inserted(self, documents: List[dict]):
+        """Called with the documents of each chunk that were written"""
+    
+    async def finish(self):
+        """Called once after the last chunk"""
     
     @staticmethod
-    async def generate_matching_analysis() -> dict:
-        """Generate comprehensive matching analysis"""
-        try:
-            # Get all users with expectations
-            users_cursor = db_manager.db.users.find({"expectations": {"$exists": True, "$ne": None}})
-            users = await users_cursor.to_list(length=1000)
-            
-            company_expectations = []
-            student_expectations = []
-            
-            # Separate by type
-            for user in users:
-                if user.get('expectations'):
-                    if user['type'] == 'empresa':
-                        company_expectations.append(user['expectations'])
-                    elif user['type'] == 'aluno':
-                        student_expectations.append(user['expectations'])
-            
-            # Analyze company expectations
-            company_analysis = {}
-            for text in company_expectations:
-                analysis = MatchingService.analyze_text(text, MatchingService.COMPANY_KEYWORDS)
-                for category, score in analysis.items():
-                    if category not in company_analysis:
-                        company_analysis[category] = []
-                    company_analysis[category].append(score)
-            
-            # Analyze student expectations
-            student_analysis = {}
-            for text in student_expectations:
-                analysis = MatchingService.analyze_text(text, MatchingService.STUDENT_KEYWORDS)
-                for category, score in analysis.items():
-                    if category not in student_analysis:
-                        student_analysis[category] = []
-                    student_analysis[category].append(score)
-            
-            # Calculate averages and format results
-            company_results = []
-            for category, scores in company_analysis.items():
-                avg_score = sum(scores) / len(scores) if scores else 0
-                formatted_category = category.replace('_', ' ').title()
-                company_results.append({
-                    'expectation': formatted_category,
-                    'percentage': round(avg_score, 1)
-                })
-            
-            student_results = []
-            for category, scores in student_analysis.items():
-                avg_score = sum(scores) / len(scores) if scores else 0
-                formatted_category = category.replace('_', ' ').title()
-                student_results.append({
-                    'expectation': formatted_category,
-                    'percentage': round(avg_score, 1)
-                })
-            
-            # Sort by percentage
-            company_results.sort(key=lambda x: x['percentage'], reverse=True)
-            student_results.sort(key=lambda x: x['percentage'], reverse=True)
-            
-            # Calculate overall compatibility
-            total_compatibility = 0
-            matches_count = 0
-            
-            if company_results and student_results:
-                total_compatibility = (sum(r['percentage'] for r in company_results[:5]) + 
-                                    sum(r['percentage'] for r in student_results[:5])) / 10
-                matches_count = min(len(company_results), len(student_results))
-            
-            # Generate top matches
-            top_matches = []
-            if matches_count > 0:
-                for i in range(min(3, matches_count)):
-                    match_score = (company_results[i]['percentage'] + 
-                                 (student_results[i]['percentage'] if i < len(student_results) else 0)) / 2
-                    
-                    top_matches.append({
-                        'score': round(match_score, 1),
-                        'commonExpectations': f"{company_results[i]['expectation']} & Ambiente Profissional"
-                    })
-            
-            return {
-                'totalMatches': round(total_compatibility, 1),
-                'companies': len(company_expectations),
-                'students': len(student_expectations),
-                'companyExpectations': company_results[:8],
-                'studentExpectations': student_results[:8],
-                'topMatches': top_matches
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating matching analysis: {e}")
-            return {
-                'totalMatches': 0,
-                'companies': 0,
-                'students': 0,
-                'companyExpectations': [],
-                'studentExpectations': [],
-                'topMatches': []
-            }
+    async def records(request: Request):
+        """Yield (row, record, error) for each NDJSON line or CSV record of the body"""
+        content_type = request.headers.get("content-type", "")
+        lines = BulkImporter._lines(request)
+        if "csv" in content_type:
+            parse = BulkImporter._csv_records(lines)
+        else:
+            parse = BulkImporter._ndjson_records(lines)
+        async for item in parse:
+            yield item
+    
+    @staticmethod
+    async def _lines(request: Request):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        async for chunk in request.stream():
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+    
+    @staticmethod
+    async def _ndjson_records(lines):
+        row = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "Each line must be a JSON object"
+                continue
+            yield row, record, None
+    
+    @staticmethod
+    async def _csv_records(lines):
+        # A record continues onto the next line while its quotes are unbalanced
+        header = None
+        row = 0
+        pending = ""
+        async for line in lines:
+            line = line.rstrip("\r")
+            pending = f"{pending}\n{line}" if pending else line
+            if pending.count('"') % 2:
+                continue
+            text, pending = pending, ""
+            if not text.strip():
+                continue
+            values = next(csv.reader([text]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            # Empty cells mean "not provided"
+            yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+        if pending:
+            yield row + 1, None, "Unterminated quoted field"
+
+class UserImporter(BulkImporter):
+    model = UserCreate
+    
+    def __init__(self):
+        super().__init__()
+        self.seen_emails: set = set()
+    
+    async def prepare(self, rows: List[Tuple[int, UserCreate]]) -> List[Tuple[int, dict]]:
+        existing = await storage.users.existing_emails([user_data.email for _, user_data in rows])
+        accepted = []
+        for row, user_data in rows:
+            if user_data.email in existing or user_data.email in self.seen_emails:
+                self.fail(row, "Email already registered")
+                continue
+            self.seen_emails.add(user_data.email)
+            accepted.append((row, user_data))
+        
+        # Hash in the analytics worker processes, off the event loop and its GIL
+        hashes = [
+            password_hash
+            for chunk in await analytics_pool.map_chunks(hash_passwords, [user_data.password for _, user_data in accepted])
+            for password_hash in chunk
+        ]
+        return [
+            (row, build_user(user_data, password_hash).dict())
+            for (row, user_data), password_hash in zip(accepted, hashes)
+        ]
+    
+    async def insert(self, documents: List[dict]) -> Dict[int, str]:
+        return await storage.users.insert_many(documents)
+    
+    async def inserted(self, documents: List[dict]):
+        await OutboxService.append_many("user_registered", [
+            {"user_id": user["id"], "user_type": user["type"], "has_expectations": bool(user["expectations"])}
+            for user in documents
+        ])
+    
+    async def finish(self):
+        if not self.imported:
+            return
+        collection_versions.bump("users")
+        if event_broker.local_publish:
+            PushNotifier.stats_delta(total_users=self.imported)
+
+class ChallengeImporter(BulkImporter):
+    model = ChallengeCreate
+    
+    def __init__(self, creator: UserResponse):
+        super().__init__()
+        self.creator = creator
+    
+    async def prepare(self, rows: List[Tuple[int, ChallengeCreate]]) -> List[Tuple[int, dict]]:
+        return [(row, build_challenge(challenge_data, self.creator).dict()) for row, challenge_data in rows]
+    
+    async def insert(self, documents: List[dict]) -> Dict[int, str]:
+        return await storage.challenges.insert_many(documents)
+    
+    async def inserted(self, documents: List[dict]):
+        await OutboxService.append_many("challenge_created", [{"challenge_id": challenge["id"]} for challenge in documents])
+    
+    async def finish(self):
+        if not self.imported:
+            return
+        collection_versions.bump("challenges")
+        if event_broker.local_publish:
+            PushNotifier.stats_delta(total_challenges=self.imported)
 
 # API Endpoints with enhanced functionality
 
-@api_router.post("/register", response_model=UserResponse, summary="Register new user")
+@api_router.post("/register", response_model=UserResponse, summary="Register new user", dependencies=[Depends(rate_limit("register"))])
 @handle_exceptions
 async def register_user(user_data: UserCreate) -> UserResponse:
     """Register a new user with enhanced validation and expectations"""
     
-    # Check if email already exists
-    existing_user = await db_manager.db.users.find_one({"email": user_data.email})
-    if existing_user:
+    # Create new user
+    user_obj = build_user(user_data, SecurityUtils.hash_password(user_data.password))
+    
+    # Insert to database; the unique email index rejects existing addresses
+    try:
+        await storage.users.insert(user_obj.dict())
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=400, 
             detail="Email already registered. Please use a different email."
         )
+    collection_versions.bump("users")
+    if event_broker.local_publish:
+        PushNotifier.stats_delta(total_users=1)
     
-    # Create new user
-    user_dict = user_data.dict()
-    user_dict['password_hash'] = SecurityUtils.hash_password(user_data.password)
-    del user_dict['password']
-    
-    # Handle expectations properly
-    share_expectations = user_dict.pop('shareExpectations', False)
-    if not share_expectations or not user_dict.get('expectations'):
-        user_dict['expectations'] = None
-    
-    user_obj = User(**user_dict)
-    
-    # Insert to database
-    await db_manager.db.users.insert_one(user_obj.dict())
+    # Expectation analysis and activity rollups run in the outbox worker
+    await OutboxService.append("user_registered", {
+        "user_id": user_obj.id,
+        "user_type": user_obj.type,
+        "has_expectations": bool(user_obj.expectations)
+    })
     
     logger.info(f"New user registered: {user_obj.name} ({user_obj.type})")
     
     return UserResponse(**user_obj.dict())
 
-@api_router.post("/login", summary="User authentication")
+@api_router.post("/login", summary="User authentication", dependencies=[Depends(rate_limit("login"))])
 @handle_exceptions
 async def login_user(login_data: UserLogin) -> Dict[str, Any]:
     """Authenticate user and return access token"""
     
-    user_doc = await db_manager.db.users.find_one({"email": login_data.email})
+    user_doc = await storage.users.find_by_email(login_data.email)
     
     if not user_doc or not SecurityUtils.verify_password(login_data.password, user_doc['password_hash']):
         raise HTTPException(
@@ -650,21 +4575,16 @@ async def create_challenge(
         )
     
     # Auto-generate summary if not provided
-    challenge_dict = challenge_data.dict()
-    if not challenge_dict.get('summary'):
-        # Create a summary from first 150 characters of description
-        description = challenge_dict['description']
-        challenge_dict['summary'] = description[:150] + "..." if len(description) > 150 else description
-    
-    challenge_dict.update({
-        'creator_id': current_user.id,
-        'creator_name': current_user.name
-    })
-    
-    challenge_obj = Challenge(**challenge_dict)
+    challenge_obj = build_challenge(challenge_data, current_user)
     
     # Insert to database
-    await db_manager.db.challenges.insert_one(challenge_obj.dict())
+    await storage.challenges.insert(challenge_obj.dict())
+    collection_versions.bump("challenges")
+    challenge_directory.add(challenge_obj.dict())
+    recommendation_service.add(challenge_obj.dict())
+    if event_broker.local_publish:
+        PushNotifier.stats_delta(total_challenges=1)
+    await OutboxService.append("challenge_created", {"challenge_id": challenge_obj.id})
     
     logger.info(f"New challenge created: '{challenge_obj.title}' by {current_user.name}")
     
@@ -672,11 +4592,18 @@ async def create_challenge(
 
 @api_router.get("/challenges", response_model=List[Challenge], summary="List all challenges")
 @handle_exceptions
-async def list_challenges() -> List[Challenge]:
+@result_cache.cached(tags=("challenges",), ttl=30, stale=300)
+async def list_challenges(
+    deadline_before: Optional[date] = Query(None, description="Only challenges due on or before this date"),
+    deadline_after: Optional[date] = Query(None, description="Only challenges due on or after this date")
+) -> List[Challenge]:
     """Get all active challenges"""
     
-    challenges_cursor = db_manager.db.challenges.find({"active": True}).sort("created_at", -1).limit(100)
-    challenges = await challenges_cursor.to_list(length=100)
+    challenges = await storage.challenges.list_active(
+        100,
+        deadline_after=parse_deadline(deadline_after),
+        deadline_before=parse_deadline(deadline_before)
+    )
     
     return [Challenge(**challenge) for challenge in challenges]
 
@@ -685,13 +4612,34 @@ async def list_challenges() -> List[Challenge]:
 async def get_challenge_by_id(challenge_id: str) -> Challenge:
     """Get specific challenge by ID"""
     
-    challenge_doc = await db_manager.db.challenges.find_one({"id": challenge_id})
+    challenge_doc = await storage.challenges.get(challenge_id)
     
     if not challenge_doc:
         raise HTTPException(status_code=404, detail="Challenge not found")
     
     return Challenge(**challenge_doc)
 
+@api_router.get("/challenges/{challenge_id}/full", response_model=ChallengeDetail, summary="Get challenge with solutions")
+@handle_exceptions
+async def get_challenge_full(
+    challenge_id: str,
+    current_user: Optional[UserResponse] = Depends(AuthService.get_optional_user)
+) -> ChallengeDetail:
+    """Get a challenge, its solutions ordered by votes, author points and the viewer's votes"""
+    
+    challenge_doc = await storage.challenges.get_with_solutions(challenge_id, 100)
+    if not challenge_doc:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    
+    # The viewer's votes come from the in-memory voted index
+    voted = await voted_index.voted(current_user.id) if current_user else set()
+    solutions = [
+        SolutionView(**solution, voted_by_me=solution["id"] in voted)
+        for solution in challenge_doc.pop("solutions")
+    ]
+    
+    return ChallengeDetail(challenge=Challenge(**challenge_doc), solutions=solutions)
+
 @api_router.post("/solutions", response_model=Solution, summary="Submit solution")
 @handle_exceptions
 async def submit_solution(
@@ -700,22 +4648,13 @@ async def submit_solution(
 ) -> Solution:
     """Submit a solution to a challenge"""
     
-    # Verify challenge exists
-    challenge_doc = await db_manager.db.challenges.find_one({"id": solution_data.challenge_id})
-    if not challenge_doc:
+    # Verify challenge exists and is still open
+    challenge = await challenge_directory.lookup(solution_data.challenge_id)
+    if challenge is None:
         raise HTTPException(status_code=404, detail="Challenge not found")
-    
-    # Check if user already submitted a solution for this challenge
-    existing_solution = await db_manager.db.solutions.find_one({
-        "challenge_id": solution_data.challenge_id,
-        "author_id": current_user.id
-    })
-    
-    if existing_solution:
-        raise HTTPException(
-            status_code=400,
-            detail="You have already submitted a solution for this challenge"
-        )
+    challenge_title, challenge_active = challenge
+    if not challenge_active:
+        raise HTTPException(status_code=400, detail="This challenge is closed")
     
     # Create solution
     solution_dict = solution_data.dict()
@@ -726,10 +4665,24 @@ async def submit_solution(
     
     solution_obj = Solution(**solution_dict)
     
-    # Insert to database
-    await db_manager.db.solutions.insert_one(solution_obj.dict())
+    # Insert to database; the unique (challenge_id, author_id) index rejects resubmissions
+    try:
+        await storage.solutions.insert(solution_obj.dict())
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="You have already submitted a solution for this challenge"
+        )
+    collection_versions.bump("solutions")
+    if event_broker.local_publish:
+        PushNotifier.stats_delta(total_solutions=1)
+        PushNotifier.solution_created(solution_obj.dict())
+    await OutboxService.append("solution_submitted", {
+        "solution_id": solution_obj.id,
+        "challenge_id": solution_obj.challenge_id
+    })
     
-    logger.info(f"New solution submitted by {current_user.name} for challenge: {challenge_doc['title']}")
+    logger.info(f"New solution submitted by {current_user.name} for challenge: {challenge_title}")
     
     return solution_obj
 
@@ -738,8 +4691,7 @@ async def submit_solution(
 async def get_challenge_solutions(challenge_id: str) -> List[Solution]:
     """Get all solutions for a specific challenge, ordered by votes"""
     
-    solutions_cursor = db_manager.db.solutions.find({"challenge_id": challenge_id}).sort("votes", -1).limit(100)
-    solutions = await solutions_cursor.to_list(length=100)
+    solutions = await storage.solutions.top_by_votes(100, challenge_id)
     
     return [Solution(**solution) for solution in solutions]
 
@@ -748,12 +4700,11 @@ async def get_challenge_solutions(challenge_id: str) -> List[Solution]:
 async def get_all_solutions() -> List[Solution]:
     """Get all solutions ordered by votes"""
     
-    solutions_cursor = db_manager.db.solutions.find().sort("votes", -1).limit(100)
-    solutions = await solutions_cursor.to_list(length=100)
+    solutions = await storage.solutions.top_by_votes(100)
     
     return [Solution(**solution) for solution in solutions]
 
-@api_router.post("/solutions/{solution_id}/vote", summary="Vote on solution")
+@api_router.post("/solutions/{solution_id}/vote", summary="Vote on solution", dependencies=[Depends(rate_limit("vote"))])
 @handle_exceptions
 async def vote_on_solution(
     solution_id: str,
@@ -762,7 +4713,7 @@ async def vote_on_solution(
     """Vote on a solution with enhanced validation"""
     
     # Verify solution exists
-    solution_doc = await db_manager.db.solutions.find_one({"id": solution_id})
+    solution_doc = await storage.solutions.get(solution_id)
     if not solution_doc:
         raise HTTPException(status_code=404, detail="Solution not found")
     
@@ -773,117 +4724,266 @@ async def vote_on_solution(
             detail="You cannot vote on your own solution"
         )
     
-    # Check for duplicate votes
-    existing_vote = await db_manager.db.votes.find_one({
-        "user_id": current_user.id,
-        "solution_id": solution_id
-    })
+    # Votes close with the challenge
+    challenge = await challenge_directory.lookup(solution_doc['challenge_id'])
+    if challenge is None or not challenge[1]:
+        raise HTTPException(status_code=400, detail="This challenge is closed")
     
-    if existing_vote:
-        raise HTTPException(
-            status_code=400,
-            detail="You have already voted on this solution"
-        )
+    # Check for duplicate votes; the unique index catches votes cast through other workers
+    duplicate_vote = HTTPException(
+        status_code=400,
+        detail="You have already voted on this solution"
+    )
+    if await voted_index.has_voted(current_user.id, solution_id):
+        raise duplicate_vote
     
-    # Add vote
+    # The outbox event carries the vote and is written first, so the vote and
+    # its side effects commit in one write; the worker inserts the vote again
+    # if the insert below never happens. Vote count and author points are
+    # applied by the outbox worker
     vote_obj = Vote(user_id=current_user.id, solution_id=solution_id)
-    await db_manager.db.votes.insert_one(vote_obj.dict())
-    
-    # Update solution vote count
-    await db_manager.db.solutions.update_one(
-        {"id": solution_id},
-        {"$inc": {"votes": 1}}
-    )
+    event_id = await OutboxService.append("vote_cast", {
+        "solution_id": solution_id,
+        "challenge_id": solution_doc['challenge_id'],
+        "author_id": solution_doc['author_id'],
+        "voter_id": current_user.id,
+        "points": VOTE_POINTS,
+        "vote": vote_obj.dict()
+    })
+    try:
+        await storage.votes.insert(vote_obj.dict())
+    except DuplicateKeyError:
+        voted_index.record(current_user.id, solution_id)
+        if event_id is not None:
+            await OutboxService.discard(event_id)
+        raise duplicate_vote
+    voted_index.record(current_user.id, solution_id)
+    collection_versions.bump("votes")
+    if event_broker.local_publish:
+        PushNotifier.stats_delta(total_votes=1)
     
-    # Award points to solution author (10 points per vote)
-    await db_manager.db.users.update_one(
-        {"id": solution_doc['author_id']},
-        {"$inc": {"points": 10}}
-    )
+    if event_id is None:
+        # No outbox on the memory storage backend; apply the counters in-request
+        solution = await storage.solutions.add_votes(solution_id, 1)
+        author = await storage.users.add_points(solution_doc['author_id'], VOTE_POINTS)
+        collection_versions.bump("solutions", "users")
+        PushNotifier.solution_votes(solution)
+        if author:
+            PushNotifier.user_points(author)
     
     logger.info(f"Vote cast by {current_user.name} on solution by {solution_doc['author_name']}")
     
-    return {"message": "Vote successfully registered. Author awarded 10 points!"}
+    return {"message": f"Vote successfully registered. Author awarded {VOTE_POINTS} points!"}
+
+async def _solution_voters(solution_id: str, skip: int, limit: int) -> Tuple[int, List[dict]]:
+    """Vote count from the denormalized solutions.votes field plus one page of votes"""
+    solution_doc, votes = await asyncio.gather(
+        storage.solutions.get(solution_id),
+        storage.votes.for_solution(solution_id, skip, limit)
+    )
+    if not solution_doc:
+        raise HTTPException(status_code=404, detail="Solution not found")
+    return solution_doc.get("votes", 0), votes
 
 @api_router.get("/solutions/{solution_id}/votes", summary="Get solution vote details")
 @handle_exceptions
-async def get_solution_votes(solution_id: str) -> Dict[str, Any]:
+async def get_solution_votes(
+    solution_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000)
+) -> Dict[str, Any]:
     """Get vote details for a specific solution"""
     
-    votes_cursor = db_manager.db.votes.find({"solution_id": solution_id})
-    votes = await votes_cursor.to_list(length=1000)
+    total_votes, votes = await _solution_voters(solution_id, skip, limit)
     
     return {
         "solution_id": solution_id,
-        "total_votes": len(votes),
+        "total_votes": total_votes,
         "votes": [Vote(**vote) for vote in votes]
     }
 
+@api_router.get("/solutions/{solution_id}/voters", summary="List solution voters")
+@handle_exceptions
+async def list_solution_voters(
+    solution_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200)
+) -> Dict[str, Any]:
+    """Get one page of the users who voted on a solution, oldest vote first"""
+    
+    total_votes, votes = await _solution_voters(solution_id, skip, limit)
+    
+    return {
+        "solution_id": solution_id,
+        "total_votes": total_votes,
+        "skip": skip,
+        "limit": limit,
+        "has_more": skip + len(votes) < total_votes,
+        "voters": [{"user_id": vote["user_id"], "voted_at": vote["created_at"]} for vote in votes]
+    }
+
+@api_router.get("/profile/votes", summary="Get solutions voted by the current user")
+@handle_exceptions
+async def get_my_votes(current_user: UserResponse = Depends(AuthService.get_current_user)) -> Dict[str, Any]:
+    """Get the ids of every solution the current user has voted on"""
+    
+    voted = await voted_index.voted(current_user.id)
+    return {"user_id": current_user.id, "solution_ids": sorted(voted)}
+
 @api_router.get("/leaderboard", response_model=List[UserResponse], summary="Get user leaderboard")
 @handle_exceptions
+@result_cache.cached(tags=("users",), ttl=10, stale=60)
+@single_flight
 async def get_leaderboard() -> List[UserResponse]:
     """Get top users ranked by points"""
     
-    users_cursor = db_manager.db.users.find().sort("points", -1).limit(20)
-    users = await users_cursor.to_list(length=20)
+    users = await storage.users.top_by_points(20)
     
     return [UserResponse(**user) for user in users]
 
+@api_router.get("/leaderboard/{window}", response_model=List[LeaderboardEntry], summary="Get windowed leaderboard")
+@handle_exceptions
+async def get_windowed_leaderboard(
+    window: Literal["week", "month"],
+    periods: int = Query(1, ge=1, le=12, description="Number of recent weeks or months to merge"),
+    limit: int = Query(20, ge=1, le=100)
+) -> List[LeaderboardEntry]:
+    """Get top users by points earned in the current week or month"""
+    
+    return await PointsBuckets.leaderboard("global", window, periods, limit)
+
+@api_router.get("/challenges/{challenge_id}/leaderboard", response_model=List[LeaderboardEntry], summary="Get challenge leaderboard")
+@handle_exceptions
+async def get_challenge_leaderboard(
+    challenge_id: str,
+    window: str = Query("all", pattern=r'^(all|week|month)$'),
+    periods: int = Query(1, ge=1, le=12),
+    limit: int = Query(20, ge=1, le=100)
+) -> List[LeaderboardEntry]:
+    """Get top users by points earned from votes on one challenge"""
+    
+    return await PointsBuckets.leaderboard(f"challenge:{challenge_id}", window, periods, limit)
+
 @api_router.get("/stats", summary="Get platform statistics")
 @handle_exceptions
+@result_cache.cached(tags=("challenges", "solutions", "users", "votes"), ttl=10, stale=60)
+@single_flight
 async def get_platform_stats() -> Dict[str, int]:
     """Get comprehensive platform statistics"""
     
     # Run all counts concurrently for better performance
-    stats = await asyncio.gather(
-        db_manager.db.challenges.count_documents({"active": True}),
-        db_manager.db.solutions.count_documents({}),
-        db_manager.db.users.count_documents({}),
-        db_manager.db.votes.count_documents({})
+    stats, archived = await asyncio.gather(
+        asyncio.gather(
+            storage.challenges.count_active(),
+            storage.solutions.count(),
+            storage.users.count(),
+            storage.votes.count()
+        ),
+        ArchiveService.archived_counts()
     )
     
+    # Solutions and votes of archived challenges still count towards the totals
     return {
         "total_challenges": stats[0],
-        "total_solutions": stats[1],
+        "total_solutions": stats[1] + archived["solutions"],
         "total_users": stats[2],
-        "total_votes": stats[3]
+        "total_votes": stats[3] + archived["votes"]
     }
 
+@api_router.get("/recommendations/challenges", response_model=List[ChallengeRecommendation], summary="Get recommended challenges")
+@handle_exceptions
+async def recommend_challenges(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UserResponse = Depends(AuthService.get_current_user)
+) -> List[ChallengeRecommendation]:
+    """Get the active challenges whose text best matches the current user's expectations"""
+    
+    recommendations = await recommendation_service.recommend(current_user.dict(), limit)
+    return [ChallengeRecommendation(**challenge, score=score) for challenge, score in recommendations]
+
 @api_router.get("/matching-analysis", summary="Get matching analysis")
 @handle_exceptions
+@result_cache.cached(tags=("users", "taxonomy"), ttl=60, stale=600)
 async def get_matching_analysis() -> Dict[str, Any]:
     """Get comprehensive matching analysis between companies and students"""
     
     return await MatchingService.generate_matching_analysis()
 
+STREAM_TOPIC_PATTERN = re.compile(r"^(leaderboard|stats|solutions:[A-Za-z0-9-]+)$")
+
+@api_router.get("/stream", summary="Subscribe to live updates")
+async def stream_updates(topics: str = "leaderboard,stats") -> StreamingResponse:
+    """Server-Sent Events stream of coalesced vote, leaderboard and stats updates.
+    
+    `topics` is a comma separated list of `leaderboard`, `stats` and
+    `solutions:<challenge_id>`.
+    """
+    requested = tuple(dict.fromkeys(t.strip() for t in topics.split(',') if t.strip()))
+    if not requested or not all(STREAM_TOPIC_PATTERN.match(t) for t in requested):
+        raise HTTPException(status_code=400, detail="Invalid stream topics")
+    
+    if event_broker.subscriber_count >= EventBroker.MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many live subscribers. Please retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+    
+    subscriber = event_broker.subscribe(requested)
+    return StreamingResponse(
+        event_broker.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Admin endpoints
 @api_router.get("/admin/users", response_model=List[UserResponse], summary="Admin: List all users")
 @handle_exceptions
-async def admin_list_users(admin_user: UserResponse = Depends(require_admin)) -> List[UserResponse]:
+async def admin_list_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    admin_user: UserResponse = Depends(require_admin)
+) -> List[UserResponse]:
     """Admin only: Get all users with their expectations"""
     
-    users_cursor = db_manager.db.users.find().sort("created_at", -1).limit(1000)
-    users = await users_cursor.to_list(length=1000)
+    users_cursor = db_manager.db.users.find(max_time_ms=max_time_ms()).sort("created_at", -1).skip(skip).limit(limit)
+    users = await users_cursor.to_list(length=limit)
     
     return [UserResponse(**user) for user in users]
 
 @api_router.get("/admin/challenges", response_model=List[Challenge], summary="Admin: List all challenges")
 @handle_exceptions
-async def admin_list_challenges(admin_user: UserResponse = Depends(require_admin)) -> List[Challenge]:
+async def admin_list_challenges(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    include_archived: bool = Query(False, description="Also list archived challenges"),
+    admin_user: UserResponse = Depends(require_admin)
+) -> List[Challenge]:
     """Admin only: Get all challenges including inactive ones"""
     
-    challenges_cursor = db_manager.db.challenges.find().sort("created_at", -1).limit(1000)
-    challenges = await challenges_cursor.to_list(length=1000)
+    if include_archived:
+        challenges = await ArchiveService.find_across_tiers("challenges", {}, "created_at", skip, limit)
+    else:
+        challenges_cursor = db_manager.db.challenges.find(max_time_ms=max_time_ms()).sort("created_at", -1).skip(skip).limit(limit)
+        challenges = await challenges_cursor.to_list(length=limit)
     
     return [Challenge(**challenge) for challenge in challenges]
 
 @api_router.get("/admin/solutions", response_model=List[Solution], summary="Admin: List all solutions")
 @handle_exceptions
-async def admin_list_solutions(admin_user: UserResponse = Depends(require_admin)) -> List[Solution]:
+async def admin_list_solutions(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    include_archived: bool = Query(False, description="Also list solutions of archived challenges"),
+    admin_user: UserResponse = Depends(require_admin)
+) -> List[Solution]:
     """Admin only: Get all solutions with detailed information"""
     
-    solutions_cursor = db_manager.db.solutions.find().sort("votes", -1).limit(1000)
-    solutions = await solutions_cursor.to_list(length=1000)
+    if include_archived:
+        solutions = await ArchiveService.find_across_tiers("solutions", {}, "votes", skip, limit)
+    else:
+        solutions_cursor = db_manager.db.solutions.find(max_time_ms=max_time_ms()).sort("votes", -1).skip(skip).limit(limit)
+        solutions = await solutions_cursor.to_list(length=limit)
     
     return [Solution(**solution) for solution in solutions]
 
@@ -892,39 +4992,229 @@ async def admin_list_solutions(admin_user: UserResponse = Depends(require_admin)
 async def admin_detailed_stats(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
     """Admin only: Get comprehensive platform analytics"""
     
-    # Get detailed statistics
-    stats = await asyncio.gather(
-        db_manager.db.challenges.count_documents({"active": True}),
-        db_manager.db.challenges.count_documents({"active": False}),
-        db_manager.db.solutions.count_documents({}),
-        db_manager.db.users.count_documents({"type": "aluno"}),
-        db_manager.db.users.count_documents({"type": "professor"}),
-        db_manager.db.users.count_documents({"type": "empresa"}),
-        db_manager.db.users.count_documents({"type": "admin"}),
-        db_manager.db.votes.count_documents({}),
-        db_manager.db.users.count_documents({"expectations": {"$exists": True, "$ne": None}})
+    facets = await AdminDashboardService.collect()
+    return AdminDashboardService.detailed_stats(facets)
+
+@api_router.get("/admin/dashboard", summary="Admin: Dashboard in a single request")
+@handle_exceptions
+async def admin_dashboard(
+    page_size: int = Query(20, ge=1, le=200),
+    admin_user: UserResponse = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Admin only: Get detailed statistics and the first page of every listing"""
+    
+    facets = await AdminDashboardService.collect(page_size)
+    
+    def listing(name: str, model) -> Dict[str, Any]:
+        facet = facets[name]
+        total = AdminDashboardService.count(facet, "total")
+        return {
+            "items": [model(**doc) for doc in facet.get("page", [])],
+            "total": total,
+            "page_size": page_size,
+            "has_more": total > page_size
+        }
+    
+    return {
+        "users": listing("users", UserResponse),
+        "challenges": listing("challenges", Challenge),
+        "solutions": listing("solutions", Solution),
+        "detailed_stats": AdminDashboardService.detailed_stats(facets)
+    }
+
+TIMESERIES_MAX_DAYS = 3 * 366
+
+@api_router.get("/admin/timeseries", summary="Admin: Activity time series")
+@handle_exceptions
+async def admin_timeseries(
+    type: str = Query(..., pattern=r'^(registrations|challenges|solutions|votes)$'),
+    start: datetime = Query(..., description="First day (YYYY-MM-DD)"),
+    end: Optional[datetime] = Query(None, description="Last day (YYYY-MM-DD), defaults to today"),
+    interval: str = Query("day", pattern=r'^(day|week|month)$'),
+    breakdown: Optional[str] = Query(None, description="User type for registrations, challenge ID for solutions and votes"),
+    admin_user: UserResponse = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Admin only: Get activity counts per period, read from the daily rollups"""
+    
+    # Timestamps with an offset are compared with the naive UTC ones of the rollups
+    start = naive_utc(start)
+    end = naive_utc(end) if end else datetime.utcnow()
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days > TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {TIMESERIES_MAX_DAYS} days")
+    
+    return {
+        "type": type,
+        "interval": interval,
+        "breakdown": breakdown,
+        "points": await RollupService.series(type, start, end, interval, breakdown)
+    }
+
+@api_router.post("/admin/timeseries/backfill", summary="Admin: Rebuild activity rollups")
+@handle_exceptions
+async def admin_backfill_timeseries(
+    background_tasks: BackgroundTasks,
+    admin_user: UserResponse = Depends(require_admin)
+) -> Dict[str, str]:
+    """Admin only: Recompute the daily rollups before today from the source collections"""
+    
+    background_tasks.add_task(RollupService.backfill)
+    return {"message": "Activity rollup backfill started"}
+
+@api_router.post("/admin/ledger/compact", summary="Admin: Compact the points ledger")
+@handle_exceptions
+async def admin_compact_ledger(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Admin only: Fold settled ledger entries into snapshots and repair drifted counters"""
+    
+    return await PointsLedger.compact()
+
+@api_router.post("/admin/ledger/reconcile", summary="Admin: Reconcile votes with the ledger")
+@handle_exceptions
+async def admin_reconcile_votes(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, int]:
+    """Admin only: Replay votes whose points and counts were never applied"""
+    
+    return await VoteReconciler.run()
+
+@api_router.get("/admin/ledger/users/{user_id}", summary="Admin: Points history of a user")
+@handle_exceptions
+async def admin_user_ledger(
+    user_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    admin_user: UserResponse = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Admin only: Get the ledger entries that make up a user's points, newest first"""
+    
+    snapshot, entries = await asyncio.gather(
+        db_manager.db.ledger_snapshots.find_one({"_id": f"user:{user_id}"}, {"_id": 0, "total": 1}, max_time_ms=max_time_ms()),
+        db_manager.db.points_ledger.find({"user_id": user_id, "kind": "points"}, {"_id": 0}, max_time_ms=max_time_ms())
+            .sort("recorded_at", -1).skip(skip).limit(limit).to_list(limit)
+    )
+    
+    return {
+        "user_id": user_id,
+        "snapshot_total": snapshot["total"] if snapshot else 0,
+        "entries": entries
+    }
+
+@api_router.get("/admin/challenges/{challenge_id}", response_model=ChallengeDetail, summary="Admin: Get challenge from any tier")
+@handle_exceptions
+async def admin_get_challenge(
+    challenge_id: str,
+    admin_user: UserResponse = Depends(require_admin)
+) -> ChallengeDetail:
+    """Admin only: Get a live or archived challenge with its solutions"""
+    
+    for collection in ("challenges", "challenges_archive"):
+        challenge_doc = await db_manager.db[collection].find_one({"id": challenge_id})
+        if challenge_doc:
+            break
+    else:
+        raise HTTPException(status_code=404, detail="Challenge not found")
+    
+    solutions = await ArchiveService.find_across_tiers("solutions", {"challenge_id": challenge_id}, "votes", 0, 1000)
+    return ChallengeDetail(
+        challenge=Challenge(**challenge_doc),
+        solutions=[SolutionView(**solution) for solution in solutions]
+    )
+
+@api_router.post("/admin/archive", summary="Admin: Archive finished challenges")
+@handle_exceptions
+async def admin_run_archive(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, int]:
+    """Admin only: Move inactive and long-expired challenges to the cold tier now"""
+    
+    return await ArchiveService.run()
+
+@api_router.get("/admin/taxonomy", summary="Admin: Get the keyword taxonomy")
+@handle_exceptions
+async def admin_get_taxonomy(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Admin only: Get the keyword taxonomy used for expectation matching"""
+    matcher = taxonomy_service.matcher
+    return {"version": matcher.version, **matcher.taxonomy}
+
+@api_router.put("/admin/taxonomy", summary="Admin: Replace the keyword taxonomy")
+@handle_exceptions
+async def admin_update_taxonomy(
+    update: TaxonomyUpdate,
+    admin_user: UserResponse = Depends(require_admin)
+) -> Dict[str, Any]:
+    """Admin only: Store a new taxonomy version; stored analyses are re-scored in the background"""
+    doc = await taxonomy_service.update(
+        {"company": update.company, "student": update.student},
+        update.version,
+        admin_user.id
     )
+    if doc is None:
+        raise HTTPException(
+            status_code=409,
+            detail="The taxonomy was changed by someone else. Reload it and try again."
+        )
+    
+    logger.info(f"Keyword taxonomy updated to version {doc['version']} by {admin_user.name}")
+    return {"version": doc["version"], "company": doc["company"], "student": doc["student"]}
+
+@api_router.post("/admin/import/users", summary="Admin: Bulk import users")
+@handle_exceptions
+async def admin_import_users(request: Request, admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Admin only: Import users from an NDJSON (default) or CSV (text/csv) body.
+    
+    Rows are validated like /register; the report lists the rows that failed.
+    """
+    report = await UserImporter().run(request)
+    logger.info(f"Bulk user import by {admin_user.name}: {report['imported']} imported, {report['failed']} failed")
+    return report
+
+@api_router.post("/admin/import/challenges", summary="Admin: Bulk import challenges")
+@handle_exceptions
+async def admin_import_challenges(request: Request, admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Admin only: Import challenges, created by the calling admin, from an NDJSON or CSV body"""
+    report = await ChallengeImporter(admin_user).run(request)
+    logger.info(f"Bulk challenge import by {admin_user.name}: {report['imported']} imported, {report['failed']} failed")
+    return report
+
+@api_router.post("/admin/profile", summary="Admin: Profile this worker")
+@handle_exceptions
+async def admin_profile(
+    mode: Literal["sample", "cprofile"] = Query("sample", description="Stack sampling or deterministic cProfile"),
+    seconds: float = Query(10, gt=0, le=120, description="Maximum profiling time"),
+    requests: Optional[int] = Query(None, ge=1, le=100000, description="Stop after this many completed requests"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="Sampling interval (sample mode)"),
+    raw: bool = Query(False, description="Return a marshalled pstats dump instead of text (cprofile mode)"),
+    admin_user: UserResponse = Depends(require_admin)
+) -> Response:
+    """Admin only: Profile the worker that serves this request.
     
-    # Get top solutions
-    top_solutions = await db_manager.db.solutions.find().sort("votes", -1).limit(5).to_list(5)
+    Sample mode returns collapsed stacks for flamegraph.pl or speedscope;
+    cprofile mode returns pstats text, or with `raw` a dump for snakeviz or
+    flameprof. The response is sent when the session ends.
+    """
+    if profiler.session is not None:
+        raise HTTPException(status_code=409, detail="A profiling session is already running on this worker")
     
-    # Get recent activity
-    recent_users = await db_manager.db.users.find().sort("created_at", -1).limit(5).to_list(5)
-    recent_challenges = await db_manager.db.challenges.find().sort("created_at", -1).limit(5).to_list(5)
+    logger.info(f"Profiling started by {admin_user.name}: {mode} for up to {seconds}s")
+    if mode == "sample":
+        output, profiled = await profiler.sample(seconds, requests, interval_ms / 1000)
+        content, media_type = output.encode(), "text/plain; charset=utf-8"
+    else:
+        content, profiled = await profiler.cprofile(seconds, requests, raw)
+        media_type = "application/octet-stream" if raw else "text/plain; charset=utf-8"
+    
+    return Response(content=content, media_type=media_type, headers={"X-Profiled-Requests": str(profiled)})
+
+@api_router.get("/admin/metrics", summary="Admin: Runtime metrics")
+@handle_exceptions
+async def admin_metrics(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Admin only: Get process-local counters and pool usage for this worker"""
     
     return {
-        "active_challenges": stats[0],
-        "inactive_challenges": stats[1],
-        "total_solutions": stats[2],
-        "students": stats[3],
-        "professors": stats[4],
-        "companies": stats[5],
-        "admins": stats[6],
-        "total_votes": stats[7],
-        "users_with_expectations": stats[8],
-        "top_solutions": [{"title": f"Solution by {s['author_name']}", "votes": s["votes"]} for s in top_solutions],
-        "recent_users": [{"name": u["name"], "type": u["type"]} for u in recent_users],
-        "recent_challenges": [{"title": c["title"], "creator": c["creator_name"]} for c in recent_challenges]
+        "counters": metrics.snapshot(),
+        "db_pool": {
+            "checked_out": pool_monitor.checked_out,
+            "waiting": pool_monitor.waiting
+        },
+        "stream_subscribers": event_broker.subscriber_count,
+        "event_loop_lag": loop_lag_monitor.snapshot()
     }
 
 # User management endpoints (for admin purposes)
@@ -933,8 +5223,7 @@ async def admin_detailed_stats(admin_user: UserResponse = Depends(require_admin)
 async def list_all_users() -> List[UserResponse]:
     """Get all users (for administrative purposes)"""
     
-    users_cursor = db_manager.db.users.find().sort("created_at", -1).limit(100)
-    users = await users_cursor.to_list(length=100)
+    users = await storage.users.recent(100)
     
     return [UserResponse(**user) for user in users]
 
@@ -943,7 +5232,7 @@ async def list_all_users() -> List[UserResponse]:
 async def get_user_by_id(user_id: str) -> UserResponse:
     """Get specific user by ID"""
     
-    user_doc = await db_manager.db.users.find_one({"id": user_id})
+    user_doc = await storage.users.get(user_id)
     
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
@@ -952,14 +5241,16 @@ async def get_user_by_id(user_id: str) -> UserResponse:
 
 # Health check endpoint
 @api_router.get("/health", summary="Health check")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """API health check endpoint"""
     try:
         # Test database connection
-        await db_manager.db.admin.command('ping')
+        await storage.ping()
         return {
             "status": "healthy",
             "database": "connected",
+            "storage": storage.backend,
+            "ready": warmup.ready,
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -970,9 +5261,80 @@ async def health_check() -> Dict[str, str]:
             "timestamp": datetime.utcnow().isoformat()
         }
 
+# Startup warm-up
+class WarmupService:
+    """Brings a worker's connection pool and caches up before it serves.
+    
+    Startup waits for the warm-up, bounded by WARMUP_BUDGET_SECONDS; steps
+    still running when the budget is spent are cancelled and simply warm on
+    first use. The worker reports ready once startup is done and stops
+    reporting ready when shutdown begins so load balancers drain it first.
+    """
+    
+    BUDGET = float(os.environ.get('WARMUP_BUDGET_SECONDS', 10))
+    
+    def __init__(self):
+        self.ready = False
+        self.report: Dict[str, str] = {}
+    
+    def steps(self) -> Dict[str, Awaitable]:
+        # The handlers are called with the arguments FastAPI passes for a
+        # plain request so they fill the same result cache entries
+        steps = {
+            "challenges": list_challenges(deadline_before=None, deadline_after=None),
+            "leaderboard": get_leaderboard(),
+            "stats": get_platform_stats(),
+            "matching_analysis": get_matching_analysis(),
+            "recommendations": recommendation_service.warm(),
+            "analytics_pool": analytics_pool.warm()
+        }
+        if db_manager.connected:
+            steps["connection_pool"] = db_manager.warm_pool()
+        return steps
+    
+    async def run(self):
+        started = time.perf_counter()
+        tasks = {asyncio.create_task(step): name for name, step in self.steps().items()}
+        done, pending = await asyncio.wait(tasks, timeout=self.BUDGET)
+        
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task, name in tasks.items():
+            if task in pending:
+                self.report[name] = "timed out"
+            elif task.exception() is not None:
+                self.report[name] = "failed"
+                logger.warning(f"Warm-up step {name} failed: {getattr(task.exception(), 'detail', task.exception())}")
+            else:
+                self.report[name] = "ok"
+        
+        if pending:
+            metrics.increment("warmup_timeouts")
+        self.ready = True
+        logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s: {self.report}")
+
+warmup = WarmupService()
+
+@api_router.get("/ready", summary="Readiness check")
+async def readiness_check() -> JSONResponse:
+    """Readiness probe: 200 once warm-up has finished, 503 before that and during shutdown"""
+    return JSONResponse(
+        status_code=200 if warmup.ready else 503,
+        content={"ready": warmup.ready, "warmup": warmup.report}
+    )
+
 # Include router in main app
 app.include_router(api_router)
 
+# All run inside CORS so 304 and 503 responses still carry CORS headers;
+# conditional GETs and cached bodies are served before admission control so
+# they are never shed
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(AdmissionControlMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
+
 # Enhanced CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -988,7 +5350,25 @@ app.add_middleware(
 async def startup_event():
     """Initialize application on startup"""
     try:
-        await db_manager.initialize()
+        loop_lag.start()
+        analytics_pool.start()
+        await storage.initialize()
+        if db_manager.connected:
+            await DeadlineService.migrate()
+            await OutboxService.migrate()
+            await collection_versions.sync()
+            collection_versions.start()
+            await PointsLedger.open_balances()
+            await taxonomy_service.load()
+            taxonomy_sync.start()
+            outbox_worker.start()
+            ledger_maintenance.start()
+            archive_scheduler.start()
+            voted_index_sync.start()
+            await change_stream_relay.start()
+            spawn(RollupService.backfill_if_empty(), "rollup-backfill")
+        expiry_scheduler.start()
+        await warmup.run()
         logger.info("🚀 PUC-RS Innovation Platform started successfully!")
         logger.info("📊 Access API documentation at: /api/docs")
         logger.info("👑 ADMIN user created: admin@pucrs.br / ADMIN")
@@ -999,8 +5379,19 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on application shutdown"""
+    warmup.ready = False
     try:
-        await db_manager.close()
+        await change_stream_relay.stop()
+        await ledger_maintenance.stop()
+        await archive_scheduler.stop()
+        await expiry_scheduler.stop()
+        await voted_index_sync.stop()
+        await taxonomy_sync.stop()
+        await outbox_worker.stop()
+        await collection_versions.stop()
+        await loop_lag.stop()
+        analytics_pool.close()
+        await storage.close()
         logger.info("Application shutdown completed")
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
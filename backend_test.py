@@ -2,6 +2,10 @@
 """
 Comprehensive Backend API Testing for PUC-RS Innovation Platform
 Tests all endpoints with different user types and scenarios
+
+Usage:
+    python backend_test.py [--url http://localhost:8001]
+    python backend_test.py --load --url http://localhost:8001 --concurrency 50 --duration 60
 """
 
 import requests
@@ -9,9 +13,18 @@ import sys
 import json
 from datetime import datetime, date
 import uuid
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BASE_URL = "https://8a30ab99-f2ac-4a7c-a857-b3e6663b2eed.preview.emergentagent.com"
 
 class PlatformAPITester:
-    def __init__(self, base_url="https://8a30ab99-f2ac-4a7c-a857-b3e6663b2eed.preview.emergentagent.com"):
+    def __init__(self, base_url=DEFAULT_BASE_URL):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         self.tokens = {}  # Store tokens for different users
@@ -426,9 +439,250 @@ class PlatformAPITester:
             print("⚠️ SOME TESTS FAILED!")
             return 1
 
+class LoadTester:
+    """Concurrent load generator: virtual users running a weighted scenario mix.
+    
+    Requests are made with `requests` sessions on a thread pool sized to
+    the concurrency, driven by asyncio, so no extra dependency is needed.
+    
+    Every virtual user logs in and sends its own token, so the per-user
+    vote limit applies per virtual user. Login and registration are limited
+    per client address, and the target only believes X-Forwarded-For from
+    its TRUSTED_PROXIES. Either list the generator's address there and pass
+    `forwarded_for=True` (--forwarded-for), so every virtual user sends its
+    own address, or start the target with RATE_LIMIT_REGISTER and
+    RATE_LIMIT_LOGIN raised, since all virtual users then share one bucket.
+    """
+    
+    SCENARIOS = ('browse', 'login', 'submit', 'vote')
+    
+    def __init__(self, base_url, concurrency=20, duration=30.0, mix=None, burst_every=10.0, forwarded_for=False):
+        self.api_url = f"{base_url.rstrip('/')}/api"
+        self.concurrency = concurrency
+        self.duration = duration
+        self.mix = mix or {'browse': 70, 'login': 10, 'submit': 10, 'vote': 10}
+        self.burst_every = burst_every
+        self.forwarded_for = forwarded_for
+        self.latencies = defaultdict(list)   # endpoint -> [seconds]
+        self.statuses = defaultdict(Counter)  # endpoint -> {status: count}
+        self.users = []
+        self.challenges = []
+        self.solutions = []
+        self.hot_solution = None
+        self.run_id = uuid.uuid4().hex[:8]
+        self.executor = ThreadPoolExecutor(max_workers=concurrency + 2)
+    
+    def _request(self, user, method, endpoint, label, data=None):
+        """Blocking request, recorded under `label` (the endpoint path template)"""
+        headers = {'X-Forwarded-For': user['ip']} if self.forwarded_for else {}
+        if user.get('token'):
+            headers['Authorization'] = f"Bearer {user['token']}"
+        started = time.perf_counter()
+        try:
+            response = user['session'].request(method, f"{self.api_url}/{endpoint}", json=data, headers=headers, timeout=30)
+            status = response.status_code
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        self.latencies[f"{method} {label}"].append(time.perf_counter() - started)
+        self.statuses[f"{method} {label}"][status] += 1
+        return response
+    
+    async def call(self, user, method, endpoint, label=None, data=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._request, user, method, endpoint, label or f"/{endpoint}", data)
+    
+    def _new_user(self, index, user_type='aluno'):
+        return {
+            'index': index,
+            'type': user_type,
+            'email': f"load.{self.run_id}.{index}@loadtest.dev",
+            'password': 'loadtest123',
+            'ip': f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}",
+            'session': requests.Session(),
+            'voted': set(),
+            'submitted': set()
+        }
+    
+    async def register(self, user):
+        response = await self.call(user, 'POST', 'register', data={
+            'name': f"Load User {user['index']}",
+            'email': user['email'],
+            'type': user['type'],
+            'password': user['password']
+        })
+        if response is not None and response.status_code == 200:
+            user['id'] = response.json()['id']
+        await self.login(user)
+    
+    async def login(self, user):
+        response = await self.call(user, 'POST', 'login', data={'email': user['email'], 'password': user['password']})
+        if response is not None and response.status_code == 200:
+            user['token'] = response.json()['token']
+            user['id'] = response.json()['user']['id']
+    
+    async def setup(self):
+        """Register the virtual users and a professor who publishes the challenges"""
+        print(f"⚙️  Setting up {self.concurrency} virtual users against {self.api_url}")
+        self.professor = self._new_user(0, 'professor')
+        await self.register(self.professor)
+        self.users = [self._new_user(index + 1) for index in range(self.concurrency)]
+        await asyncio.gather(*(self.register(user) for user in self.users))
+        self.users = [user for user in self.users if user.get('token')]
+        if not self.users or not self.professor.get('token'):
+            raise RuntimeError(
+                "Setup failed: could not register virtual users (check the target's register/login rate limits, "
+                "or use --forwarded-for with this host in its TRUSTED_PROXIES)"
+            )
+        
+        for number in range(5):
+            response = await self.call(self.professor, 'POST', 'challenges', data={
+                'title': f"Load test challenge {self.run_id}-{number}",
+                'description': "Challenge created by the load generator to exercise submissions and votes."
+            })
+            if response is not None and response.status_code == 200:
+                self.challenges.append(response.json())
+        if not self.challenges:
+            raise RuntimeError("Setup failed: the professor could not create challenges")
+        self.author_count = len(self.users) + 1
+    
+    async def browse(self, user):
+        challenge = random.choice(self.challenges)
+        await self.call(user, 'GET', 'challenges')
+        await self.call(user, 'GET', f"challenges/{challenge['id']}/full", '/challenges/{id}/full')
+        await self.call(user, 'GET', 'stats')
+        await self.call(user, 'GET', 'leaderboard')
+    
+    async def submit(self, user):
+        open_challenges = [c for c in self.challenges if c['id'] not in user['submitted']]
+        if not open_challenges:
+            return await self.browse(user)
+        challenge = random.choice(open_challenges)
+        user['submitted'].add(challenge['id'])
+        response = await self.call(user, 'POST', 'solutions', data={
+            'challenge_id': challenge['id'],
+            'description': f"Solution from load user {user['index']} with enough detail to pass validation."
+        })
+        if response is not None and response.status_code == 200:
+            self.solutions.append(response.json())
+    
+    async def vote(self, user, solution=None):
+        if solution is None:
+            candidates = [s for s in self.solutions if s['author_id'] != user.get('id') and s['id'] not in user['voted']]
+            if not candidates:
+                return await self.browse(user)
+            solution = random.choice(candidates)
+        user['voted'].add(solution['id'])
+        await self.call(user, 'POST', f"solutions/{solution['id']}/vote", '/solutions/{id}/vote')
+    
+    async def publish_hot_solutions(self, deadline):
+        """Every burst_every seconds a new author posts a solution every virtual user then votes on"""
+        while time.monotonic() + self.burst_every < deadline:
+            await asyncio.sleep(self.burst_every)
+            author = self._new_user(self.author_count)
+            self.author_count += 1
+            await self.register(author)
+            if not author.get('token'):
+                continue
+            response = await self.call(author, 'POST', 'solutions', data={
+                'challenge_id': self.challenges[0]['id'],
+                'description': "Hot solution everyone is about to vote on during the burst."
+            })
+            if response is not None and response.status_code == 200:
+                self.hot_solution = response.json()
+                print(f"🔥 Vote burst on solution {self.hot_solution['id'][:8]}...")
+    
+    async def virtual_user(self, user, deadline):
+        scenarios = list(self.mix)
+        weights = [self.mix[name] for name in scenarios]
+        while time.monotonic() < deadline:
+            hot = self.hot_solution
+            if hot and hot['id'] not in user['voted']:
+                await self.vote(user, hot)
+                continue
+            scenario = random.choices(scenarios, weights)[0]
+            if scenario == 'login':
+                await self.login(user)
+            else:
+                await getattr(self, scenario)(user)
+    
+    async def run(self):
+        await self.setup()
+        for key in list(self.latencies):
+            self.latencies[key].clear()
+            self.statuses[key].clear()
+        
+        print(f"🏁 Running mix {self.mix} for {self.duration:.0f}s with {len(self.users)} virtual users")
+        started = time.monotonic()
+        deadline = started + self.duration
+        await asyncio.gather(
+            self.publish_hot_solutions(deadline),
+            *(self.virtual_user(user, deadline) for user in self.users)
+        )
+        self.report(time.monotonic() - started)
+        self.executor.shutdown(wait=False)
+        return 0 if not self.error_count() else 1
+    
+    def error_count(self):
+        return sum(
+            count for statuses in self.statuses.values()
+            for status, count in statuses.items() if not (isinstance(status, int) and status < 400)
+        )
+    
+    @staticmethod
+    def percentile(sorted_values, fraction):
+        if not sorted_values:
+            return 0.0
+        return sorted_values[min(len(sorted_values) - 1, int(math.ceil(fraction * len(sorted_values))) - 1)]
+    
+    def report(self, elapsed):
+        total = sum(len(values) for values in self.latencies.values())
+        print("\n" + "="*100)
+        print("📋 LOAD TEST SUMMARY")
+        print("="*100)
+        print(f"Duration: {elapsed:.1f}s  Requests: {total}  Throughput: {total / elapsed:.1f} req/s  Errors: {self.error_count()}")
+        print(f"\n{'Endpoint':<36}{'Count':>8}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}  Errors")
+        for endpoint in sorted(self.latencies, key=lambda name: -len(self.latencies[name])):
+            values = sorted(self.latencies[endpoint])
+            if not values:
+                continue
+            errors = {
+                str(status): count for status, count in self.statuses[endpoint].items()
+                if not (isinstance(status, int) and status < 400)
+            }
+            print(
+                f"{endpoint:<36}{len(values):>8}{len(values) / elapsed:>9.1f}"
+                f"{self.percentile(values, 0.50) * 1000:>9.1f}{self.percentile(values, 0.90) * 1000:>9.1f}"
+                f"{self.percentile(values, 0.99) * 1000:>9.1f}{values[-1] * 1000:>9.1f}  {errors or '-'}"
+            )
+
+def parse_mix(value):
+    """Parse a scenario mix such as "browse=70,login=10,submit=10,vote=10" """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in LoadTester.SCENARIOS or not weight.strip().isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid scenario weight {part!r}; scenarios are {', '.join(LoadTester.SCENARIOS)}")
+        mix[name.strip()] = int(weight)
+    return mix
+
 def main():
     """Main test execution"""
-    tester = PlatformAPITester()
+    parser = argparse.ArgumentParser(description="Functional tests or a concurrent load test of the platform API")
+    parser.add_argument('--url', default=DEFAULT_BASE_URL, help="Base URL of the target server, e.g. http://localhost:8001")
+    parser.add_argument('--load', action='store_true', help="Run the load generator instead of the functional tests")
+    parser.add_argument('--concurrency', type=int, default=20, help="Number of concurrent virtual users")
+    parser.add_argument('--duration', type=float, default=30, help="Load test duration in seconds")
+    parser.add_argument('--mix', type=parse_mix, default=None, help="Scenario weights, e.g. browse=70,login=10,submit=10,vote=10")
+    parser.add_argument('--burst-every', type=float, default=10, help="Seconds between vote bursts on a new hot solution")
+    parser.add_argument('--forwarded-for', action='store_true',
+                        help="Send a distinct X-Forwarded-For per virtual user (the target must list this host in TRUSTED_PROXIES)")
+    args = parser.parse_args()
+    
+    if args.load:
+        tester = LoadTester(args.url, args.concurrency, args.duration, args.mix, args.burst_every, args.forwarded_for)
+        return asyncio.run(tester.run())
+    
+    tester = PlatformAPITester(args.url)
     return tester.run_comprehensive_tests()
 
 if __name__ == "__main__":
@@ -78,6 +78,49 @@ function App() {
     fetchStats();
   }, []);
 
+  // Live updates pushed by the server instead of refetching after every vote
+  useEffect(() => {
+    const topics = ['leaderboard', 'stats'];
+    if (selectedChallenge) {
+      topics.push(`solutions:${selectedChallenge.id}`);
+    }
+    const source = new EventSource(`${API}/stream?topics=${topics.join(',')}`);
+
+    source.addEventListener('stats_delta', (event) => {
+      const deltas = JSON.parse(event.data);
+      setStats(prev => {
+        const next = { ...prev };
+        Object.entries(deltas).forEach(([key, amount]) => {
+          next[key] = (next[key] || 0) + amount;
+        });
+        return next;
+      });
+    });
+
+    source.addEventListener('user_points', (event) => {
+      const update = JSON.parse(event.data);
+      setLeaderboard(prev => prev
+        .map(player => player.id === update.id ? { ...player, points: update.points } : player)
+        .sort((a, b) => b.points - a.points));
+      setUser(prev => prev && prev.id === update.id ? { ...prev, points: update.points } : prev);
+    });
+
+    source.addEventListener('solution_votes', (event) => {
+      const update = JSON.parse(event.data);
+      setSolutions(prev => prev
+        .map(solution => solution.id === update.solution_id ? { ...solution, votes: update.votes } : solution)
+        .sort((a, b) => b.votes - a.votes));
+    });
+
+    source.addEventListener('solution_created', () => {
+      if (selectedChallenge) {
+        fetchSolutions(selectedChallenge.id);
+      }
+    });
+
+    return () => source.close();
+  }, [selectedChallenge?.id]);
+
   const fetchProfile = async () => {
     try {
       const response = await axios.get(`${API}/profile`);
@@ -100,8 +143,9 @@ function App() {
 
   const fetchSolutions = async (challengeId) => {
     try {
-      const response = await axios.get(`${API}/challenges/${challengeId}/solutions`);
-      setSolutions(response.data);
+      // Includes author points and whether the current user already voted
+      const response = await axios.get(`${API}/challenges/${challengeId}/full`);
+      setSolutions(response.data.solutions);
     } catch (error) {
       console.error('Error fetching solutions:', error);
     }
@@ -136,18 +180,20 @@ function App() {
 
   const fetchAdminData = async () => {
     try {
-      const [usersRes, challengesRes, solutionsRes, detailedStatsRes] = await Promise.all([
-        axios.get(`${API}/admin/users`),
-        axios.get(`${API}/admin/challenges`),
-        axios.get(`${API}/admin/solutions`),
-        axios.get(`${API}/admin/detailed-stats`)
-      ]);
+      // A single request returns the stats and the first page of every listing
+      const response = await axios.get(`${API}/admin/dashboard`);
+      const { users, challenges, solutions, detailed_stats } = response.data;
 
       setAdminData({
-        users: usersRes.data,
-        challenges: challengesRes.data,
-        solutions: solutionsRes.data,
-        detailedStats: detailedStatsRes.data
+        users: users.items,
+        challenges: challenges.items,
+        solutions: solutions.items,
+        totals: {
+          users: users.total,
+          challenges: challenges.total,
+          solutions: solutions.total
+        },
+        detailedStats: detailed_stats
       });
     } catch (error) {
       console.error('Error fetching admin data:', error);
@@ -239,9 +285,10 @@ function App() {
 
   const handleVote = async (solutionId) => {
     try {
+      // Updated vote counts and points arrive over the live stream
       await axios.post(`${API}/solutions/${solutionId}/vote`);
-      fetchSolutions(selectedChallenge.id);
-      fetchProfile(); // Update user points
+      setSolutions(prev => prev.map(solution =>
+        solution.id === solutionId ? { ...solution, voted_by_me: true } : solution));
       alert('Voto registrado com sucesso!');
     } catch (error) {
       alert('Erro ao votar: ' + (error.response?.data?.detail || 'Erro desconhecido'));
@@ -661,8 +708,12 @@ function App() {
                 <div className="solution-votes">
                   <span className="votes-count">{solution.votes} votos</span>
                   {user && user.id !== solution.author_id && (
-                    <button onClick={() => handleVote(solution.id)} className="vote-btn">
-                      👍 Votar
+                    <button
+                      onClick={() => handleVote(solution.id)}
+                      className="vote-btn"
+                      disabled={solution.voted_by_me}
+                    >
+                      {solution.voted_by_me ? '✔️ Votado' : '👍 Votar'}
                     </button>
                   )}
                 </div>
@@ -852,7 +903,7 @@ function App() {
 
         <div className="admin-sections">
           <div className="admin-section">
-            <h3>👥 Usuários Cadastrados ({adminData.users.length})</h3>
+            <h3>👥 Usuários Cadastrados ({adminData.totals.users})</h3>
             <div className="admin-list">
               {adminData.users.slice(0, 10).map(user => (
                 <div key={user.id} className="admin-list-item">
@@ -872,7 +923,7 @@ function App() {
           </div>
 
           <div className="admin-section">
-            <h3>🎯 Desafios Criados ({adminData.challenges.length})</h3>
+            <h3>🎯 Desafios Criados ({adminData.totals.challenges})</h3>
             <div className="admin-list">
               {adminData.challenges.slice(0, 10).map(challenge => (
                 <div key={challenge.id} className="admin-list-item">
@@ -889,7 +940,7 @@ function App() {
           </div>
 
           <div className="admin-section">
-            <h3>💡 Soluções Submetidas ({adminData.solutions.length})</h3>
+            <h3>💡 Soluções Submetidas ({adminData.totals.solutions})</h3>
             <div className="admin-list">
               {adminData.solutions.slice(0, 10).map(solution => (
                 <div key={solution.id} className="admin-list-item">
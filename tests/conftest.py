@@ -0,0 +1,68 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pucrs_innovation_test")
+os.environ.setdefault("ANALYTICS_WORKERS", "0")
+os.environ.setdefault("WARMUP_BUDGET_SECONDS", "5")
+os.environ.setdefault("ROLLUP_BACKFILL_SETTLE_SECONDS", "0")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import mongomock_motor  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import server  # noqa: E402
+
+
+class FakeMotorClient(mongomock_motor.AsyncMongoMockClient):
+    """In-memory MongoDB standing in for Motor; a standalone server without transactions"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+
+    @property
+    def admin(self):
+        class Admin:
+            async def command(self, *args, **kwargs):
+                return {"ok": 1}
+        return Admin()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One application for the whole session: its background workers and
+    locks are bound to the event loop the client starts them on
+    """
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(server, "AsyncIOMotorClient", FakeMotorClient)
+        with TestClient(server.app) as test_client:
+            yield test_client
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    for limiter in server._rate_limiters.values():
+        limiter._buckets.clear()
+
+
+@pytest.fixture
+def db(client):
+    return server.db_manager.db
+
+
+def login(client, email="admin@pucrs.br", password="ADMIN"):
+    response = client.post("/api/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def register(client, email, user_type="aluno", password="123456"):
+    response = client.post("/api/register", json={
+        "name": "Test User", "email": email, "type": user_type, "password": password
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
@@ -0,0 +1,40 @@
+import uuid
+
+from tests.conftest import login, register
+
+
+def test_dashboard_pages_match_the_detailed_stats(client, db):
+    headers = login(client)
+    email = f"dashboard-{uuid.uuid4()}@example.com"
+    register(client, email)
+
+    dashboard = client.get("/api/admin/dashboard?page_size=2", headers=headers)
+    detailed = client.get("/api/admin/detailed-stats", headers=headers)
+
+    assert dashboard.status_code == 200 and detailed.status_code == 200
+    body = dashboard.json()
+    assert body["detailed_stats"] == detailed.json()
+
+    users = client.portal.call(db.users.count_documents, {})
+    assert body["users"]["total"] == users
+    assert body["users"]["page_size"] == 2 and len(body["users"]["items"]) == 2
+    assert body["users"]["has_more"] == (users > 2)
+    assert all("password_hash" not in user for user in body["users"]["items"])
+
+    # Newest first
+    assert body["users"]["items"][0]["email"] == email
+    votes = [solution["votes"] for solution in body["solutions"]["items"]]
+    assert votes == sorted(votes, reverse=True)
+
+    stats = body["detailed_stats"]
+    challenges = body["challenges"]["total"]
+    assert stats["active_challenges"] + stats["inactive_challenges"] - stats["archived_challenges"] == challenges
+
+
+def test_dashboard_is_admin_only(client):
+    email = f"dashboard-{uuid.uuid4()}@example.com"
+    register(client, email)
+
+    response = client.get("/api/admin/dashboard", headers=login(client, email, "123456"))
+
+    assert response.status_code == 403
@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+
+import server
+
+
+def _chunk_sizes(chunk):
+    return len(chunk)
+
+
+def _tagged(tag, chunk):
+    return [f"{tag}:{item}" for item in chunk]
+
+
+def test_chunks_run_inline_in_order_without_workers(monkeypatch):
+    pool = server.AnalyticsPool()
+    monkeypatch.setattr(pool, "CHUNK_SIZE", 2)
+
+    results = asyncio.run(pool.map_chunks(_tagged, ["a", "b", "c", "d", "e"], "x"))
+
+    assert pool._executor is None
+    assert results == [["x:a", "x:b"], ["x:c", "x:d"], ["x:e"]]
+
+
+def test_worker_processes_return_the_same_chunks(monkeypatch):
+    pool = server.AnalyticsPool()
+    monkeypatch.setattr(pool, "WORKERS", 2)
+    monkeypatch.setattr(pool, "CHUNK_SIZE", 3)
+    passwords = [f"secret-{number}" for number in range(10)]
+
+    async def scenario():
+        pool.start()
+        try:
+            return await pool.map_chunks(server.hash_passwords, passwords)
+        finally:
+            pool.close()
+
+    chunks = asyncio.run(scenario())
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert [password_hash for chunk in chunks for password_hash in chunk] == server.hash_passwords(passwords)
+
+
+class BrokenExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        pass
+
+
+def test_a_broken_pool_falls_back_to_running_inline(monkeypatch):
+    pool = server.AnalyticsPool()
+    monkeypatch.setattr(pool, "CHUNK_SIZE", 2)
+
+    async def scenario():
+        pool._executor = BrokenExecutor()
+        pool._slots = asyncio.Semaphore(2)
+        return await pool.map_chunks(_chunk_sizes, [1, 2, 3])
+
+    assert asyncio.run(scenario()) == [2, 1]
+    assert pool._executor is None
+
+
+def test_chunked_matching_analysis_merges_to_the_unchunked_result(client, monkeypatch):
+    monkeypatch.setattr(server.analytics_pool, "CHUNK_SIZE", 10000)
+    whole = client.portal.call(server.MatchingService.generate_matching_analysis)
+    monkeypatch.setattr(server.analytics_pool, "CHUNK_SIZE", 1)
+    chunked = client.portal.call(server.MatchingService.generate_matching_analysis)
+
+    assert whole["companies"] and whole["students"]
+    assert chunked == whole
@@ -0,0 +1,90 @@
+import uuid
+from datetime import datetime, timedelta
+
+import server
+from tests.conftest import login, register
+
+
+def _challenge(db, client, **fields):
+    challenge = {"id": str(uuid.uuid4()), "title": "Archived challenge", "description": "A challenge to archive",
+                 "creator_id": str(uuid.uuid4()), "creator_name": "Creator", "active": False,
+                 "created_at": datetime.utcnow(), **fields}
+    client.portal.call(db.challenges.insert_one, challenge)
+    return challenge
+
+
+def _solution(db, client, challenge):
+    solution = {"id": str(uuid.uuid4()), "challenge_id": challenge["id"], "author_id": str(uuid.uuid4())}
+    client.portal.call(db.solutions.insert_one, solution)
+    return solution
+
+
+def _vote(db, client, solution):
+    vote = {"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "solution_id": solution["id"],
+            "created_at": datetime.utcnow()}
+    client.portal.call(db.votes.insert_one, vote)
+    return vote
+
+
+def test_writes_racing_the_copy_are_archived_not_deleted(client, db, monkeypatch):
+    challenge = _challenge(db, client)
+    solution = _solution(db, client, challenge)
+    _vote(db, client, solution)
+    late = {}
+    copy = server.ArchiveService._copy
+
+    async def copy_then_race(source, docs):
+        await copy(source, docs)
+        if source == "votes" and not late:
+            late["vote"] = {"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()),
+                            "solution_id": solution["id"], "created_at": datetime.utcnow()}
+            late["solution"] = {"id": str(uuid.uuid4()), "challenge_id": challenge["id"], "author_id": "late"}
+            await db.votes.insert_one(dict(late["vote"]))
+            await db.solutions.insert_one(dict(late["solution"]))
+
+    monkeypatch.setattr(server.ArchiveService, "_copy", copy_then_race)
+    moved = client.portal.call(server.ArchiveService.archive_challenge, challenge)
+
+    assert moved == {"solutions": 2, "votes": 2}
+    assert client.portal.call(db.votes.find_one, {"id": late["vote"]["id"]}) is None
+    assert client.portal.call(db.votes_archive.find_one, {"id": late["vote"]["id"]}) is not None
+    assert client.portal.call(db.solutions_archive.find_one, {"id": late["solution"]["id"]}) is not None
+    assert client.portal.call(db.solutions.count_documents, {"challenge_id": challenge["id"]}) == 0
+
+
+def test_expired_challenges_are_archived_only_after_the_retention_window(client, db, monkeypatch):
+    monkeypatch.setattr(server.ArchiveService, "CHALLENGES_PER_RUN", 10000)
+    yesterday = server.DeadlineService.today() - timedelta(days=1)
+    fresh = _challenge(db, client, active=True, deadline=yesterday)
+    stale = _challenge(db, client, status="expired", deactivated_at=datetime.utcnow() - timedelta(
+        days=server.ArchiveService.EXPIRED_AFTER_DAYS + 1
+    ))
+
+    client.portal.call(server.DeadlineService.expire)
+    client.portal.call(server.ArchiveService.run)
+
+    expired = client.portal.call(db.challenges.find_one, {"id": fresh["id"]})
+    assert expired["status"] == "expired" and expired["active"] is False
+    assert client.get(f"/api/challenges/{fresh['id']}").status_code == 200
+    assert client.portal.call(db.challenges.find_one, {"id": stale["id"]}) is None
+    assert client.portal.call(db.challenges_archive.find_one, {"id": stale["id"]})["status"] == "archived"
+
+
+def test_expired_challenges_reject_solutions_and_votes(client, db):
+    challenge = _challenge(db, client, active=True, deadline=server.DeadlineService.today() - timedelta(days=1))
+    author_email, voter_email = f"author-{uuid.uuid4()}@example.com", f"voter-{uuid.uuid4()}@example.com"
+    register(client, author_email)
+    register(client, voter_email)
+    solution = client.post("/api/solutions", json={
+        "challenge_id": challenge["id"], "description": "Submitted before the deadline passed"
+    }, headers=login(client, author_email, "123456")).json()
+
+    client.portal.call(server.DeadlineService.expire)
+
+    response = client.post("/api/solutions", json={
+        "challenge_id": challenge["id"], "description": "Submitted after the deadline passed"
+    }, headers=login(client, voter_email, "123456"))
+    assert response.status_code == 400
+    response = client.post(f"/api/solutions/{solution['id']}/vote", headers=login(client, voter_email, "123456"))
+    assert response.status_code == 400
+    assert client.portal.call(db.votes.find_one, {"solution_id": solution["id"]}) is None
@@ -0,0 +1,62 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from tests.conftest import login, register
+
+
+def _drain(client):
+    while client.portal.call(server.outbox_worker.drain_once):
+        pass
+
+
+@pytest.fixture
+def lookup_free_detail(monkeypatch):
+    """mongomock does not implement $lookup with `let`; assemble the detail
+    document the way the memory backend does, from the Mongo repositories
+    """
+    repository = SimpleNamespace(get=server.storage.challenges.get, _storage=server.storage)
+
+    async def get_with_solutions(challenge_id, limit):
+        return await server.MemoryChallengeRepository.get_with_solutions(repository, challenge_id, limit)
+
+    monkeypatch.setattr(server.storage.challenges, "get_with_solutions", get_with_solutions)
+
+
+def _student(client):
+    email = f"student-{uuid.uuid4()}@example.com"
+    user = register(client, email)
+    return user, login(client, email, "123456")
+
+
+def test_detail_orders_solutions_and_marks_the_viewers_votes(client, lookup_free_detail):
+    challenge = client.post("/api/challenges", json={
+        "title": "Detail view challenge", "description": "A challenge with a few solutions"
+    }, headers=login(client)).json()
+    solutions = []
+    for _ in range(2):
+        _, headers = _student(client)
+        solutions.append(client.post("/api/solutions", json={
+            "challenge_id": challenge["id"], "description": "A solution for the detail view"
+        }, headers=headers).json())
+    _, viewer = _student(client)
+    assert client.post(f"/api/solutions/{solutions[1]['id']}/vote", headers=viewer).status_code == 200
+    _drain(client)
+
+    detail = client.get(f"/api/challenges/{challenge['id']}/full", headers=viewer)
+    anonymous = client.get(f"/api/challenges/{challenge['id']}/full")
+
+    assert detail.status_code == 200 and anonymous.status_code == 200
+    body = detail.json()
+    assert body["challenge"]["id"] == challenge["id"]
+    assert [solution["id"] for solution in body["solutions"]] == [solutions[1]["id"], solutions[0]["id"]]
+    assert [solution["votes"] for solution in body["solutions"]] == [1, 0]
+    assert [solution["voted_by_me"] for solution in body["solutions"]] == [True, False]
+    assert [solution["voted_by_me"] for solution in anonymous.json()["solutions"]] == [False, False]
+    assert [solution["author_points"] for solution in body["solutions"]] == [server.VOTE_POINTS, 0]
+
+
+def test_detail_of_an_unknown_challenge_is_a_404(client, lookup_free_detail):
+    assert client.get(f"/api/challenges/{uuid.uuid4()}/full").status_code == 404
@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+import server
+
+LARGE = "x" * 4096
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(LARGE)
+
+    @app.get("/chunked")
+    async def chunked():
+        return StreamingResponse(iter([LARGE[:2048], LARGE[2048:]]), media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter(["event: ready\ndata: {}\n\n"]), media_type="text/event-stream")
+
+    app.add_api_route("/large", large, methods=["HEAD"])
+    return TestClient(server.CompressionMiddleware(app, minimum_size=1024))
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, "identity"),
+    ("gzip", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("gzip;q=0.0", "identity"),
+    ("gzip; q=0.000", "identity"),
+    ("gzip;q=0.001", "gzip"),
+    ("gzip;q=nonsense", "identity"),
+    ("gzip;q=2", "identity"),
+    ("*", "gzip"),
+    ("*;q=0.5, gzip;q=0", "identity"),
+    ("identity", "identity"),
+])
+def test_negotiate_honours_quality_values(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(server, "brotli", None)
+    assert server.CompressionMiddleware.negotiate(accept_encoding) == expected
+
+
+def test_negotiate_prefers_the_higher_quality_coding(monkeypatch):
+    monkeypatch.setattr(server, "brotli", object())
+    negotiate = server.CompressionMiddleware.negotiate
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("br;q=0.5, gzip") == "gzip"
+    assert negotiate("br;q=0.0, gzip;q=0.1") == "gzip"
+
+
+def test_bodies_below_the_threshold_are_sent_as_is():
+    client = _client()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    large = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in small.headers and small.text == "tiny"
+    assert large.headers["content-encoding"] == "gzip" and large.text == LARGE
+    assert large.headers["vary"] == "Accept-Encoding"
+
+
+def test_chunked_bodies_are_compressed_as_a_whole():
+    response = _client().get("/chunked", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) == len(gzip.compress(LARGE.encode(), compresslevel=6))
+    assert response.text == LARGE
+
+
+def test_event_streams_pass_through_untouched():
+    response = _client().get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert response.text == "event: ready\ndata: {}\n\n"
+
+
+def test_head_responses_describe_the_get_response_without_a_body():
+    client = _client()
+    get = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    head = client.head("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert head.status_code == 200
+    for header in ("content-encoding", "content-length", "vary"):
+        assert head.headers[header] == get.headers[header]
+    assert head.content == b""
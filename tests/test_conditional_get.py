@@ -0,0 +1,49 @@
+import uuid
+
+import server
+from tests.conftest import login, register
+
+
+def _drain(client):
+    while client.portal.call(server.outbox_worker.drain_once):
+        pass
+
+
+def _vote_for_new_solution(client):
+    email = f"author-{uuid.uuid4()}@example.com"
+    author = register(client, email)
+    challenge = client.get("/api/challenges").json()[0]
+    solution = client.post("/api/solutions", json={
+        "challenge_id": challenge["id"], "description": "A solution worth voting for"
+    }, headers=login(client, email, "123456")).json()
+
+    voter_email = f"voter-{uuid.uuid4()}@example.com"
+    register(client, voter_email)
+    response = client.post(f"/api/solutions/{solution['id']}/vote", headers=login(client, voter_email, "123456"))
+    assert response.status_code == 200, response.text
+    return author, challenge
+
+
+def test_leaderboards_revalidate_after_vote_side_effects(client):
+    paths = ["/api/leaderboard", "/api/leaderboard/week", "/api/leaderboard/month"]
+    challenge_id = client.get("/api/challenges").json()[0]["id"]
+    paths.append(f"/api/challenges/{challenge_id}/leaderboard?window=week")
+    etags = {path: client.get(path).headers["etag"] for path in paths}
+
+    author, _ = _vote_for_new_solution(client)
+    _drain(client)
+
+    for path in paths:
+        response = client.get(path, headers={"If-None-Match": etags[path]})
+        assert response.status_code == 200, path
+        entries = response.json()
+        assert author["id"] in [entry["id"] for entry in entries], path
+
+
+def test_windowed_leaderboard_revalidates_when_the_period_rolls_over(client, monkeypatch):
+    etag = client.get("/api/leaderboard/week").headers["etag"]
+    assert client.get("/api/leaderboard/week", headers={"If-None-Match": etag}).status_code == 304
+
+    week = server.CollectionVersions.CLOCK_VERSIONS["week"]
+    monkeypatch.setitem(server.CollectionVersions.CLOCK_VERSIONS, "week", lambda now: week(now) + 1)
+    assert client.get("/api/leaderboard/week", headers={"If-None-Match": etag}).status_code == 200
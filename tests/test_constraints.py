@@ -0,0 +1,45 @@
+import uuid
+
+from tests.conftest import login, register
+
+
+def _user(email):
+    return {"name": "Constraint User", "email": email, "type": "aluno", "password": "123456"}
+
+
+def test_an_email_registers_once_whatever_its_case(client, db):
+    email = f"constraint-{uuid.uuid4()}@example.com"
+    register(client, email)
+
+    for duplicate in (email, email.upper()):
+        response = client.post("/api/register", json=_user(duplicate))
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Email already registered")
+    assert client.portal.call(db.users.count_documents, {"email": email}) == 1
+
+
+def test_one_solution_per_author_and_challenge(client, db):
+    email = f"constraint-{uuid.uuid4()}@example.com"
+    register(client, email)
+    headers = login(client, email, "123456")
+    challenge_id = client.get("/api/challenges").json()[0]["id"]
+    solution = {"challenge_id": challenge_id, "description": "Only the first submission counts"}
+
+    assert client.post("/api/solutions", json=solution, headers=headers).status_code == 200
+    response = client.post("/api/solutions", json=solution, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "You have already submitted a solution for this challenge"
+    author = client.get("/api/profile", headers=headers).json()
+    assert client.portal.call(db.solutions.count_documents, {"challenge_id": challenge_id, "author_id": author["id"]}) == 1
+
+
+def test_the_unique_indexes_exist(client, db):
+    user_indexes = client.portal.call(db.users.index_information)
+    solution_indexes = client.portal.call(db.solutions.index_information)
+
+    assert any(index.get("unique") and index["key"] == [("email", 1)] for index in user_indexes.values())
+    assert any(
+        index.get("unique") and index["key"] == [("challenge_id", 1), ("author_id", 1)]
+        for index in solution_indexes.values()
+    )
@@ -0,0 +1,86 @@
+import json
+import uuid
+
+import server
+from tests.conftest import login, register
+
+
+def _email():
+    return f"import-{uuid.uuid4()}@example.com"
+
+
+def _user(email, **fields):
+    return {"name": "Imported User", "email": email, "type": "aluno", "password": "123456", **fields}
+
+
+def _import(client, body, content_type="application/x-ndjson"):
+    response = client.post("/api/admin/import/users", content=body.encode(), headers={
+        **login(client), "Content-Type": content_type
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_ndjson_import_reports_each_bad_row_and_imports_the_rest(client):
+    existing, duplicated, good = _email(), _email(), _email()
+    register(client, existing)
+    lines = [
+        json.dumps(_user(good)),
+        "{not json",
+        "[1, 2]",
+        json.dumps(_user(_email(), password="123")),
+        json.dumps(_user(existing)),
+        json.dumps(_user(duplicated)),
+        "",
+        json.dumps(_user(duplicated)),
+    ]
+
+    report = _import(client, "\n".join(lines))
+
+    assert (report["received"], report["imported"], report["failed"]) == (7, 2, 5)
+    errors = {error["row"]: error["error"] for error in report["errors"]}
+    assert errors[2].startswith("Invalid JSON")
+    assert errors[3] == "Each line must be a JSON object"
+    assert errors[4].startswith("password")
+    assert errors[5] == errors[7] == "Email already registered"
+    assert client.post("/api/login", json={"email": good, "password": "123456"}).status_code == 200
+
+
+def test_csv_import_handles_quoted_newlines_and_bad_rows(client):
+    first, second = _email(), _email()
+    body = "\r\n".join([
+        "name,email,type,password,expectations,shareExpectations",
+        f'Quoted User,{first},aluno,123456,"Multi-line\nexpectations, with a comma",true',
+        f"Short Row,{_email()},aluno",
+        f"Plain User,{second},empresa,123456,,false",
+        f'Broken User,{_email()},aluno,123456,"never closed,true',
+    ])
+
+    report = _import(client, body, "text/csv")
+
+    assert (report["received"], report["imported"], report["failed"]) == (4, 2, 2)
+    assert [error["row"] for error in report["errors"]] == [2, 4]
+    assert report["errors"][0]["error"] == "Expected 6 columns, got 3"
+    assert report["errors"][1]["error"] == "Unterminated quoted field"
+    user = client.post("/api/login", json={"email": first, "password": "123456"}).json()["user"]
+    assert user["expectations"] == "Multi-line\nexpectations, with a comma"
+
+
+def test_rows_rejected_by_the_database_fail_alone_across_chunks(client, monkeypatch):
+    monkeypatch.setattr(server.BulkImporter, "CHUNK_SIZE", 2)
+    taken = _email()
+    register(client, taken)
+
+    async def nothing_registered(emails):
+        return set()
+
+    # Another import registered the address after the pre-check
+    monkeypatch.setattr(server.storage.users, "existing_emails", nothing_registered)
+    emails = [_email(), taken, _email(), _email(), _email()]
+
+    report = _import(client, "\n".join(json.dumps(_user(email)) for email in emails))
+
+    assert (report["received"], report["imported"], report["failed"]) == (5, 4, 1)
+    assert report["errors"][0]["row"] == 2
+    for email in emails[:1] + emails[2:]:
+        assert client.post("/api/login", json={"email": email, "password": "123456"}).status_code == 200
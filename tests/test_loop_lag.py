@@ -0,0 +1,52 @@
+import server
+from tests.conftest import login
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+def _sample(monitor, clock, after):
+    clock.now += after
+    server.asyncio.run(monitor.sample())
+
+
+def test_lag_is_the_delay_past_the_sampling_interval(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock.monotonic)
+    monitor = server.LoopLagMonitor()
+    interval = monitor.INTERVAL
+
+    assert monitor.snapshot() == {"samples": 0}
+    _sample(monitor, clock, 0)
+    for lag in (0.0, 0.01, 0.02, 0.25):
+        _sample(monitor, clock, interval + lag)
+    _sample(monitor, clock, interval - 0.05)  # early timers count as no lag
+
+    assert monitor.snapshot() == {
+        "samples": 5, "last_ms": 0.0, "p50_ms": 10.0, "p99_ms": 250.0, "max_ms": 250.0
+    }
+
+
+def test_stalls_are_counted(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock.monotonic)
+    monitor = server.LoopLagMonitor()
+    stalls = server.metrics.snapshot().get("event_loop_stalls", 0)
+
+    _sample(monitor, clock, 0)
+    _sample(monitor, clock, monitor.INTERVAL + monitor.STALL_SECONDS * 2)
+    _sample(monitor, clock, monitor.INTERVAL + monitor.STALL_SECONDS / 2)
+
+    assert server.metrics.snapshot().get("event_loop_stalls", 0) == stalls + 1
+
+
+def test_admin_metrics_expose_the_lag(client):
+    response = client.get("/api/admin/metrics", headers=login(client))
+
+    assert response.status_code == 200
+    assert "samples" in response.json()["event_loop_lag"]
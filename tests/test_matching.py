@@ -0,0 +1,22 @@
+from pymongo.errors import ExecutionTimeout
+
+import server
+
+
+def test_failed_analysis_is_not_cached(client, monkeypatch):
+    async def timed_out(*args, **kwargs):
+        raise ExecutionTimeout("operation exceeded time limit")
+
+    async def bump_users():
+        server.collection_versions.bump("users")
+
+    client.portal.call(bump_users)
+    with monkeypatch.context() as patch:
+        patch.setattr(server.storage.users, "with_expectations", timed_out)
+        assert client.get("/api/matching-analysis").status_code == 503
+
+    response = client.get("/api/matching-analysis")
+    assert response.status_code == 200
+    expected = client.portal.call(server.MatchingService.generate_matching_analysis)
+    assert response.json()["companies"] == expected["companies"]
+    assert response.json()["students"] == expected["students"]
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import server
+
+
+def _challenge(challenge_id, deadline, **fields):
+    return {"id": challenge_id, "title": f"Challenge {challenge_id}", "description": "In-memory challenge",
+            "creator_id": "creator", "creator_name": "Creator", "created_at": datetime.utcnow(),
+            "deadline": deadline, "active": True, "status": "open", **fields}
+
+
+def test_expiry_updates_the_deadline_index_and_active_state():
+    today = datetime(2026, 5, 10)
+    repository = server.Storage("memory").challenges
+
+    async def scenario():
+        await repository.insert(_challenge("past", today - timedelta(days=1)))
+        await repository.insert(_challenge("today", today))
+        await repository.insert(_challenge("future", today + timedelta(days=3)))
+        await repository.insert(_challenge("closed", today - timedelta(days=2), active=False, status="expired"))
+        await repository.insert(_challenge("open-ended", None))
+        window = (today - timedelta(days=5), today + timedelta(days=5))
+        before = await repository.list_active(10, *window)
+        expired = await repository.expire(today, today)
+        again = await repository.expire(today, today)
+        after = await repository.list_active(10, *window)
+        return before, expired, again, after, await repository.get("past"), await repository.count_active()
+
+    before, expired, again, after, past, active = asyncio.run(scenario())
+
+    assert {challenge["id"] for challenge in before} == {"past", "today", "future"}
+    assert (expired, again) == (1, 0)
+    assert {challenge["id"] for challenge in after} == {"today", "future"}
+    assert past["active"] is False and past["status"] == "expired" and past["deactivated_at"] == today
+    assert active == 3
+    assert [challenge_id for _, challenge_id in repository._by_deadline] == ["today", "future"]
+
+
+def test_deadline_service_expires_through_the_storage_backend(client, monkeypatch):
+    memory = server.Storage("memory")
+    monkeypatch.setattr(server, "storage", memory)
+    yesterday = server.DeadlineService.today() - timedelta(days=1)
+
+    async def scenario():
+        await memory.challenges.insert(_challenge("due", yesterday))
+        version = server.collection_versions.get("challenges")
+        expired = await server.DeadlineService.expire()
+        return expired, server.collection_versions.get("challenges") - version, await memory.challenges.get("due")
+
+    expired, bumped, due = client.portal.call(scenario)
+
+    assert (expired, bumped) == (1, 1)
+    assert due["active"] is False
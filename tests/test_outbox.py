@@ -0,0 +1,142 @@
+import uuid
+from datetime import datetime
+
+import server
+from tests.conftest import login, register
+
+
+def test_redelivered_event_is_not_applied_twice(client, db):
+    user_id = str(uuid.uuid4())
+    client.portal.call(db.users.insert_one, {"id": user_id, "email": f"{user_id}@example.com", "points": 0})
+
+    async def deliver(event_ids):
+        await server.OutboxService.apply_increments(
+            db.users, {"id": user_id}, [(event_id, {"points": server.VOTE_POINTS}) for event_id in event_ids]
+        )
+
+    client.portal.call(deliver, ["evt-A"])
+    client.portal.call(deliver, [f"evt-{number}" for number in range(200)])
+    client.portal.call(deliver, ["evt-A"])
+
+    user = client.portal.call(db.users.find_one, {"id": user_id})
+    assert user["points"] == 201 * server.VOTE_POINTS
+    assert "applied_events" not in user
+
+
+def test_batch_with_one_redelivered_event_applies_the_others(client, db):
+    user_id = str(uuid.uuid4())
+    client.portal.call(db.users.insert_one, {"id": user_id, "email": f"{user_id}@example.com", "points": 0})
+
+    async def deliver(event_ids):
+        await server.OutboxService.apply_increments(
+            db.users, {"id": user_id}, [(event_id, {"points": server.VOTE_POINTS}) for event_id in event_ids]
+        )
+
+    client.portal.call(deliver, ["evt-1"])
+    client.portal.call(deliver, ["evt-1", "evt-2", "evt-3"])
+
+    assert client.portal.call(db.users.find_one, {"id": user_id})["points"] == 3 * server.VOTE_POINTS
+
+
+def _vote_event(voter_id, solution):
+    vote = server.Vote(user_id=voter_id, solution_id=solution["id"])
+    return vote, {
+        "solution_id": solution["id"],
+        "challenge_id": solution["challenge_id"],
+        "author_id": solution["author_id"],
+        "voter_id": voter_id,
+        "points": server.VOTE_POINTS,
+        "vote": vote.dict()
+    }
+
+
+def _submit_solution(client, email):
+    author = register(client, email)
+    headers = login(client, email, "123456")
+    challenge = client.get("/api/challenges").json()[0]
+    response = client.post("/api/solutions", json={
+        "challenge_id": challenge["id"], "description": "A solution worth voting for"
+    }, headers=headers)
+    assert response.status_code == 200, response.text
+    return author, response.json()
+
+
+def _drain(client):
+    while client.portal.call(server.outbox_worker.drain_once):
+        pass
+
+
+def test_vote_committed_by_its_event_survives_a_crash_before_the_insert(client, db):
+    author, solution = _submit_solution(client, f"author-{uuid.uuid4()}@example.com")
+    voter = register(client, f"voter-{uuid.uuid4()}@example.com")
+
+    # The request wrote the event and stopped before inserting the vote
+    vote, payload = _vote_event(voter["id"], solution)
+    client.portal.call(server.OutboxService.append, "vote_cast", payload)
+    _drain(client)
+
+    assert client.portal.call(db.votes.find_one, {"id": vote.id}) is not None
+    assert client.portal.call(db.solutions.find_one, {"id": solution["id"]})["votes"] == 1
+    assert client.portal.call(db.users.find_one, {"id": author["id"]})["points"] == server.VOTE_POINTS
+
+
+def test_event_whose_vote_conflicts_has_no_effect(client, db):
+    author, solution = _submit_solution(client, f"author-{uuid.uuid4()}@example.com")
+    email = f"voter-{uuid.uuid4()}@example.com"
+    voter = register(client, email)
+    response = client.post(f"/api/solutions/{solution['id']}/vote", headers=login(client, email, "123456"))
+    assert response.status_code == 200, response.text
+
+    # A second event for the same voter, e.g. from a request that lost the insert race
+    _, payload = _vote_event(voter["id"], solution)
+    client.portal.call(server.OutboxService.append, "vote_cast", payload)
+    _drain(client)
+
+    assert client.portal.call(db.solutions.find_one, {"id": solution["id"]})["votes"] == 1
+    assert client.portal.call(db.users.find_one, {"id": author["id"]})["points"] == server.VOTE_POINTS
+
+
+def test_one_failing_event_does_not_fail_its_batch(client, db, monkeypatch):
+    monkeypatch.setattr(server.OutboxWorker, "MAX_ATTEMPTS", 3)
+    handled = []
+
+    async def handler(events):
+        if any(event["payload"]["poison"] for event in events):
+            raise RuntimeError("poisoned event")
+        handled.extend(event["payload"]["name"] for event in events)
+
+    monkeypatch.setitem(server.outbox_worker._handlers, "test_batch", [handler])
+    for name in ("first", "poison", "last"):
+        client.portal.call(server.OutboxService.append, "test_batch", {"name": name, "poison": name == "poison"})
+
+    for _ in range(server.OutboxWorker.MAX_ATTEMPTS + 1):
+        client.portal.call(db.outbox.update_many, {"type": "test_batch"}, {"$set": {"next_attempt_at": datetime.utcnow()}})
+        _drain(client)
+
+    assert sorted(handled) == ["first", "last"]
+    remaining = client.portal.call(db.outbox.find({"type": "test_batch"}).to_list, None)
+    assert [(event["payload"]["name"], event["status"]) for event in remaining] == [("poison", "failed")]
+    assert remaining[0]["attempts"] == server.OutboxWorker.MAX_ATTEMPTS
+    client.portal.call(db.outbox.delete_many, {"type": "test_batch"})
+
+
+def test_conflicting_vote_reaches_no_handler_whatever_the_registration_order(client, db, monkeypatch):
+    author, solution = _submit_solution(client, f"author-{uuid.uuid4()}@example.com")
+    email = f"voter-{uuid.uuid4()}@example.com"
+    voter = register(client, email)
+    assert client.post(f"/api/solutions/{solution['id']}/vote", headers=login(client, email, "123456")).status_code == 200
+    _drain(client)
+
+    seen = []
+
+    async def first_handler(events):
+        seen.extend(event["id"] for event in events)
+
+    handlers = [first_handler] + server.outbox_worker._handlers["vote_cast"]
+    monkeypatch.setitem(server.outbox_worker._handlers, "vote_cast", handlers)
+    _, payload = _vote_event(voter["id"], solution)
+    event_id = client.portal.call(server.OutboxService.append, "vote_cast", payload)
+    _drain(client)
+
+    assert event_id not in seen
+    assert client.portal.call(db.outbox.find_one, {"id": event_id}) is None
@@ -0,0 +1,74 @@
+import asyncio
+import marshal
+import time
+import uuid
+
+import server
+from tests.conftest import login, register
+
+
+def _busy_loop_work():
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+def test_sampling_captures_the_loop_thread_stacks():
+    profiler = server.Profiler()
+
+    async def scenario():
+        sampling = asyncio.create_task(profiler.sample(0.2, None, 0.001))
+        await asyncio.sleep(0)
+        _busy_loop_work()
+        return await sampling
+
+    collapsed, requests = asyncio.run(scenario())
+
+    assert requests == 0 and profiler.session is None
+    assert any("_busy_loop_work" in line for line in collapsed.splitlines())
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+
+def test_a_session_ends_after_the_requested_number_of_requests():
+    profiler = server.Profiler()
+    profiler.request_done()  # not counted while no session runs
+
+    async def scenario():
+        sampling = asyncio.create_task(profiler.sample(30, 2, 0.01))
+        await asyncio.sleep(0)
+        for _ in range(2):
+            profiler.request_done()
+        return await asyncio.wait_for(sampling, timeout=1)
+
+    _, requests = asyncio.run(scenario())
+
+    assert requests == 2
+
+
+def test_cprofile_returns_pstats_text_or_a_marshalled_dump():
+    profiler = server.Profiler()
+
+    async def scenario(raw):
+        profiling = asyncio.create_task(profiler.cprofile(0.1, None, raw))
+        await asyncio.sleep(0)
+        _busy_loop_work()
+        return await profiling
+
+    text, _ = asyncio.run(scenario(False))
+    dump, _ = asyncio.run(scenario(True))
+
+    assert b"_busy_loop_work" in text and b"function calls" in text
+    assert any(function == "_busy_loop_work" for _, _, function in marshal.loads(dump))
+
+
+def test_profile_endpoint_is_admin_only(client):
+    email = f"profile-{uuid.uuid4()}@example.com"
+    register(client, email)
+    headers = login(client, email, "123456")
+
+    assert client.post("/api/admin/profile?seconds=0.05", headers=headers).status_code == 403
+
+    response = client.post("/api/admin/profile?mode=cprofile&seconds=0.05", headers=login(client))
+    assert response.status_code == 200
+    assert response.headers["x-profiled-requests"] == "0"
+    assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import server
+
+
+def test_publish_coalesces_per_key_and_sums_counters():
+    broker = server.EventBroker()
+    stats = broker.subscribe(("stats",))
+    solutions = broker.subscribe(("solutions:c1",))
+
+    broker.publish("stats", "stats_delta", "stats", {"total_votes": 1}, sum_fields=True)
+    broker.publish("stats", "stats_delta", "stats", {"total_votes": 2, "total_users": 1}, sum_fields=True)
+    broker.publish("solutions:c1", "solution_votes", "s1", {"votes": 1})
+    broker.publish("solutions:c1", "solution_votes", "s1", {"votes": 2})
+    broker.publish("solutions:c2", "solution_votes", "s2", {"votes": 7})
+
+    assert stats.pending == {("stats_delta", "stats"): {"total_votes": 3, "total_users": 1}}
+    assert solutions.pending == {("solution_votes", "s1"): {"votes": 2}}
+    assert stats.ready.is_set() and solutions.ready.is_set()
+
+    broker.unsubscribe(stats)
+    broker.unsubscribe(solutions)
+    assert broker.subscriber_count == 0 and not broker._topics
+
+
+def test_stream_flushes_pending_updates_as_sse_frames(monkeypatch):
+    monkeypatch.setattr(server.EventBroker, "FLUSH_INTERVAL", 0)
+    broker = server.EventBroker()
+
+    async def scenario():
+        subscriber = broker.subscribe(("leaderboard",))
+        frames = broker.stream(subscriber)
+        ready = await frames.__anext__()
+        broker.publish("leaderboard", "user_points", "u1", {"id": "u1", "points": 10})
+        broker.publish("leaderboard", "user_points", "u1", {"id": "u1", "points": 20})
+        update = await asyncio.wait_for(frames.__anext__(), timeout=1)
+        await frames.aclose()
+        return ready, update
+
+    ready, update = asyncio.run(scenario())
+
+    assert ready == "retry: 5000\nevent: ready\ndata: {}\n\n"
+    assert update == f"event: user_points\ndata: {json.dumps({'id': 'u1', 'points': 20})}\n\n"
+    assert broker.subscriber_count == 0
+
+
+class FakeChangeStream:
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    async def try_next(self):
+        return self.changes.pop(0) if self.changes else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.changes:
+            raise StopAsyncIteration
+        return self.changes.pop(0)
+
+
+def _insert(collection, document):
+    return {"ns": {"coll": collection}, "operationType": "insert", "fullDocument": document}
+
+
+def test_relay_keeps_the_first_change_and_counts_active_challenges(client, monkeypatch):
+    monkeypatch.setattr(server.event_broker, "local_publish", True)
+    monkeypatch.setenv("PUSH_SOURCE", "auto")
+    stream = FakeChangeStream([
+        _insert("solutions", {"id": "s1", "challenge_id": "c1", "author_name": "Ana"}),
+        _insert("challenges", {"id": "c1", "active": True}),
+        _insert("challenges", {"id": "c2", "active": False}),
+        {
+            "ns": {"coll": "challenges"}, "operationType": "update",
+            "fullDocument": {"id": "c1", "active": False},
+            "updateDescription": {"updatedFields": {"active": False, "status": "expired"}},
+        },
+        _insert("votes", {"id": "v1"}),
+    ])
+    monkeypatch.setattr(server.db_manager.db, "watch", lambda *args, **kwargs: stream, raising=False)
+    relay = server.ChangeStreamRelay()
+
+    async def scenario():
+        stats = server.event_broker.subscribe(("stats",))
+        solutions = server.event_broker.subscribe(("solutions:c1",))
+        try:
+            await relay.start()
+            assert not server.event_broker.local_publish
+            await relay._task
+            return stats.pending, solutions.pending
+        finally:
+            await relay.stop()
+            server.event_broker.unsubscribe(stats)
+            server.event_broker.unsubscribe(solutions)
+
+    stats, solutions = client.portal.call(scenario)
+
+    assert solutions == {("solution_created", "s1"): {"solution_id": "s1", "author_name": "Ana"}}
+    assert stats == {("stats_delta", "stats"): {"total_solutions": 1, "total_challenges": 0, "total_votes": 1}}
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from pymongo.errors import ExecutionTimeout
+
+import server
+from tests.conftest import login
+
+
+async def _disconnect_mid_request(method):
+    """Run a slow handler behind QueryBudgetMiddleware and hang up while it works"""
+    started, finished = asyncio.Event(), asyncio.Event()
+    hang_up = asyncio.Event()
+
+    async def handler(scope, receive, send):
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.set()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        await hang_up.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": method, "path": "/api/solutions/some-id/vote", "headers": []}
+    request = asyncio.create_task(server.QueryBudgetMiddleware(handler)(scope, receive, send))
+    await started.wait()
+    hang_up.set()
+    await request
+    return finished.is_set()
+
+
+def test_disconnect_cancels_reads_but_not_writes(client):
+    assert client.portal.call(_disconnect_mid_request, "POST") is True
+    assert client.portal.call(_disconnect_mid_request, "GET") is False
+
+
+def test_query_timeout_while_authenticating_is_a_503(client, monkeypatch):
+    headers = login(client)
+
+    async def timed_out(*args, **kwargs):
+        raise ExecutionTimeout("operation exceeded time limit")
+
+    monkeypatch.setattr(server.storage.users, "get", timed_out)
+    response = client.get("/api/profile/votes", headers=headers)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+async def _deadline_after(delay):
+    await asyncio.sleep(delay)
+    return server._query_deadline.get(), server.max_time_ms()
+
+
+def test_background_tasks_run_outside_the_request_budget():
+    async def scenario():
+        server._query_deadline.set(time.monotonic() + 0.001)
+        seen = await server.spawn(_deadline_after(0.01), "budget-test")
+        return seen, server._query_deadline.get() is not None
+
+    assert asyncio.run(scenario()) == ((None, None), True)
+
+
+def test_coalesced_callers_keep_their_own_budgets():
+    @server.single_flight
+    async def shared():
+        return await _deadline_after(0.05)
+
+    async def call_with_budget(seconds):
+        server._query_deadline.set(time.monotonic() + seconds)
+        return await shared()
+
+    async def scenario():
+        return await asyncio.gather(call_with_budget(0.01), call_with_budget(5), return_exceptions=True)
+
+    leader, follower = asyncio.run(scenario())
+
+    assert isinstance(leader, ExecutionTimeout)
+    assert follower == (None, None)
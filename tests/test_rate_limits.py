@@ -0,0 +1,32 @@
+import uuid
+
+import server
+
+
+def _login_attempts(client, count, headers_for):
+    statuses = []
+    for attempt in range(count):
+        response = client.post(
+            "/api/login",
+            json={"email": "nobody@example.com", "password": "wrong-password"},
+            headers=headers_for(attempt)
+        )
+        statuses.append(response.status_code)
+    return statuses
+
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(client):
+    statuses = _login_attempts(client, 15, lambda attempt: {"X-Forwarded-For": f"203.0.113.{attempt}"})
+    assert statuses[:10] == [401] * 10
+    assert set(statuses[10:]) == {429}
+
+
+def test_junk_bearer_tokens_share_the_peer_bucket(client):
+    statuses = _login_attempts(client, 15, lambda attempt: {"Authorization": f"Bearer {uuid.uuid4()}"})
+    assert set(statuses[10:]) == {429}
+
+
+def test_forwarded_for_is_honored_behind_a_trusted_proxy(client, monkeypatch):
+    monkeypatch.setattr(server, "TRUSTED_PROXIES", frozenset({"testclient"}))
+    statuses = _login_attempts(client, 15, lambda attempt: {"X-Forwarded-For": f"203.0.113.{attempt}, testclient"})
+    assert statuses == [401] * 15
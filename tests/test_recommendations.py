@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+import server
+
+CHALLENGES = [
+    {"id": "data", "title": "Análise de dados educacionais", "summary": "Painel de dados para análise de evasão",
+     "description": "Use ciência de dados e aprendizado de máquina sobre dados acadêmicos", "active": True},
+    {"id": "energy", "title": "Energia solar no campus", "summary": "Reduzir o consumo de energia",
+     "description": "Proponha painéis solares e sustentabilidade energética", "active": True},
+    {"id": "mobility", "title": "Mobilidade urbana", "summary": "Transporte sustentável",
+     "description": "Bicicletas compartilhadas e transporte coletivo para estudantes", "active": True},
+]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    listed = []
+
+    async def list_active(limit):
+        listed.append(limit)
+        return [dict(challenge) for challenge in CHALLENGES]
+
+    monkeypatch.setattr(server.storage.challenges, "list_active", list_active)
+    recommendations = server.RecommendationService()
+    recommendations.listed = listed
+    return recommendations
+
+
+def _ids(recommendations):
+    return [challenge["id"] for challenge, _ in recommendations]
+
+
+def test_challenges_are_ranked_by_cosine_similarity(service):
+    user = {"id": "u1", "expectations": "Quero trabalhar com dados, análise de dados e energia"}
+
+    ranked = asyncio.run(service.recommend(user, limit=10))
+
+    assert _ids(ranked) == ["data", "energy"]
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True) and all(0 < score <= 1 for score in scores)
+
+
+def test_a_challenge_matching_the_query_exactly_scores_one(service):
+    challenge = CHALLENGES[2]
+    text = " ".join((challenge["title"], challenge["summary"], challenge["description"]))
+
+    ranked = asyncio.run(service.recommend({"id": "u1", "expectations": text}, limit=1))
+
+    assert _ids(ranked) == ["mobility"] and ranked[0][1] == pytest.approx(1.0)
+
+
+def test_users_without_matching_expectations_get_nothing(service):
+    async def scenario():
+        return (
+            await service.recommend({"id": "u1", "expectations": None}, limit=5),
+            await service.recommend({"id": "u2", "expectations": "para com uma que"}, limit=5),
+        )
+
+    assert asyncio.run(scenario()) == ([], [])
+
+
+def test_local_creations_are_indexed_in_place_and_other_writes_rebuild(service):
+    user = {"id": "u1", "expectations": "robótica e automação industrial"}
+    robotics = {"id": "robotics", "title": "Robótica", "summary": "Automação industrial",
+                "description": "Braço robótico", "active": True}
+
+    async def scenario():
+        before = await service.recommend(user, limit=5)
+        server.collection_versions.bump("challenges")
+        service.add(robotics)
+        after_add = await service.recommend(user, limit=5)
+        rebuilds_after_add = len(service.listed)
+        server.collection_versions.bump("challenges")
+        after_rebuild = await service.recommend(user, limit=5)
+        return before, after_add, rebuilds_after_add, after_rebuild
+
+    before, after_add, rebuilds_after_add, after_rebuild = asyncio.run(scenario())
+
+    assert before == []
+    assert _ids(after_add) == ["robotics"] and rebuilds_after_add == 1
+    # The rebuilt index only holds what storage lists
+    assert after_rebuild == [] and len(service.listed) == 2
+
+
+def test_inactive_challenges_are_not_indexed(service):
+    async def scenario():
+        await service.warm()
+        server.collection_versions.bump("challenges")
+        service.add({"id": "closed", "title": "Robótica", "summary": "", "description": "", "active": False})
+        return await service.recommend({"id": "u1", "expectations": "robótica"}, limit=5)
+
+    assert asyncio.run(scenario()) == []
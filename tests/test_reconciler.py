@@ -0,0 +1,51 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import server
+
+
+def _lost_vote(client, db):
+    solution = {"id": str(uuid.uuid4()), "challenge_id": str(uuid.uuid4()), "author_id": str(uuid.uuid4())}
+    client.portal.call(db.solutions.insert_one, dict(solution))
+    voter_id = str(uuid.uuid4())
+    client.portal.call(db.votes.insert_one, {
+        "id": str(uuid.uuid4()), "user_id": voter_id, "solution_id": solution["id"], "created_at": datetime.utcnow()
+    })
+    return solution, voter_id
+
+
+def test_reconciler_replays_lost_votes_once_and_resumes_from_its_watermark(client, db, monkeypatch):
+    monkeypatch.setattr(server.PointsLedger, "SETTLE_SECONDS", 0)
+    client.portal.call(server.VoteReconciler.run)
+
+    solution, voter_id = _lost_vote(client, db)
+    time.sleep(0.01)  # Stored timestamps have millisecond precision
+
+    report = client.portal.call(server.VoteReconciler.run)
+    assert (report["checked"], report["replayed"]) == (1, 1)
+    report = client.portal.call(server.VoteReconciler.run)
+    assert (report["checked"], report["replayed"]) == (0, 0)
+
+    event = client.portal.call(db.outbox.find_one_and_delete, {"id": f"replay:{voter_id}:{solution['id']}"})
+    assert event["payload"]["author_id"] == solution["author_id"]
+    assert event["payload"]["points"] == server.VOTE_POINTS
+
+
+def test_reconciler_leaves_votes_whose_event_is_still_in_the_outbox(client, db, monkeypatch):
+    monkeypatch.setattr(server.PointsLedger, "SETTLE_SECONDS", 0)
+    client.portal.call(server.VoteReconciler.run)
+
+    solution, voter_id = _lost_vote(client, db)
+    # The original event is backing off after failed attempts
+    client.portal.call(db.outbox.insert_one, {
+        "id": str(uuid.uuid4()), "type": "vote_cast", "status": "pending", "attempts": 5,
+        "next_attempt_at": datetime.utcnow() + timedelta(hours=1), "created_at": datetime.utcnow(),
+        "payload": {"solution_id": solution["id"], "challenge_id": solution["challenge_id"],
+                    "author_id": solution["author_id"], "voter_id": voter_id, "points": server.VOTE_POINTS}
+    })
+    time.sleep(0.01)
+
+    report = client.portal.call(server.VoteReconciler.run)
+    assert (report["checked"], report["replayed"]) == (1, 0)
+    client.portal.call(db.outbox.delete_many, {"payload.voter_id": voter_id})
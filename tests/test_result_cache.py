@@ -0,0 +1,109 @@
+import asyncio
+
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def _cache(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "time", clock.time)
+    return server.ResultCache(server.LocalCacheBackend(1024 * 1024)), clock
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    calls = []
+    release = asyncio.Event()
+
+    @cache.cached(tags=("tests_swr",), ttl=10, stale=60)
+    async def compute(value: int):
+        calls.append(value)
+        if len(calls) > 1:
+            await release.wait()
+        return {"value": value, "call": len(calls)}
+
+    async def scenario():
+        first = await compute(value=1)
+        clock.now += 5
+        fresh = await compute(value=1)
+        clock.now += 10
+        stale = await asyncio.gather(compute(value=1), compute(value=1))
+        await asyncio.sleep(0)
+        refreshing = len(calls)
+        release.set()
+        while cache._refreshing:
+            await asyncio.sleep(0)
+        refreshed = await compute(value=1)
+        return first, fresh, stale, refreshing, refreshed
+
+    first, fresh, stale, refreshing, refreshed = asyncio.run(scenario())
+
+    assert first == fresh == {"value": 1, "call": 1}
+    assert stale == [first, first]
+    assert refreshing == 2
+    assert refreshed == {"value": 1, "call": 2}
+
+
+def test_entries_past_the_stale_window_are_recomputed_inline(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    calls = []
+
+    @cache.cached(tags=("tests_swr",), ttl=10, stale=60)
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        first = await compute()
+        clock.now += 71
+        return first, await compute()
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_a_version_bump_invalidates_tagged_entries(monkeypatch):
+    cache, _ = _cache(monkeypatch)
+    calls = []
+
+    @cache.cached(tags=("tests_swr_bump",), ttl=10, stale=60)
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        first = await compute()
+        cached = await compute()
+        server.collection_versions.bump("tests_swr_bump")
+        return first, cached, await compute()
+
+    assert asyncio.run(scenario()) == (1, 1, 2)
+
+
+def test_a_failed_refresh_keeps_serving_the_stale_entry(monkeypatch):
+    cache, clock = _cache(monkeypatch)
+    calls = []
+
+    @cache.cached(tags=("tests_swr",), ttl=10, stale=60)
+    async def compute():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("database unavailable")
+        return "first"
+
+    async def scenario():
+        await compute()
+        clock.now += 20
+        stale = await compute()
+        while cache._refreshing:
+            await asyncio.sleep(0)
+        return stale, await compute()
+
+    assert asyncio.run(scenario()) == ("first", "first")
+    assert len(calls) == 3
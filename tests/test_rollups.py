@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timedelta
+
+import server
+from tests.conftest import login
+
+
+def _event(created_at):
+    return {"id": str(uuid.uuid4()), "created_at": created_at, "payload": {}}
+
+
+def _count(client, db, day):
+    doc = client.portal.call(db.activity_rollups.find_one, {"_id": server.RollupService.doc_id("challenges", day)})
+    return doc["count"] if doc else 0
+
+
+def test_backfill_leaves_live_counters_alone(client, db):
+    now = datetime.utcnow()
+    today = server.RollupService.day(now)
+    yesterday = server.RollupService.day(now - timedelta(days=1))
+    client.portal.call(db.challenges.insert_one, {"id": str(uuid.uuid4()), "created_at": now - timedelta(days=1)})
+
+    client.portal.call(server.RollupService.apply, "challenges", [_event(now)])
+    live_today = _count(client, db, today)
+    client.portal.call(server.RollupService.backfill)
+    backfilled_yesterday = _count(client, db, yesterday)
+
+    assert _count(client, db, today) == live_today
+    assert backfilled_yesterday >= 1
+
+    # A late event from a backfilled day was counted from its source document
+    client.portal.call(server.RollupService.apply, "challenges", [_event(now - timedelta(days=1)), _event(now)])
+    assert _count(client, db, yesterday) == backfilled_yesterday
+    assert _count(client, db, today) == live_today + 1
+
+
+def test_timeseries_accepts_timestamps_with_an_offset(client):
+    headers = login(client)
+    today = datetime.utcnow().date()
+
+    for start, end in [
+        (f"{today - timedelta(days=7)}T00:00:00Z", None),
+        (f"{today - timedelta(days=7)}T00:00:00-03:00", f"{today}T12:00:00+02:00"),
+        (f"{today - timedelta(days=7)}", f"{today}T23:00:00Z"),
+    ]:
+        params = {"type": "challenges", "start": start, **({"end": end} if end else {})}
+        response = client.get("/api/admin/timeseries", params=params, headers=headers)
+        assert response.status_code == 200, (start, end, response.text)
+        assert len(response.json()["points"]) == 8
+
+    response = client.get("/api/admin/timeseries", params={
+        "type": "challenges", "start": f"{today}T00:00:00+00:00", "end": f"{today}T00:00:00+05:00"
+    }, headers=headers)
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    calls = []
+
+    @server.single_flight
+    async def expensive(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return {"key": key}
+
+    async def scenario():
+        return await asyncio.gather(expensive("a"), expensive("a"), expensive("b"), expensive("a"))
+
+    first, second, other, third = asyncio.run(scenario())
+
+    assert sorted(calls) == ["a", "b"]
+    assert first is second is third and other == {"key": "b"}
+
+
+def test_an_exception_reaches_every_waiter_and_is_not_remembered():
+    calls = []
+
+    @server.single_flight
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(failing(), failing(), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await failing()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert len(calls) == 2
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_call():
+    @server.single_flight
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.create_task(slow())
+        follower = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_unhashable_arguments_are_not_coalesced():
+    calls = []
+
+    @server.single_flight
+    async def by_filter(filters):
+        calls.append(filters)
+        call_number = len(calls)
+        await asyncio.sleep(0.01)
+        return call_number
+
+    async def scenario():
+        return await asyncio.gather(by_filter({"a": 1}), by_filter({"a": 1}))
+
+    assert sorted(asyncio.run(scenario())) == [1, 2]
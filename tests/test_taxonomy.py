@@ -0,0 +1,66 @@
+import pytest
+
+import server
+from tests.conftest import login
+
+TAXONOMY = {
+    "company": {"robotica": ["robótica", "automação"], "digital": ["dados", "digitais"]},
+    "student": {"remoto": ["remoto", "home office"]},
+}
+
+
+@pytest.fixture
+def admin(client):
+    headers = login(client)
+    yield headers
+    # Put the default keywords back for the other tests
+    current = client.get("/api/admin/taxonomy", headers=headers).json()
+    defaults = server.TaxonomyService.defaults()
+    if {"company": current["company"], "student": current["student"]} != defaults:
+        client.put("/api/admin/taxonomy", json=defaults, headers=headers)
+        client.portal.call(server.taxonomy_service.sync)
+
+
+def test_updates_are_versioned_and_reject_stale_writers(client, admin):
+    version = client.get("/api/admin/taxonomy", headers=admin).json()["version"]
+
+    response = client.put("/api/admin/taxonomy", json={**TAXONOMY, "version": version}, headers=admin)
+    assert response.status_code == 200 and response.json()["version"] == version + 1
+
+    stale = client.put("/api/admin/taxonomy", json={**TAXONOMY, "version": version}, headers=admin)
+    assert stale.status_code == 409
+
+    current = client.get("/api/admin/taxonomy", headers=admin).json()
+    assert current["version"] == version + 1 and current["company"] == TAXONOMY["company"]
+
+
+def test_other_workers_install_new_versions_and_rescore(client, db, admin):
+    other_worker = server.TaxonomyService()
+    client.portal.call(other_worker.load)
+    version = other_worker.matcher.version
+
+    response = client.put("/api/admin/taxonomy", json=TAXONOMY, headers=admin)
+    assert response.json()["version"] == version + 1
+
+    client.portal.call(other_worker.sync)
+    assert other_worker.matcher.version == version + 1
+    assert other_worker.matcher.analyze("Buscamos robótica e dados", "empresa") == {"robotica": 20, "digital": 20}
+
+    stale = client.portal.call(db.users.count_documents, {
+        "type": {"$in": ["empresa", "aluno"]}, "expectations": {"$ne": None},
+        "analysis_version": {"$ne": version + 1}
+    })
+    assert stale == 0
+    analysis = client.get("/api/matching-analysis").json()
+    categories = {entry["expectation"] for entry in analysis["companyExpectations"]}
+    assert categories and categories <= {"Robotica", "Digital"}
+
+
+def test_compiled_matchers_are_cached_per_version():
+    service = server.TaxonomyService()
+
+    first = service._compile(2, TAXONOMY)
+    assert service._compile(2, {"company": {}, "student": {}}) is first
+    for version in range(3, 3 + service.CACHE_SIZE):
+        service._compile(version, TAXONOMY)
+    assert service._compile(2, TAXONOMY) is not first
@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime
+
+import server
+from tests.conftest import login, register
+
+
+def test_votes_cast_through_another_worker_reach_the_warm_set(client, db):
+    email = f"voter-{uuid.uuid4()}@example.com"
+    voter = register(client, email)
+    headers = login(client, email, "123456")
+    assert client.get("/api/profile/votes", headers=headers).json()["solution_ids"] == []
+
+    # Another worker inserted a vote and published its votes version
+    solution_id = str(uuid.uuid4())
+    client.portal.call(db.votes.insert_one, {
+        "id": str(uuid.uuid4()), "user_id": voter["id"], "solution_id": solution_id,
+        "created_at": datetime.utcnow()
+    })
+    client.portal.call(db.collection_versions.update_one, {"_id": "votes"}, {"$inc": {"version": 1}}, True)
+    client.portal.call(server.collection_versions.sync)
+    client.portal.call(server.voted_index.sync)
+
+    assert client.get("/api/profile/votes", headers=headers).json()["solution_ids"] == [solution_id]
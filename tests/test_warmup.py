@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import server
+
+
+class ScriptedWarmup(server.WarmupService):
+    BUDGET = 0.05
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = False
+
+    def steps(self):
+        return {"fast": self._fast(), "broken": self._broken(), "slow": self._slow()}
+
+    async def _fast(self):
+        return None
+
+    async def _broken(self):
+        raise RuntimeError("cache backend down")
+
+    async def _slow(self):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def test_warmup_reports_each_step_and_cancels_what_exceeds_the_budget():
+    warmup = ScriptedWarmup()
+    started = time.perf_counter()
+
+    asyncio.run(warmup.run())
+
+    assert time.perf_counter() - started < 1
+    assert warmup.report == {"fast": "ok", "broken": "failed", "slow": "timed out"}
+    assert warmup.cancelled and warmup.ready
+
+
+def test_ready_reports_the_warmup_and_drops_during_shutdown(client, monkeypatch):
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert {"challenges", "leaderboard", "stats", "recommendations"} <= set(body["warmup"])
+
+    monkeypatch.setattr(server.warmup, "ready", False)
+    response = client.get("/api/ready")
+    assert response.status_code == 503 and response.json()["ready"] is False